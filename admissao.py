@@ -0,0 +1,317 @@
+import collections
+import math
+import threading
+import time
+
+# =============================
+# Controle de admissão
+# =============================
+# O Flask-Limiter limita cada IP, mas não a concorrência total: numa rajada,
+# as requisições se acumulam nas threads do worker até o timeout do gunicorn.
+# Aqui cada worker admite no máximo `max_em_andamento` requisições comuns ao
+# mesmo tempo; as seguintes esperam em uma fila limitada, em ordem de
+# chegada, até um prazo. Com a fila cheia ou o prazo vencido, a resposta é
+# um 503 imediato com Retry-After, sem passar pelo Flask. Health checks,
+# métricas e arquivos estáticos não entram no controle.
+#
+# A espera ocupa uma thread do worker: mantenha max_em_andamento + max_fila
+# abaixo de --threads para que sobre thread para as rotas prioritárias.
+#
+# Uma conexão WebSocket (flask-sock no gthread) ocupa uma thread enquanto
+# estiver aberta, então não entra nessa fila: as conexões têm um limite
+# próprio por worker, sem espera (LimiteConexoes). Acima dele, o handshake
+# recebe um 503 imediato e o cliente continua com POST /jogar.
+
+FILA_CHEIA = "fila_cheia"
+PRAZO = "prazo"
+CONEXOES = "conexoes"
+RETRY_AFTER_CONEXOES = 30  # segundos sugeridos a um handshake recusado
+
+ROTAS_PRIORITARIAS = frozenset(("/ping", "/metrics", "/favicon.ico"))
+PREFIXOS_PRIORITARIOS = ("/static/", "/ativos/", "/sons/")
+
+CORPO_RECUSA = b'{"error":"Servidor ocupado, tente novamente em instantes"}'
+
+
+class _Vaga:
+    """Uma requisição na fila; `admitida` é marcada por quem libera a vaga."""
+
+    __slots__ = ("evento", "admitida")
+
+    def __init__(self):
+        self.evento = threading.Event()
+        self.admitida = False
+
+
+class ControleAdmissao:
+    """
+    Limite de requisições simultâneas com fila de espera limitada e prazo.
+    Quem sai entrega a vaga diretamente ao primeiro da fila, de modo que a
+    ordem de chegada é respeitada e nenhuma requisição nova passa à frente.
+    """
+
+    def __init__(self, max_em_andamento=2, max_fila=1, espera_max=1.0, ao_mudar=None, ao_recusar=None):
+        """
+        Args:
+            max_em_andamento: Requisições comuns atendidas ao mesmo tempo
+            max_fila: Requisições esperando por uma vaga
+            espera_max: Segundos máximos de espera na fila
+            ao_mudar: Função (em_andamento, fila) chamada quando a ocupação muda
+            ao_recusar: Função (motivo) chamada a cada recusa (FILA_CHEIA ou PRAZO)
+        """
+        self.max_em_andamento = max_em_andamento
+        self.max_fila = max_fila
+        self.espera_max = espera_max
+        self.recusadas = collections.Counter()
+        self._ao_mudar = ao_mudar
+        self._ao_recusar = ao_recusar
+        self._lock = threading.Lock()
+        self._em_andamento = 0
+        self._fila = collections.deque()
+        self._tempo_medio = 0.0  # média móvel exponencial do tempo de atendimento
+
+    def _mudou(self):
+        # Sob self._lock
+        if self._ao_mudar is not None:
+            self._ao_mudar(self._em_andamento, len(self._fila))
+
+    def _recusar(self, motivo):
+        # Sob self._lock
+        self.recusadas[motivo] += 1
+        if self._ao_recusar is not None:
+            self._ao_recusar(motivo)
+        return False
+
+    def entrar(self, espera=None):
+        """
+        Admite a requisição atual, esperando na fila se preciso.
+
+        Args:
+            espera: Segundos que a requisição ainda pode esperar (limitado a
+                espera_max); negativo se o prazo já venceu antes de chegar aqui
+
+        Returns:
+            bool: True se admitida (chame sair() ao terminar)
+        """
+        espera = self.espera_max if espera is None else min(espera, self.espera_max)
+        with self._lock:
+            if espera < 0:
+                return self._recusar(PRAZO)
+            if self._em_andamento < self.max_em_andamento and not self._fila:
+                self._em_andamento += 1
+                self._mudou()
+                return True
+            if len(self._fila) >= self.max_fila or espera == 0:
+                return self._recusar(FILA_CHEIA)
+            vaga = _Vaga()
+            self._fila.append(vaga)
+            self._mudou()
+        vaga.evento.wait(espera)
+        with self._lock:
+            if vaga.admitida:
+                return True
+            self._fila.remove(vaga)
+            self._mudou()
+            return self._recusar(PRAZO)
+
+    def sair(self, duracao=None):
+        """Libera a vaga da requisição atual (ou a entrega ao primeiro da fila)."""
+        with self._lock:
+            if duracao is not None:
+                self._tempo_medio += 0.1 * (duracao - self._tempo_medio)
+            if self._fila:
+                vaga = self._fila.popleft()
+                vaga.admitida = True
+                vaga.evento.set()
+            else:
+                self._em_andamento -= 1
+            self._mudou()
+
+    def retry_after(self):
+        """Segundos sugeridos no Retry-After: o tempo estimado para esvaziar a fila, de 1 a 30."""
+        with self._lock:
+            estimativa = (len(self._fila) + 1) * self._tempo_medio / self.max_em_andamento
+        return min(30, max(1, math.ceil(estimativa)))
+
+    def situacao(self):
+        """Ocupação atual e recusas acumuladas no worker."""
+        with self._lock:
+            return {
+                'em_andamento': self._em_andamento,
+                'fila': len(self._fila),
+                'max_em_andamento': self.max_em_andamento,
+                'max_fila': self.max_fila,
+                'recusadas': dict(self.recusadas),
+                'tempo_medio': round(self._tempo_medio, 6),
+            }
+
+
+class LimiteConexoes:
+    """Limite de conexões WebSocket abertas ao mesmo tempo no worker, sem fila."""
+
+    def __init__(self, maximo, ao_mudar=None, ao_recusar=None):
+        """
+        Args:
+            maximo: Conexões abertas ao mesmo tempo (0 recusa todas)
+            ao_mudar: Função (abertas) chamada quando o número de conexões muda
+            ao_recusar: Função (motivo) chamada a cada recusa (CONEXOES)
+        """
+        self.maximo = maximo
+        self.recusadas = 0
+        self._ao_mudar = ao_mudar
+        self._ao_recusar = ao_recusar
+        self._lock = threading.Lock()
+        self._abertas = 0
+
+    def entrar(self):
+        """Reserva uma conexão; False se o limite já foi atingido."""
+        with self._lock:
+            if self._abertas >= self.maximo:
+                self.recusadas += 1
+                if self._ao_recusar is not None:
+                    self._ao_recusar(CONEXOES)
+                return False
+            self._abertas += 1
+            if self._ao_mudar is not None:
+                self._ao_mudar(self._abertas)
+            return True
+
+    def sair(self):
+        """Libera a conexão reservada por entrar()."""
+        with self._lock:
+            self._abertas -= 1
+            if self._ao_mudar is not None:
+                self._ao_mudar(self._abertas)
+
+    def situacao(self):
+        """Conexões abertas e recusadas no worker."""
+        with self._lock:
+            return {'abertas': self._abertas, 'maximo': self.maximo, 'recusadas': self.recusadas}
+
+
+def _websocket(environ):
+    return environ.get('HTTP_UPGRADE', '').lower() == 'websocket'
+
+
+def _recusar(start_response, retry_after):
+    """Resposta 503 gerada antes do Flask."""
+    start_response("503 Service Unavailable", [
+        ("Content-Type", "application/json"),
+        ("Content-Length", str(len(CORPO_RECUSA))),
+        ("Retry-After", str(retry_after)),
+        ("Cache-Control", "no-store"),
+    ])
+    return [CORPO_RECUSA]
+
+
+def _instante_cabecalho(valor):
+    """Instante (segundos desde a época) de um cabeçalho como X-Request-Start: "t=<s, ms ou µs>"."""
+    valor = valor.strip()
+    if valor.startswith("t="):
+        valor = valor[2:]
+    instante = float(valor)
+    while instante > 1e11:  # milissegundos ou microssegundos
+        instante /= 1000
+    return instante
+
+
+class _RespostaAdmitida:
+    """
+    Corpo da resposta de uma requisição admitida: libera a vaga quando o
+    corpo termina de ser lido ou quando o servidor chama close(), o que vier
+    primeiro (clientes como o de teste do Flask não chamam close()).
+    """
+
+    def __init__(self, resposta, liberar):
+        self._resposta = resposta
+        self._liberar = liberar
+
+    def __iter__(self):
+        yield from self._resposta
+        self._soltar()
+
+    def _soltar(self):
+        liberar, self._liberar = self._liberar, None
+        if liberar is not None:
+            liberar()
+
+    def close(self):
+        try:
+            fechar = getattr(self._resposta, "close", None)
+            if fechar is not None:
+                fechar()
+        finally:
+            self._soltar()
+
+
+class MiddlewareAdmissao:
+    """
+    Middleware WSGI que aplica o ControleAdmissao às rotas comuns. As
+    prioritárias (/ping, /metrics, estáticos) e as conexões WebSocket passam
+    direto. Com `cabecalho_inicio` (p.ex. "X-Request-Start", definido pelo
+    proxy), o prazo conta desde a chegada ao proxy, incluindo a espera na
+    fila do próprio gunicorn.
+    """
+
+    def __init__(self, app_wsgi, controle, cabecalho_inicio=None, agora=time.time):
+        self.app_wsgi = app_wsgi
+        self.controle = controle
+        self.chave_inicio = "HTTP_" + cabecalho_inicio.upper().replace("-", "_") if cabecalho_inicio else None
+        self._agora = agora
+
+    def _prioritaria(self, environ):
+        caminho = environ.get('PATH_INFO', '')
+        return (caminho in ROTAS_PRIORITARIAS or caminho.startswith(PREFIXOS_PRIORITARIOS)
+                or _websocket(environ))
+
+    def _espera(self, environ):
+        """Segundos que a requisição ainda pode esperar, ou None sem o cabeçalho de chegada."""
+        valor = environ.get(self.chave_inicio) if self.chave_inicio else None
+        if not valor:
+            return None
+        try:
+            esperou = self._agora() - _instante_cabecalho(valor)
+        except ValueError:
+            return None
+        # Relógios dessincronizados (chegada "no futuro" ou muito antiga) são ignorados
+        if not 0 <= esperou < 3600:
+            return None
+        return self.controle.espera_max - esperou
+
+    def __call__(self, environ, start_response):
+        if self._prioritaria(environ):
+            return self.app_wsgi(environ, start_response)
+        if not self.controle.entrar(self._espera(environ)):
+            return _recusar(start_response, self.controle.retry_after())
+        inicio = time.perf_counter()
+        try:
+            resposta = self.app_wsgi(environ, start_response)
+        except BaseException:
+            self.controle.sair(time.perf_counter() - inicio)
+            raise
+        return _RespostaAdmitida(resposta, lambda: self.controle.sair(time.perf_counter() - inicio))
+
+
+class MiddlewareConexoes:
+    """
+    Middleware WSGI que aplica o LimiteConexoes aos handshakes WebSocket. A
+    conexão é atendida dentro da chamada ao app (o flask-sock só retorna
+    quando ela fecha), e a vaga é liberada no retorno ou na exceção com que
+    o flask-sock encerra a requisição no gunicorn.
+    """
+
+    def __init__(self, app_wsgi, limite):
+        self.app_wsgi = app_wsgi
+        self.limite = limite
+
+    def __call__(self, environ, start_response):
+        if not _websocket(environ):
+            return self.app_wsgi(environ, start_response)
+        if not self.limite.entrar():
+            return _recusar(start_response, RETRY_AFTER_CONEXOES)
+        try:
+            resposta = self.app_wsgi(environ, start_response)
+        except BaseException:
+            self.limite.sair()
+            raise
+        return _RespostaAdmitida(resposta, self.limite.sair)
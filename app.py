@@ -1,25 +1,42 @@
-import logging
+import hashlib
+import json
 import os
 import random
 import re
+import secrets
 import time
-from logging.handlers import RotatingFileHandler
+from concurrent.futures import TimeoutError as TempoEsgotado
+from contextlib import contextmanager
+from functools import partial
 from urllib.parse import urlparse, urljoin
-from dotenv import load_dotenv
 from datetime import datetime
 
-from flask import Flask, render_template, request, jsonify, send_from_directory, abort, redirect, make_response
-from flask_caching import Cache  # type: ignore
-from flask_cors import CORS
-from flask_limiter import Limiter  # type: ignore
-from flask_limiter.util import get_remote_address  # type: ignore
-from prometheus_client import Counter  # type: ignore
+from flask import Flask, current_app, render_template, request, jsonify, send_file, abort, redirect, make_response, session, g, url_for
 from werkzeug.middleware.proxy_fix import ProxyFix
-from flask_talisman import Talisman  # Importando Flask-Talisman
 
+import metricas
+from ativos import NOME_SPRITE, ManifestoAtivos, escolher_variante
+from balde_fichas import BaldeFichas
+from backends_estado import criar_backend
+from historico_rodadas import TOTAL, HistoricoRodadas
+from instantaneo_modelos import InstantaneoModelos
+from log_rodadas import LogRodadas
+from partidas import ENCERRADA, LacoPartidas, MotorPartidas, RecusaPartida
+from admissao import ControleAdmissao, LimiteConexoes, MiddlewareAdmissao, MiddlewareConexoes
+from bandido import BandidoUCB
+from modelo_jogador import ModeloJogador, modelo_de_bytes
+from nucleo import ITENS, RESULTADOS, TABELA_RESULTADOS, VITORIA_JOGADOR, codigo_resultado, escolher_jogada
+from perfilador import MiddlewarePerfil, PerfiladorAmostragem
+from preditor_ngram import PreditorNGram
+from ranking import Ranking, apelido
+from registro import AMOSTRAR, configurar_logger
 
-# Carregar variáveis de ambiente do arquivo .env
-load_dotenv()
+
+# Carregar variáveis de ambiente do arquivo .env (o dotenv só é importado se houver um)
+PASTAS_ENV = (os.path.dirname(os.path.abspath(__file__)), os.getcwd())
+if any(os.path.exists(os.path.join(pasta, '.env')) for pasta in PASTAS_ENV):
+    from dotenv import load_dotenv
+    load_dotenv()
 
 # Gerar uma chave secreta forte se não existir
 def generate_secret_key():
@@ -47,71 +64,9 @@ class JogadaInvalidaError(JokenpoError):
 # =============================
 # Configuração do aplicativo
 # =============================
-app = Flask(__name__, static_folder="static", template_folder="templates")
-app.wsgi_app = ProxyFix(app.wsgi_app)
-
-# Configuração da chave secreta
-app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY') or generate_secret_key()
-
-# Configuração de CORS
-CORS(app, resources={
-    r"/*": {
-        "origins": ["*"],  # Permitir todas as origens temporariamente para debug
-        "methods": ["GET", "POST", "OPTIONS"],
-        "allow_headers": ["Content-Type", "X-Requested-With", "Authorization"],
-        "supports_credentials": True
-    }
-})
-
-# Configuração do Cache
-cache = Cache(app, config={'CACHE_TYPE': 'simple'})
-
-# Configuração do Limiter para rate limiting
-limiter = Limiter(
-    app=app,
-    key_func=get_remote_address,
-    storage_uri="memory://",
-    default_limits=["200 per day", "50 per hour"]
-)
-
-# =============================
-# Métricas com Prometheus
-# =============================
-jogadas_counter = Counter('jokenpo_jogadas_total', 'Total de jogadas realizadas')
-vitorias_jogador = Counter('jokenpo_vitorias_jogador', 'Total de vitórias do jogador')
-
-# =============================
-# Configurações de desenvolvimento
-# =============================
-if app.debug:
-    app.config["SEND_FILE_MAX_AGE_DEFAULT"] = 0
-
-# =============================
-# Configuração do Logger
-# =============================
-handler = RotatingFileHandler('jokenpo.log', maxBytes=1000000, backupCount=3)
-formatter = logging.Formatter('%(asctime)s [%(levelname)s] %(message)s', '%Y-%m-%d %H:%M:%S')
-handler.setFormatter(formatter)
-if app.logger.handlers:
-    app.logger.handlers = []
-app.logger.addHandler(handler)
-app.logger.setLevel(logging.INFO)
-app.logger.info("Aplicativo de Jokenpô iniciado!")
-
-# =============================
-# Constantes do jogo
-# =============================
-ITENS = ["pedra", "papel", "tesoura"]
-REGRAS_VITORIA = {
-    0: 2,  # Pedra vence Tesoura
-    1: 0,  # Papel vence Pedra
-    2: 1   # Tesoura vence Papel
-}
-JOGADA_QUE_VENCE = {
-    0: 1,  # Pedra é vencida por Papel
-    1: 2,  # Papel é vencido por Tesoura
-    2: 0   # Tesoura é vencida por Pedra
-}
+# Limites do Flask-Limiter
+LIMITES_PADRAO = ["200 per day", "50 per hour"]
+LIMITES_PRODUCAO = ["100 per day", "30 per hour", "5 per minute"]
 
 # Constantes de validação e controle
 INTERVALO_MIN_JOGADAS = 1.0  # segundos
@@ -119,108 +74,180 @@ MAX_HISTORICO = 100
 MAX_TENTATIVAS_INVALIDAS = 5
 TEMPO_BLOQUEIO = 300  # 5 minutos em segundos
 LIMITE_JOGADAS_HORA = 100
+# Rodadas por requisição em /jogar/lote. Cada rodada conta nos limites por IP,
+# então o lote máximo não pode passar do menor deles (50 por hora)
+MAX_JOGADAS_LOTE = 50
+MAX_IPS_CONTROLE = 50000  # IPs acompanhados por espaço de chaves no backend em memória
+MAX_MODELOS = 10000  # jogadores com modelo em memória por worker
+TEMPO_VIDA_MODELO = 1800  # mesmo tempo de vida da sessão
+CACHE_ATIVOS = 31536000  # um ano: os nomes mudam quando o conteúdo muda
+INTERVALO_VERIFICACAO_ATIVOS = 5.0  # segundos entre verificações de mudança em static/ e templates/
+# Canais WebSocket (/ws/jogar e /ws/partida, requerem flask-sock): o handshake
+# passa uma vez pelo Limiter. Cada conexão aberta ocupa uma thread do worker no
+# gthread, então elas são limitadas por worker e fechadas quando ociosas
+WS_MAX_CONEXOES = int(os.environ.get('JOKENPO_WS_MAX_CONEXOES', 4))  # por worker, somando os dois canais
+WS_TEMPO_OCIOSO = float(os.environ.get('JOKENPO_WS_TEMPO_OCIOSO', 60.0))  # segundos sem mensagens
+WS_TAMANHO_MAX_MENSAGEM = 1024  # bytes
+# As rodadas de /ws/jogar seguem o INTERVALO_MIN_JOGADAS por IP, como /jogar; as
+# mensagens de /ws/partida consomem fichas de um balde da conexão
+WS_RAJADA = 5  # mensagens seguidas permitidas
+WS_FICHAS_POR_SEGUNDO = 1.0
+# Partidas entre jogadores (/ws/partida, requer flask-sock): pareamento e
+# prazos em um laço asyncio por worker (ver partidas.py)
+PRAZO_PAREAMENTO = float(os.environ.get('JOKENPO_PRAZO_PAREAMENTO', 30.0))  # segundos na fila
+PRAZO_JOGADA = float(os.environ.get('JOKENPO_PRAZO_JOGADA', 10.0))  # segundos para jogar após o pareamento
+MAX_PARTIDAS = int(os.environ.get('JOKENPO_MAX_PARTIDAS', 10000))  # jogadores na fila e partidas, cada
+# Histórico de rodadas no SQLite: gravado em lotes por uma thread em segundo plano
+HISTORICO_TAMANHO_LOTE = int(os.environ.get('JOKENPO_HISTORICO_LOTE', 256))  # rodadas
+HISTORICO_INTERVALO = float(os.environ.get('JOKENPO_HISTORICO_INTERVALO', 1.0))  # segundos
+HISTORICO_MAX_PENDENTES = 100000  # rodadas no buffer; acima disso são descartadas
+# Perfilamento opcional: uma fração das requisições (ou as que trazem o cabeçalho
+# X-Jokenpo-Perfil com o token) tem as pilhas amostradas; o resultado sai em /perfil
+PERFIL_ATIVO = os.environ.get('JOKENPO_PERFIL', 'false').lower() == 'true'
+PERFIL_TAXA = float(os.environ.get('JOKENPO_PERFIL_TAXA', 0.1))  # fração das requisições
+PERFIL_INTERVALO = float(os.environ.get('JOKENPO_PERFIL_INTERVALO', 0.005))  # segundos entre amostras
+SERVER_TIMING = os.environ.get('JOKENPO_SERVER_TIMING', 'true').lower() == 'true'
+# Controle de admissão por worker: requisições comuns simultâneas, fila de
+# espera e prazo; acima disso, 503 com Retry-After (ver admissao.py)
+ADMISSAO_ATIVA = os.environ.get('JOKENPO_ADMISSAO', 'true').lower() == 'true'
+ADMISSAO_MAX = int(os.environ.get('JOKENPO_ADMISSAO_MAX', 2))
+ADMISSAO_FILA = int(os.environ.get('JOKENPO_ADMISSAO_FILA', 1))
+ADMISSAO_ESPERA = float(os.environ.get('JOKENPO_ADMISSAO_ESPERA', 1.0))  # segundos
+# Cabeçalho do proxy com o instante de chegada (p.ex. X-Request-Start), para o
+# prazo incluir a espera antes do worker
+ADMISSAO_CABECALHO_INICIO = os.environ.get('JOKENPO_ADMISSAO_CABECALHO_INICIO')
+# Ranking (/ranking), lido do histórico de forma incremental
+TAMANHO_RANKING = 10  # posições por métrica
+MIN_RODADAS_TAXA = 20  # rodadas para entrar no ranking de taxa de vitórias
+INTERVALO_RANKING = 2.0  # segundos entre sincronizações com o histórico
+SONS_VERIFICADOS = (
+    "background_music.mp3", "click.mp3", "win.mp3", "lose.mp3",
+    "draw.mp3", "final_win.mp3", "final_lose.mp3", "final_draw.mp3"
+)
 
-# Dicionários de controle
-ultimo_acesso = {}
-historico_jogadas = []
-tentativas_invalidas = {}
-bloqueios = {}
+# Preditor usado pela IA: "markov" (transições de 1ª ordem) ou "ngram" (ordens 1..N)
+PREDITOR = os.environ.get('JOKENPO_PREDITOR', 'markov')
+ORDEM_NGRAM = int(os.environ.get('JOKENPO_ORDEM_NGRAM', 3))
+NGRAM_CONJUNTO = os.environ.get('JOKENPO_NGRAM_CONJUNTO', 'false').lower() == 'true'
+LIMITE_BYTES_NGRAM = int(os.environ.get('JOKENPO_LIMITE_BYTES_NGRAM', 8192))  # por sessão
+# Meta-estratégia: "ucb" escolhe por sessão, com um bandido, a estratégia do
+# registro (nucleo.ESTRATEGIAS_COMPUTADOR) que mais vence o jogador; "fixa" usa
+# a mistura de probabilidades fixas
+META_ESTRATEGIA = os.environ.get('JOKENPO_META_ESTRATEGIA', 'ucb')
+EXPLORACAO_UCB = float(os.environ.get('JOKENPO_EXPLORACAO_UCB', 0.5))
+DESCONTO_UCB = float(os.environ.get('JOKENPO_DESCONTO_UCB', 1.0))
+# Instantâneo dos modelos (backend em memória): gravado periodicamente em
+# segundo plano e lido após reinícios (ver instantaneo_modelos.py)
+INSTANTANEO_INTERVALO = float(os.environ.get('JOKENPO_INSTANTANEO_INTERVALO', 60.0))  # segundos
 
-# Criação de diretórios necessários para arquivos estáticos e de som
-os.makedirs(app.static_folder, exist_ok=True)
-os.makedirs(os.path.join(app.static_folder, 'sounds'), exist_ok=True)
+def criar_modelo():
+    """Cria o modelo de previsão de um jogador conforme o preditor configurado."""
+    if PREDITOR == 'ngram':
+        return PreditorNGram(ORDEM_NGRAM, conjunto=NGRAM_CONJUNTO, limite_bytes=LIMITE_BYTES_NGRAM)
+    return ModeloJogador(MAX_HISTORICO)
 
-# =============================
-# Configurações de Segurança
-# =============================
-app.config.update(
-    SESSION_COOKIE_SECURE=True,
-    SESSION_COOKIE_HTTPONLY=True,
-    SESSION_COOKIE_SAMESITE='Lax',
-    PERMANENT_SESSION_LIFETIME=1800,  # 30 minutos
-)
+def carregar_modelo(valor):
+    """Converte o valor lido do backend em um modelo (criando um novo se ausente)."""
+    if valor is None:
+        return criar_modelo()
+    if isinstance(valor, (bytes, bytearray, memoryview)):
+        return modelo_de_bytes(bytes(valor))
+    return valor
 
-# Configurações de CSP mais permissivas para desenvolvimento
-csp = {
-    'default-src': ["'self'", "'unsafe-inline'", "'unsafe-eval'", "*"],
-    'script-src': ["'self'", "'unsafe-inline'", "'unsafe-eval'", "*"],
-    'style-src': ["'self'", "'unsafe-inline'", "*"],
-    'font-src': ["'self'", "*"],
-    'img-src': ["'self'", "data:", "*"],
-    'media-src': ["'self'", "*"],
-    'connect-src': ["'self'", "*"],
-    'form-action': ["'self'", "*"]
-}
+def valor_modelo(modelo):
+    """Converte o modelo no valor a ser gravado no backend."""
+    return modelo.para_bytes() if current_app.extensions['estado'].compartilhado else modelo
 
-# Configuração do Talisman com opções ajustadas
-Talisman(app,
-    force_https=True,
-    strict_transport_security=True,
-    session_cookie_secure=True,
-    content_security_policy=csp,
-    content_security_policy_nonce_in=['script-src'],
-    feature_policy={
-        'geolocation': "'none'",
-        'midi': "'none'",
-        'notifications': "'none'",
-        'push': "'none'",
-        'sync-xhr': "'self'",
-        'microphone': "'none'",
-        'camera': "'none'",
-        'magnetometer': "'none'",
-        'gyroscope': "'none'",
-        'speaker': "'self'",
-        'vibrate': "'none'",
-        'fullscreen': "'self'",
-        'payment': "'none'"
-    }
-)
+def carregar_bandido(valor, priori=None):
+    """
+    Converte o valor lido do backend no bandido da sessão (None com a mistura
+    fixa). Sem valor, começa do bandido a priori do instantâneo, se houver.
+    """
+    if META_ESTRATEGIA != 'ucb':
+        return None
+    if valor is None:
+        valor = priori
+    if valor is None:
+        return BandidoUCB(exploracao=EXPLORACAO_UCB, desconto=DESCONTO_UCB)
+    if isinstance(valor, (bytes, bytearray, memoryview)):
+        return BandidoUCB.de_bytes(bytes(valor), exploracao=EXPLORACAO_UCB, desconto=DESCONTO_UCB)
+    return valor
 
-# Rate limiting mais restritivo para produção
-if not app.debug:
-    limiter.default_limits = ["100 per day", "30 per hour", "5 per minute"]
+def carregar_jogador(estado_rodada, id_jogador):
+    """
+    Modelo e bandido do jogador lidos do backend. Se o modelo não estiver lá
+    (p.ex. após um deploy ou uma parada da máquina), vêm do instantâneo.
+
+    Returns:
+        tuple: (modelo, bandido ou None)
+    """
+    dados_modelo, dados_bandido = estado_rodada[2], estado_rodada[3]
+    instantaneo = current_app.extensions.get('instantaneo')
+    priori = None
+    if instantaneo is not None:
+        instantaneo.observar()
+        if dados_modelo is None:
+            salvo = instantaneo.obter(id_jogador)
+            if salvo is not None:
+                dados_modelo, dados_bandido = salvo[0], dados_bandido or salvo[1]
+        priori = instantaneo.priori
+    return carregar_modelo(dados_modelo), carregar_bandido(dados_bandido, priori)
+
+def coletar_instantaneo(estado):
+    """
+    Modelos e bandidos vigentes no backend em memória, serializados para o
+    instantâneo, e o bandido a priori com as médias de todas as sessões.
+    Roda na thread do instantâneo, fora do caminho das requisições (e do
+    contexto do app: o backend vem como argumento).
+    """
+    agora = time.time()
+    bandidos = {jogador: bandido for jogador, bandido, _ in estado.itens('bandido')}
+    entradas = []
+    for jogador, modelo, restante in estado.itens('modelo'):
+        bandido = bandidos.get(jogador)
+        entradas.append((jogador, agora + restante, modelo.para_bytes(),
+                         bandido.para_bytes() if bandido is not None else b""))
+    usos, somas = None, None
+    for bandido in bandidos.values():
+        usos_bandido, somas_bandido = bandido.contagens()
+        if usos is None:
+            usos, somas = usos_bandido, somas_bandido
+        else:
+            usos = [a + b for a, b in zip(usos, usos_bandido)]
+            somas = [a + b for a, b in zip(somas, somas_bandido)]
+    priori = None
+    if usos is not None:
+        priori = BandidoUCB.a_priori(usos, somas, exploracao=EXPLORACAO_UCB, desconto=DESCONTO_UCB).para_bytes()
+    return entradas, priori
+
+def escritas_modelo(id_jogador, modelo, bandido):
+    """Escritas no backend do modelo e, se houver, do bandido da sessão."""
+    escritas = [("definir", f"modelo:{id_jogador}", valor_modelo(modelo), TEMPO_VIDA_MODELO)]
+    if bandido is not None:
+        valor = bandido.para_bytes() if current_app.extensions['estado'].compartilhado else bandido
+        escritas.append(("definir", f"bandido:{id_jogador}", valor, TEMPO_VIDA_MODELO))
+    return escritas
+
+def estatisticas_controle():
+    """Retorna a ocupação do backend de estado (tamanho e despejos por espaço de chaves)."""
+    return current_app.extensions['estado'].estatisticas()
 
 # =============================
 # Funções de Lógica do Jogo
 # =============================
-def calcular_jogada_computador(ultimo_jogador):
-    """Calcula a jogada do computador utilizando uma estratégia adaptativa."""
-    app.logger.info(f"Calculando jogada do computador. Última jogada do jogador: {ultimo_jogador}")
-    
-    # Se não houver histórico ou última jogada inválida, joga aleatório
-    if ultimo_jogador not in [0, 1, 2] or len(historico_jogadas) < 3:
-        jogada = random.choice([0, 1, 2])
-        app.logger.info(f"Jogada aleatória inicial: {ITENS[jogada]}")
-        return jogada
-
-    # Análise de padrões do jogador
-    padrao_jogador = {}
-    for i in range(len(historico_jogadas) - 1):
-        atual = historico_jogadas[i]
-        proxima = historico_jogadas[i + 1]
-        if atual not in padrao_jogador:
-            padrao_jogador[atual] = {0: 0, 1: 0, 2: 0}
-        padrao_jogador[atual][proxima] += 1
-
-    # Estratégia principal
-    estrategia = random.random()
+def calcular_jogada_computador(ultimo_jogador, modelo, bandido=None):
+    """
+    Calcula a jogada do computador utilizando uma estratégia adaptativa.
+    Com o bandido da sessão, o chamador registra nele o resultado da rodada.
     
-    if estrategia < 0.4:  # 40% chance de contra-atacar padrão
-        if ultimo_jogador in padrao_jogador:
-            provavel_proxima = max(padrao_jogador[ultimo_jogador].items(), key=lambda x: x[1])[0]
-            jogada = JOGADA_QUE_VENCE[provavel_proxima]
-            app.logger.info(f"Contra-ataque baseado em padrão: {ITENS[jogada]}")
-            return jogada
-            
-    elif estrategia < 0.7:  # 30% chance de jogada que vence a última
-        jogada = JOGADA_QUE_VENCE[ultimo_jogador]
-        app.logger.info(f"Jogada para vencer última: {ITENS[jogada]}")
-        return jogada
-        
-    # 30% chance de jogada aleatória
-    jogada = random.choice([0, 1, 2])
-    app.logger.info(f"Jogada aleatória: {ITENS[jogada]}")
-    return jogada
+    Returns:
+        tuple: (jogada, ramo da estratégia usado)
+    """
+    current_app.logger.info("Calculando jogada do computador. Última jogada do jogador: %s", ultimo_jogador, extra=AMOSTRAR)
+    jogada, estrategia = escolher_jogada(ultimo_jogador, modelo, bandido=bandido)
+    metricas.estrategias_counter.labels(estrategia).inc()
+    current_app.logger.info("Estratégia %s: %s", estrategia, ITENS[jogada], extra=AMOSTRAR)
+    return jogada, estrategia
 
 def determinar_vencedor(jogada_jogador, jogada_computador):
     """
@@ -240,56 +267,127 @@ def determinar_vencedor(jogada_jogador, jogada_computador):
     return "Vitória do computador"
 
 def determinar_resultado(jogador, computador):
-    """Determina o resultado do jogo com base nas regras definidas."""
-    if jogador == computador:
-        return "EMPATE!"
-    elif REGRAS_VITORIA[jogador] == computador:
-        vitorias_jogador.inc()
-        return "O JOGADOR GANHOU!"
-    else:
-        return "O COMPUTADOR GANHOU!"
+    """Determina o resultado do jogo (regras em nucleo.py) e contabiliza as vitórias do jogador."""
+    codigo = codigo_resultado(jogador, computador)
+    if codigo == VITORIA_JOGADOR:
+        metricas.vitorias_jogador.inc()
+    return RESULTADOS[codigo]
 
-def validar_jogada(jogada, ip_jogador):
+def ler_estado_rodada(ip_jogador, id_jogador=None):
+    """
+    Lê, em um único lote do backend, o estado de controle do IP e o modelo
+    (e o bandido, com a meta-estratégia "ucb") do jogador.
+    
+    Returns:
+        tuple: (bloqueado_ate, ultima_jogada, valor_modelo, valor_bandido)
+    """
+    operacoes = [("obter", f"bloqueio:{ip_jogador}"), ("obter", f"acesso:{ip_jogador}")]
+    if id_jogador is not None:
+        operacoes.append(("obter", f"modelo:{id_jogador}"))
+        if META_ESTRATEGIA == 'ucb':
+            operacoes.append(("obter", f"bandido:{id_jogador}"))
+    resultados = list(current_app.extensions['estado'].lote(operacoes))
+    resultados += [None] * (4 - len(resultados))
+    return tuple(resultados)
+
+def _verificar_acesso(estado_rodada, agora):
+    """Retorna a mensagem de erro se o IP estiver bloqueado ou jogando rápido demais, senão None."""
+    bloqueado_ate, ultima_jogada = estado_rodada[0], estado_rodada[1]
+    
+    # Verifica se o IP está bloqueado
+    if bloqueado_ate is not None and agora < float(bloqueado_ate):
+        tempo_restante = int(float(bloqueado_ate) - agora)
+        return f"Acesso bloqueado por {tempo_restante} segundos devido a múltiplas tentativas inválidas"
+    
+    # Verifica o intervalo entre jogadas
+    if ultima_jogada is not None:
+        tempo_desde_ultima = agora - float(ultima_jogada)
+        if tempo_desde_ultima < INTERVALO_MIN_JOGADAS:
+            return f"Aguarde {INTERVALO_MIN_JOGADAS - tempo_desde_ultima:.1f} segundos antes de jogar novamente"
+    return None
+
+def _verificar_valor(jogada):
+    """Retorna a mensagem de erro se a jogada não for 0, 1 ou 2, senão None."""
+    if not isinstance(jogada, (int, float)):
+        return "A jogada deve ser um número"
+    if int(jogada) not in [0, 1, 2]:
+        return "Jogada inválida. Use 0 para Pedra, 1 para Papel ou 2 para Tesoura"
+    return None
+
+def _escritas_jogada_valida(ip_jogador, agora, rodadas=1):
+    """
+    Escritas que registram jogadas válidas: o último acesso (só relevante durante
+    o intervalo mínimo) e a limpeza das tentativas inválidas. Um lote de `rodadas`
+    jogadas ocupa `rodadas` intervalos mínimos.
+    """
+    return [
+        ("definir", f"acesso:{ip_jogador}", agora + INTERVALO_MIN_JOGADAS * (rodadas - 1),
+         INTERVALO_MIN_JOGADAS * rodadas),
+        ("remover", f"tentativas:{ip_jogador}"),
+    ]
+
+def validar_jogada(jogada, ip_jogador, estado_rodada=None, escritas=None):
     """
     Valida a jogada do jogador e controla limites de acesso.
     
     Args:
         jogada: A jogada do jogador (deve ser um inteiro entre 0 e 2)
         ip_jogador: O IP do jogador para controle de acesso
+        estado_rodada: Resultado de ler_estado_rodada, se já lido pelo chamador
+        escritas: Lista onde acumular as escritas no backend; se None, são gravadas imediatamente
         
     Returns:
         tuple: (bool, str) indicando se a jogada é válida e mensagem de erro se houver
     """
     agora = time.time()
+    if estado_rodada is None:
+        estado_rodada = ler_estado_rodada(ip_jogador)
     
-    # Verifica se o IP está bloqueado
-    if ip_jogador in bloqueios and agora < bloqueios[ip_jogador]:
-        tempo_restante = int(bloqueios[ip_jogador] - agora)
-        return False, f"Acesso bloqueado por {tempo_restante} segundos devido a múltiplas tentativas inválidas"
+    erro = _verificar_acesso(estado_rodada, agora)
+    if erro:
+        return False, erro
     
-    # Verifica o intervalo entre jogadas
-    if ip_jogador in ultimo_acesso:
-        tempo_desde_ultima = agora - ultimo_acesso[ip_jogador]
-        if tempo_desde_ultima < INTERVALO_MIN_JOGADAS:
-            return False, f"Aguarde {INTERVALO_MIN_JOGADAS - tempo_desde_ultima:.1f} segundos antes de jogar novamente"
-    
-    # Valida o tipo e valor da jogada
-    if not isinstance(jogada, (int, float)):
+    erro = _verificar_valor(jogada)
+    if erro:
         _incrementar_tentativas_invalidas(ip_jogador)
-        return False, "A jogada deve ser um número"
+        return False, erro
     
-    jogada = int(jogada)
-    if jogada not in [0, 1, 2]:
-        _incrementar_tentativas_invalidas(ip_jogador)
-        return False, "Jogada inválida. Use 0 para Pedra, 1 para Papel ou 2 para Tesoura"
+    pendentes = _escritas_jogada_valida(ip_jogador, agora)
+    if escritas is None:
+        current_app.extensions['estado'].lote(pendentes)
+    else:
+        escritas.extend(pendentes)
+    
+    return True, ""
+
+def validar_lote(jogadas, ip_jogador, estado_rodada, escritas):
+    """
+    Valida um lote de jogadas. O controle de acesso é verificado uma vez, mas
+    cada rodada conta: cada jogada inválida é uma tentativa inválida e o lote
+    ocupa um intervalo mínimo por rodada.
     
-    # Atualiza o último acesso
-    ultimo_acesso[ip_jogador] = agora
+    Returns:
+        tuple: (bool, str) indicando se o lote é válido e mensagem de erro se houver
+    """
+    if not isinstance(jogadas, list) or not jogadas:
+        return False, "O campo jogadas deve ser uma lista não vazia"
+    if len(jogadas) > MAX_JOGADAS_LOTE:
+        return False, f"Envie no máximo {MAX_JOGADAS_LOTE} jogadas por lote"
+    
+    agora = time.time()
+    erro = _verificar_acesso(estado_rodada, agora)
+    if erro:
+        return False, erro
     
-    # Limpa tentativas inválidas se a jogada for válida
-    if ip_jogador in tentativas_invalidas:
-        del tentativas_invalidas[ip_jogador]
+    for indice, jogada in enumerate(jogadas):
+        erro = _verificar_valor(jogada)
+        if erro:
+            invalidas = sum(1 for j in jogadas[indice:] if _verificar_valor(j))
+            for _ in range(min(invalidas, MAX_TENTATIVAS_INVALIDAS)):
+                _incrementar_tentativas_invalidas(ip_jogador)
+            return False, f"Rodada {indice + 1}: {erro}"
     
+    escritas.extend(_escritas_jogada_valida(ip_jogador, agora, len(jogadas)))
     return True, ""
 
 def _incrementar_tentativas_invalidas(ip_jogador):
@@ -299,11 +397,22 @@ def _incrementar_tentativas_invalidas(ip_jogador):
     Args:
         ip_jogador: O IP do jogador
     """
-    tentativas_invalidas[ip_jogador] = tentativas_invalidas.get(ip_jogador, 0) + 1
+    estado = current_app.extensions['estado']
+    tentativas = estado.lote([("incrementar", f"tentativas:{ip_jogador}", TEMPO_BLOQUEIO)])[0]
     
-    if tentativas_invalidas[ip_jogador] >= MAX_TENTATIVAS_INVALIDAS:
-        bloqueios[ip_jogador] = time.time() + TEMPO_BLOQUEIO
-        del tentativas_invalidas[ip_jogador]
+    if int(tentativas) >= MAX_TENTATIVAS_INVALIDAS:
+        estado.lote([
+            ("definir", f"bloqueio:{ip_jogador}", time.time() + TEMPO_BLOQUEIO, TEMPO_BLOQUEIO),
+            ("remover", f"tentativas:{ip_jogador}"),
+        ])
+
+def _obter_id_jogador():
+    """Retorna o identificador do jogador guardado na sessão, criando-o se necessário."""
+    id_jogador = session.get('jogador_id')
+    if not id_jogador:
+        id_jogador = secrets.token_hex(16)
+        session['jogador_id'] = id_jogador
+    return id_jogador
 
 # =============================
 # Segurança de URL
@@ -317,17 +426,148 @@ def is_safe_url(target):
 # =============================
 # Endpoints da aplicação
 # =============================
-@app.route('/')
+def url_ativo(nome):
+    """URL com hash de um arquivo de static/ (a URL comum se ele não estiver no manifesto)."""
+    nome_hash = current_app.extensions['ativos'].nome_hash(nome)
+    if nome_hash is None:
+        return url_for('static', filename=nome)
+    return url_for('servir_ativo', nome=nome_hash)
+
+def sprite_sons():
+    """URL do sprite de áudio, sua versão e os trechos (início, tamanho em bytes) de cada som."""
+    manifesto = current_app.extensions['ativos']
+    nome_hash = manifesto.nome_hash(NOME_SPRITE)
+    segmentos = manifesto.segmentos_sprite()
+    if nome_hash is None or segmentos is None:
+        return None
+    return {
+        'url': url_for('servir_ativo', nome=nome_hash),
+        'versao': manifesto.obter(nome_hash).etag,
+        'segmentos': segmentos,
+    }
+
+def _em_cache(nome, chave, gerar):
+    """Valor de gerar() guardado em app.extensions[nome], refeito só quando `chave` muda."""
+    chave_atual, valor = current_app.extensions[nome]
+    if chave_atual != chave:
+        valor = gerar()
+        current_app.extensions[nome] = (chave, valor)
+    return valor
+
+def _resposta_condicional(corpo, etag, mimetype=None):
+    """Resposta sempre revalidada pelo cliente: sem mudanças, um 304 sem corpo."""
+    resposta = current_app.response_class(corpo, mimetype=mimetype)
+    resposta.set_etag(etag)
+    resposta.cache_control.no_cache = True
+    return resposta.make_conditional(request)
+
+def _pagina_inicial():
+    """
+    HTML renderizado da página inicial e seu ETag. A página é renderizada uma
+    vez e só de novo quando o template ou o manifesto de arquivos mudam.
+    """
+    manifesto = current_app.extensions['ativos']
+    manifesto.atualizar()
+    template = os.path.join(current_app.root_path, current_app.template_folder, 'index.html')
+
+    def renderizar():
+        html = render_template('index.html')
+        return html, hashlib.sha256(html.encode()).hexdigest()[:16]
+    return _em_cache('pagina_inicial', (os.stat(template).st_mtime_ns, manifesto.versao), renderizar)
+
 def index():
     """Renderiza a página principal do jogo."""
-    app.logger.info("Página inicial acessada.")
-    return render_template('index.html')
+    current_app.logger.info("Página inicial acessada.", extra=AMOSTRAR)
+    html, etag = _pagina_inicial()
+    return _resposta_condicional(html, etag, 'text/html')
+
+def manifesto_sprite():
+    """Manifesto JSON do sprite de áudio (o mesmo embutido na página inicial)."""
+    current_app.extensions['ativos'].atualizar()
+    sprite = sprite_sons()
+    if sprite is None:
+        abort(404)
+    return _resposta_condicional(current_app.json.dumps(sprite), sprite['versao'], 'application/json')
+
+def _buscar_ativo(buscar, nome):
+    """Busca no manifesto; se não achar, atualiza (respeitando o intervalo) e tenta de novo. 404 se não existir."""
+    ativo = buscar(nome)
+    if ativo is None and current_app.extensions['ativos'].atualizar():
+        ativo = buscar(nome)
+    if ativo is None:
+        abort(404)
+    return ativo
+
+def _enviar_ativo(ativo, max_age, imutavel=False):
+    """Envia o arquivo (ou a variante pré-comprimida aceita) com o ETag do conteúdo, 304 e Range."""
+    # Requisições com Range usam sempre a representação sem compressão
+    caminho, codificacao = (ativo.caminho, None) if request.range else escolher_variante(ativo, request.accept_encodings)
+    resposta = send_file(
+        caminho, mimetype=ativo.mime, conditional=True, max_age=max_age,
+        etag=f"{ativo.etag}-{codificacao}" if codificacao else ativo.etag,
+    )
+    if imutavel:
+        resposta.cache_control.immutable = True
+    resposta.vary.add('Accept-Encoding')
+    if codificacao:
+        resposta.content_encoding = codificacao
+    return resposta
+
+def servir_ativo(nome):
+    """
+    Serve um arquivo de static/ pelo nome com hash: cache imutável, ETag/304,
+    Range e a variante pré-comprimida aceita pelo cliente.
+    """
+    ativo = _buscar_ativo(current_app.extensions['ativos'].obter, nome)
+    return _enviar_ativo(ativo, CACHE_ATIVOS, imutavel=True)
+
+def servir_estatico(filename):
+    """
+    Substitui a view 'static' do Flask: /static/ também é servido a partir do
+    manifesto (um dicionário, sem montar caminhos a partir da URL).
+    """
+    ativo = _buscar_ativo(current_app.extensions['ativos'].obter_original, filename)
+    return _enviar_ativo(ativo, current_app.get_send_file_max_age(filename))
+
+def iniciar_medicao():
+    """Marca o início da requisição para o histograma de latência e o Server-Timing."""
+    g.inicio_requisicao = time.perf_counter()
+    g.etapas = []
+
+def marcar_inicio_view():
+    """Último hook antes da view: o que veio antes (Limiter, Talisman, validações) é a etapa "hooks"."""
+    g.inicio_view = time.perf_counter()
+
+@contextmanager
+def medir_etapa(nome, histograma=None):
+    """Mede um trecho da requisição para o Server-Timing e, opcionalmente, para um histograma."""
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        duracao = time.perf_counter() - inicio
+        if histograma is not None:
+            histograma.observe(duracao)
+        etapas = g.get('etapas')
+        if etapas is not None:
+            etapas.append((nome, duracao))
+
+def _server_timing(agora):
+    """Cabeçalho Server-Timing com a duração (ms) dos hooks, das etapas medidas, da view e do total."""
+    inicio, inicio_view = g.inicio_requisicao, g.get('inicio_view')
+    partes = []
+    if inicio_view is not None:
+        partes.append(("hooks", inicio_view - inicio))
+    partes.extend(g.get('etapas') or ())
+    if inicio_view is not None:
+        partes.append(("view", agora - inicio_view))
+    partes.append(("total", agora - inicio))
+    return ", ".join(f"{nome};dur={duracao * 1000:.3f}" for nome, duracao in partes)
 
-@app.before_request
 def before_request():
     """Validações de segurança antes de cada requisição."""
     # Verificar se é HTTPS em produção
-    if not app.debug and not request.is_secure:
+    if not current_app.debug and not request.is_secure:
         url = request.url.replace('http://', 'https://', 1)
         return redirect(url, code=301)
 
@@ -343,13 +583,21 @@ def before_request():
         if 'content-type' not in headers.lower():
             return jsonify({"error": "Headers inválidos"}), 400
 
-@app.after_request
 def after_request(response):
     """Adiciona headers de segurança em cada resposta."""
     response.headers['X-Content-Type-Options'] = 'nosniff'
     response.headers['X-Frame-Options'] = 'DENY'
     response.headers['X-XSS-Protection'] = '1; mode=block'
     response.headers['Strict-Transport-Security'] = 'max-age=31536000; includeSubDomains'
+
+    inicio = g.get('inicio_requisicao')
+    if inicio is not None:
+        agora = time.perf_counter()
+        metricas.latencia_requisicao.labels(
+            request.endpoint or 'desconhecido', request.method, response.status_code
+        ).observe(agora - inicio)
+        if SERVER_TIMING:
+            response.headers['Server-Timing'] = _server_timing(agora)
     return response
 
 def sanitize_input(data):
@@ -363,103 +611,365 @@ def sanitize_input(data):
         return [sanitize_input(x) for x in data]
     return data
 
-@app.route('/jogar', methods=['POST'])
-def jogar():
+def processar_jogada(dados, ip_cliente, obter_id_jogador):
+    """
+    Lógica de uma rodada de /jogar, compartilhada com o canal WebSocket.
+    
+    Args:
+        dados: O JSON recebido ({"jogador": ..., "ultimo_jogador": ...})
+        ip_cliente: O IP do jogador para controle de acesso
+        obter_id_jogador: Função que retorna o identificador do jogador (só chamada para dados válidos)
+        
+    Returns:
+        tuple: (corpo da resposta, status HTTP)
+    """
     inicio = time.time()
-    ip_cliente = request.remote_addr
-    app.logger.info(f"Nova jogada recebida do IP: {ip_cliente}")
+    if not isinstance(dados, dict) or not dados:
+        current_app.logger.warning("Dados inválidos recebidos do IP %s", ip_cliente)
+        return {'error': 'Dados inválidos'}, 400
 
-    try:
-        dados = request.get_json()
-        if not dados:
-            app.logger.warning(f"Dados inválidos recebidos do IP {ip_cliente}")
-            return jsonify({'error': 'Dados inválidos'}), 400
+    if 'jogador' not in dados:
+        current_app.logger.warning("Campo 'jogador' ausente na requisição do IP %s", ip_cliente)
+        return {'error': 'Campo jogador é obrigatório'}, 400
 
-        if 'jogador' not in dados:
-            app.logger.warning(f"Campo 'jogador' ausente na requisição do IP {ip_cliente}")
-            return jsonify({'error': 'Campo jogador é obrigatório'}), 400
+    jogada_jogador = dados['jogador']
+    ultimo_jogador = dados.get('ultimo_jogador')
 
-        jogada_jogador = dados['jogador']
-        ultimo_jogador = dados.get('ultimo_jogador')
+    # Uma leitura em lote do backend: controle do IP e modelo do jogador
+    id_jogador = obter_id_jogador()
+    with medir_etapa('estado'):
+        estado_rodada = ler_estado_rodada(ip_cliente, id_jogador)
 
-        # Validar a jogada
-        valido, mensagem_erro = validar_jogada(jogada_jogador, ip_cliente)
-        if not valido:
-            return jsonify({'error': mensagem_erro}), 400
+    # Validar a jogada
+    escritas = []
+    with medir_etapa('validacao', metricas.etapa_validacao):
+        valido, mensagem_erro = validar_jogada(jogada_jogador, ip_cliente, estado_rodada, escritas)
+    if not valido:
+        return {'error': mensagem_erro}, 400
 
-        # Calcular jogada do computador usando a função calcular_jogada_computador
-        jogada_comp = calcular_jogada_computador(ultimo_jogador)
-        app.logger.info(f"Computador escolheu: {ITENS[jogada_comp]}")
+    # Calcular jogada do computador com o modelo do próprio jogador
+    modelo, bandido = carregar_jogador(estado_rodada, id_jogador)
+    with medir_etapa('ia', metricas.etapa_ia):
+        jogada_comp, estrategia = calcular_jogada_computador(ultimo_jogador, modelo, bandido)
+    current_app.logger.info("Computador escolheu: %s", ITENS[jogada_comp], extra=AMOSTRAR)
 
-        # Determinar resultado
+    # Determinar resultado
+    with medir_etapa('resultado', metricas.etapa_resultado):
         resultado = determinar_resultado(jogada_jogador, jogada_comp)
-        
-        jogadas_counter.inc()
+    
+    metricas.jogadas_counter.inc()
 
-        # Atualizar histórico
-        historico_jogadas.append(jogada_jogador)
-        if len(historico_jogadas) > MAX_HISTORICO:
-            historico_jogadas.pop(0)
+    # Atualizar histórico e gravar as escritas da rodada em um único lote
+    jogada_jogador = int(jogada_jogador)
+    modelo.registrar(jogada_jogador, jogada_comp)
+    codigo = codigo_resultado(jogada_jogador, jogada_comp)
+    if bandido is not None:
+        bandido.registrar(estrategia, codigo)
+    with medir_etapa('gravacao'):
+        current_app.extensions['historico'].registrar(id_jogador, [(jogada_jogador, jogada_comp, codigo)])
+        current_app.extensions['log_rodadas'].registrar(id_jogador, [(jogada_jogador, jogada_comp, codigo, estrategia)])
+        escritas.extend(escritas_modelo(id_jogador, modelo, bandido))
+        estado = current_app.extensions['estado']
+        estado.lote(escritas)
+    if not estado.compartilhado:
+        metricas.atualizar_estado(estado.estatisticas())
 
-        tempo_processamento = time.time() - inicio
-        app.logger.info(f"Jogada processada em {tempo_processamento:.3f}s - Resultado: {resultado}")
+    tempo_processamento = time.time() - inicio
+    current_app.logger.info("Jogada processada em %.3fs - Resultado: %s", tempo_processamento, resultado, extra=AMOSTRAR)
 
-        return jsonify({
-            'resultado': resultado,
-            'jogada_computador': ITENS[jogada_comp]
-        })
+    return {
+        'resultado': resultado,
+        'jogada_computador': ITENS[jogada_comp]
+    }, 200
+
+def jogar():
+    ip_cliente = request.remote_addr
+    current_app.logger.info("Nova jogada recebida do IP: %s", ip_cliente, extra=AMOSTRAR)
+
+    try:
+        with medir_etapa('json'):
+            dados = request.get_json()
+        corpo, status = processar_jogada(dados, ip_cliente, _obter_id_jogador)
+        return jsonify(corpo), status
 
     except Exception as e:
-        app.logger.error(f"Erro ao processar jogada do IP {ip_cliente}: {str(e)}")
+        current_app.logger.error("Erro ao processar jogada do IP %s: %s", ip_cliente, e)
         return jsonify({'error': 'Erro interno do servidor'}), 500
 
-@app.route('/static/sounds/<path:filename>')
-def serve_sounds(filename):
-    """Serve arquivos de som com cache."""
-    app.logger.info(f"Requisição de áudio: {filename} de {request.remote_addr}")
-    if ".." in filename or filename.startswith("/"):
-        app.logger.warning(f"Tentativa de acesso inválido a arquivo: {filename} de {request.remote_addr}")
-        abort(400, description="Acesso inválido.")
-    sound_folder = os.path.join(app.static_folder, 'sounds')
-    arquivo_completo = os.path.join(sound_folder, filename)
-    app.logger.info(f"Buscando arquivo de som em: {arquivo_completo}")
+def _origem_permitida():
+    """No handshake do WebSocket, aceita apenas o próprio domínio como Origin (ou nenhuma, fora do navegador)."""
+    origem = request.headers.get('Origin')
+    return not origem or urlparse(origem).netloc == request.host
+
+def _receber(ws):
+    """Próxima mensagem do canal, ou None (com a conexão fechada) após WS_TEMPO_OCIOSO segundos sem mensagens."""
+    mensagem = ws.receive(timeout=WS_TEMPO_OCIOSO)
+    if mensagem is None:
+        ws.close(reason=1000, message="Conexão ociosa")
+    return mensagem
+
+def canal_jogo(ws):
+    """
+    Canal WebSocket para rodadas consecutivas. O handshake passa uma vez pelos
+    hooks, pelo Talisman e pelo Limiter; depois cada mensagem JSON roda a mesma
+    lógica de /jogar, inclusive o intervalo mínimo entre jogadas do IP. O campo
+    opcional "id" da mensagem é devolvido na resposta. A conexão é fechada
+    depois de WS_TEMPO_OCIOSO segundos sem mensagens.
+    """
+    # A conexão inteira não entra no histograma de latência; cada mensagem entra
+    g.pop('inicio_requisicao', None)
+    g.pop('etapas', None)
+    ip_cliente = request.remote_addr
+    if not _origem_permitida():
+        current_app.logger.warning("WebSocket recusado para a origem %s (IP %s)", request.headers.get('Origin'), ip_cliente)
+        ws.close(reason=1008, message="Origem não permitida")
+        return
+
+    # A sessão não pode ser gravada depois do handshake: sem cookie, o modelo é da conexão
+    id_jogador = session.get('jogador_id') or secrets.token_hex(16)
+    current_app.logger.info("Canal WebSocket aberto pelo IP %s", ip_cliente, extra=AMOSTRAR)
+
+    while True:
+        mensagem = _receber(ws)
+        if mensagem is None:
+            return
+        inicio = time.perf_counter()
+        try:
+            dados = json.loads(mensagem)
+        except ValueError:
+            dados = None
+        try:
+            corpo, status = processar_jogada(dados, ip_cliente, lambda: id_jogador)
+        except Exception as e:
+            current_app.logger.error("Erro ao processar jogada do IP %s pelo WebSocket: %s", ip_cliente, e)
+            corpo, status = {'error': 'Erro interno do servidor'}, 500
+        if isinstance(dados, dict) and 'id' in dados:
+            corpo['id'] = dados['id']
+        corpo['status'] = status
+        ws.send(current_app.json.dumps(corpo))
+        metricas.latencia_requisicao.labels('canal_jogo', 'WS', status).observe(time.perf_counter() - inicio)
+
+def _aguardar_partida(ws, futuro):
+    """
+    Espera o resultado de uma chamada ao motor de partidas. Se a conexão cair
+    durante a espera, cancela a chamada (o jogador sai da fila) e retorna None.
+    """
+    while True:
+        try:
+            return futuro.result(timeout=1.0)
+        except TempoEsgotado:
+            if not ws.connected:
+                futuro.cancel()
+                return None
+
+def canal_partida(ws):
+    """
+    Partidas entre jogadores pelo WebSocket. O cliente envia {"tipo": "procurar"}
+    para entrar na fila e, depois de "pareado", {"tipo": "jogar", "jogada": 0-2}
+    dentro do prazo. As jogadas são reveladas juntas no "resultado"; recusas
+    e mensagens inválidas voltam como "erro" com o motivo.
+    """
+    g.pop('inicio_requisicao', None)
+    g.pop('etapas', None)
+    ip_cliente = request.remote_addr
+    if not _origem_permitida():
+        current_app.logger.warning("WebSocket recusado para a origem %s (IP %s)", request.headers.get('Origin'), ip_cliente)
+        ws.close(reason=1008, message="Origem não permitida")
+        return
+
+    id_jogador = session.get('jogador_id') or secrets.token_hex(16)
+    partidas = current_app.extensions['partidas']
+    historico = current_app.extensions['historico']
+    balde = BaldeFichas(WS_RAJADA, WS_FICHAS_POR_SEGUNDO)
+    partida = lado = None
+    current_app.logger.info("Canal de partidas aberto pelo IP %s", ip_cliente, extra=AMOSTRAR)
+
+    while True:
+        mensagem = _receber(ws)
+        if mensagem is None:
+            return
+        try:
+            dados = json.loads(mensagem)
+        except ValueError:
+            dados = None
+        tipo = dados.get('tipo') if isinstance(dados, dict) else None
+        try:
+            if not balde.consumir():
+                corpo = {'tipo': 'erro', 'motivo': 'muitas_mensagens', 'aguarde': round(balde.espera(), 2)}
+            elif tipo == 'procurar' and partida is None:
+                # Habilidade: a taxa de vitórias contra a IA, de 0 a 100
+                habilidade = historico.estatisticas(id_jogador)['taxa_vitorias'] * 100
+                pareamento = _aguardar_partida(ws, partidas.procurar(id_jogador, habilidade))
+                if pareamento is None:
+                    return
+                partida, lado = pareamento
+                corpo = {'tipo': 'pareado', 'partida': partida.id, 'prazo': PRAZO_JOGADA}
+            elif tipo == 'jogar' and partida is not None:
+                jogada = dados.get('jogada')
+                if isinstance(jogada, bool) or jogada not in (0, 1, 2):
+                    corpo = {'tipo': 'erro', 'motivo': 'jogada_invalida'}
+                else:
+                    resultado = _aguardar_partida(ws, partidas.jogar(partida, lado, jogada))
+                    if resultado is None:
+                        return
+                    partida = lado = None
+                    corpo = {'tipo': 'resultado', **resultado}
+            else:
+                corpo = {'tipo': 'erro', 'motivo': 'mensagem_invalida'}
+        except RecusaPartida as e:
+            # O prazo da jogada pode ter vencido: a partida acabou
+            if e.motivo == ENCERRADA:
+                partida = lado = None
+            corpo = {'tipo': 'erro', 'motivo': e.motivo}
+        ws.send(current_app.json.dumps(corpo))
+
+def _limites_por_rodada():
+    """Os mesmos limites padrão do app, contados por rodada no endpoint em lote."""
+    return "; ".join(LIMITES_PADRAO)
+
+def _custo_lote():
+    """
+    Número de rodadas do lote, usado como custo no rate limiting. Um lote
+    acima de MAX_JOGADAS_LOTE custa 1: a view o recusa com 400, e o custo
+    cheio (contado mesmo na recusa) esgotaria a janela do IP.
+    """
+    dados = request.get_json(silent=True)
+    jogadas = dados.get('jogadas') if isinstance(dados, dict) else None
+    if not isinstance(jogadas, list) or len(jogadas) > MAX_JOGADAS_LOTE:
+        return 1
+    return max(len(jogadas), 1)
+
+def jogar_lote():
+    """
+    Resolve várias rodadas em uma única requisição. O modelo do jogador é
+    atualizado entre as rodadas, exatamente como em chamadas sucessivas a /jogar.
+    """
+    inicio = time.time()
+    ip_cliente = request.remote_addr
+    
     try:
-        return send_from_directory(sound_folder, filename, as_attachment=False)
-    except FileNotFoundError:
-        app.logger.error(f"Arquivo de som não encontrado: {filename}")
-        return jsonify({"error": "Arquivo não encontrado."}), 404
+        with medir_etapa('json'):
+            dados = request.get_json()
+        if not isinstance(dados, dict) or 'jogadas' not in dados:
+            return jsonify({'error': 'Campo jogadas é obrigatório'}), 400
+        
+        jogadas = dados['jogadas']
+        id_jogador = _obter_id_jogador()
+        with medir_etapa('estado'):
+            estado_rodada = ler_estado_rodada(ip_cliente, id_jogador)
+        
+        escritas = []
+        with medir_etapa('validacao', metricas.etapa_validacao):
+            valido, mensagem_erro = validar_lote(jogadas, ip_cliente, estado_rodada, escritas)
+        if not valido:
+            return jsonify({'error': mensagem_erro}), 400
+        jogadas = [int(jogada) for jogada in jogadas]
+        
+        # A IA é sequencial: cada rodada depende das anteriores
+        modelo, bandido = carregar_jogador(estado_rodada, id_jogador)
+        ultimo_jogador = dados.get('ultimo_jogador', modelo.ultima)
+        computador, estrategias = [], []
+        with medir_etapa('ia', metricas.etapa_ia):
+            for jogada in jogadas:
+                jogada_comp, estrategia = calcular_jogada_computador(ultimo_jogador, modelo, bandido)
+                modelo.registrar(jogada, jogada_comp)
+                if bandido is not None:
+                    bandido.registrar(estrategia, TABELA_RESULTADOS[jogada * 3 + jogada_comp])
+                computador.append(jogada_comp)
+                estrategias.append(estrategia)
+                ultimo_jogador = jogada
+        
+        # Resultados de todas as rodadas por consulta à tabela
+        with medir_etapa('resultado', metricas.etapa_resultado):
+            codigos = [TABELA_RESULTADOS[j * 3 + c] for j, c in zip(jogadas, computador)]
+            vitorias = codigos.count(1)
+        metricas.jogadas_counter.inc(len(jogadas))
+        if vitorias:
+            metricas.vitorias_jogador.inc(vitorias)
+        
+        with medir_etapa('gravacao'):
+            escritas.extend(escritas_modelo(id_jogador, modelo, bandido))
+            estado = current_app.extensions['estado']
+            estado.lote(escritas)
+            current_app.extensions['historico'].registrar(id_jogador, list(zip(jogadas, computador, codigos)))
+            current_app.extensions['log_rodadas'].registrar(id_jogador, list(zip(jogadas, computador, codigos, estrategias)))
+        if not estado.compartilhado:
+            metricas.atualizar_estado(estado.estatisticas())
+        
+        current_app.logger.info("Lote de %d jogadas do IP %s processado em %.3fs",
+                        len(jogadas), ip_cliente, time.time() - inicio, extra=AMOSTRAR)
+        
+        return jsonify({
+            'rodadas': [
+                {'jogada_computador': ITENS[c], 'resultado': RESULTADOS[codigo]}
+                for c, codigo in zip(computador, codigos)
+            ],
+            'resumo': {
+                'vitorias': vitorias,
+                'derrotas': codigos.count(2),
+                'empates': codigos.count(0),
+            }
+        })
+    
     except Exception as e:
-        app.logger.exception(f"Erro ao servir arquivo de som: {filename} - {e}")
-        return jsonify({"error": "Erro ao servir arquivo de som."}), 500
+        current_app.logger.error("Erro ao processar lote do IP %s: %s", ip_cliente, e)
+        return jsonify({'error': 'Erro interno do servidor'}), 500
+
+def _verificacao_arquivos():
+    """Corpo JSON de /check_files e seu ETag, montados só quando o manifesto muda."""
+    manifesto = current_app.extensions['ativos']
+    manifesto.atualizar()
+
+    def montar():
+        status = {som: manifesto.obter_original(f"sounds/{som}") is not None for som in SONS_VERIFICADOS}
+        faltando = [som for som, existe in status.items() if not existe]
+        if faltando:
+            current_app.logger.warning("Arquivos de som não encontrados: %s", ", ".join(faltando))
+        corpo = current_app.json.dumps({
+            "status": "warning" if faltando else "ok",
+            "message": "Alguns arquivos de som estão faltando." if faltando else "Todos os arquivos de som encontrados.",
+            "files": status,
+            "versao": manifesto.versao,
+            "ativos": [ativo.descricao() for ativo in manifesto],
+        })
+        return corpo, manifesto.versao
+    return _em_cache('check_files', manifesto.versao, montar)
 
-@app.route('/check_files', methods=['GET'])
 def check_files():
-    """Verifica a existência dos arquivos de som."""
-    app.logger.info(f"Verificação dos arquivos de som iniciada por {request.remote_addr}")
-    sound_files = [
-        "background_music.mp3", "click.mp3", "win.mp3", "lose.mp3",
-        "draw.mp3", "final_win.mp3", "final_lose.mp3", "final_draw.mp3"
-    ]
-    sound_folder = os.path.join(app.static_folder, 'sounds')
-    status = {}
-    all_found = True
-    for sound in sound_files:
-        file_path = os.path.join(sound_folder, sound)
-        existe = os.path.exists(file_path)
-        status[sound] = existe
-        if not existe:
-            app.logger.warning(f"Arquivo não encontrado: {sound} em {file_path}")
-            all_found = False
-        else:
-            app.logger.info(f"Arquivo encontrado: {sound}")
-    app.logger.info(f"Resultado da verificação de arquivos: {status}")
-    return jsonify({
-        "status": "ok" if all_found else "warning",
-        "message": "Todos os arquivos de som encontrados." if all_found else "Alguns arquivos de som estão faltando.",
-        "files": status
+    """Verifica a existência dos arquivos de som, a partir do manifesto de arquivos estáticos."""
+    current_app.logger.info("Verificação dos arquivos de som solicitada por %s", request.remote_addr, extra=AMOSTRAR)
+    corpo, etag = _verificacao_arquivos()
+    return _resposta_condicional(corpo, etag, 'application/json')
+
+def estatisticas():
+    """
+    Estatísticas do jogador da sessão e de todos os jogadores, servidas do
+    agregado em memória (uma leitura por chave no SQLite a cada poucos
+    segundos, nunca uma varredura das rodadas).
+    """
+    historico = current_app.extensions['historico']
+    id_jogador = session.get('jogador_id')
+    resposta = jsonify({
+        'jogador': dict(historico.estatisticas(id_jogador), apelido=apelido(id_jogador)) if id_jogador else None,
+        'global': historico.estatisticas(TOTAL),
     })
+    resposta.headers['Cache-Control'] = 'no-store'
+    return resposta
+
+def _tabela_ranking():
+    """Corpo JSON de /ranking e seu ETag, montados só quando o ranking muda."""
+    versao, tabela = current_app.extensions['ranking'].obter()
+
+    def montar():
+        corpo = current_app.json.dumps(tabela)
+        return corpo, hashlib.sha256(corpo.encode()).hexdigest()[:16]
+    return _em_cache('ranking_corpo', versao, montar)
+
+def ranking():
+    """Ranking geral e do dia por vitórias, taxa de vitórias e maior sequência de vitórias."""
+    corpo, etag = _tabela_ranking()
+    return _resposta_condicional(corpo, etag, 'application/json')
 
-@app.route('/ping')
 def ping():
     """Endpoint para health check"""
     try:
@@ -470,13 +980,40 @@ def ping():
             "version": "1.0.0"
         }), 200
     except Exception as e:
-        app.logger.error(f"Erro no health check: {str(e)}")
+        current_app.logger.error("Erro no health check: %s", e)
         return jsonify({
             "status": "error",
             "message": "Erro interno no servidor"
         }), 500
 
-@app.route('/safe-redirect')
+def metrics():
+    """Expõe as métricas no formato do Prometheus (agregadas entre workers no gunicorn)."""
+    token = os.environ.get('JOKENPO_METRICAS_TOKEN')
+    if token and not secrets.compare_digest(request.headers.get('Authorization', ''), f"Bearer {token}"):
+        abort(401)
+    conteudo, tipo = metricas.gerar_metricas()
+    return conteudo, 200, {'Content-Type': tipo}
+
+def perfil():
+    """
+    Pilhas amostradas pelo perfilador neste worker, no formato "collapsed
+    stacks" (flamegraph.pl, speedscope). Exige `Authorization: Bearer
+    <JOKENPO_PERFIL_TOKEN>`; com ?reiniciar=1, descarta as amostras depois de lê-las.
+    """
+    token = os.environ.get('JOKENPO_PERFIL_TOKEN')
+    perfilador = current_app.extensions.get('perfilador')
+    if not token or perfilador is None:
+        abort(404)
+    if not secrets.compare_digest(request.headers.get('Authorization', '').encode(), f"Bearer {token}".encode()):
+        abort(401)
+    resposta = current_app.response_class(perfilador.pilhas_colapsadas(), mimetype='text/plain')
+    resposta.headers['X-Perfil-Amostras'] = str(perfilador.amostras)
+    resposta.headers['X-Perfil-Requisicoes'] = str(perfilador.requisicoes)
+    resposta.headers['Cache-Control'] = 'no-store'
+    if request.args.get('reiniciar') == '1':
+        perfilador.reiniciar()
+    return resposta
+
 def safe_redirect():
     """
     Endpoint de redirecionamento seguro.
@@ -490,21 +1027,251 @@ def safe_redirect():
 # =============================
 # Manipuladores de erro
 # =============================
-@app.errorhandler(400)
 def error_400(e):
-    app.logger.error(f"400 Bad Request: {e}")
+    current_app.logger.error("400 Bad Request: %s", e)
     return jsonify({"error": getattr(e, 'description', "Requisição inválida.")}), 400
 
-@app.errorhandler(404)
 def error_404(e):
-    app.logger.error(f"404 Not Found: {e}")
+    current_app.logger.error("404 Not Found: %s", e)
     return jsonify({"error": "Recurso não encontrado."}), 404
 
-@app.errorhandler(500)
 def error_500(e):
-    app.logger.exception(f"500 Internal Server Error: {e}")
+    current_app.logger.exception("500 Internal Server Error: %s", e)
     return jsonify({"error": "Erro interno no servidor. Tente novamente mais tarde."}), 500
 
+# =============================
+# Fábrica do aplicativo
+# =============================
+# Configurações de CSP mais permissivas para desenvolvimento
+csp = {
+    'default-src': ["'self'", "'unsafe-inline'", "'unsafe-eval'", "*"],
+    'script-src': ["'self'", "'unsafe-inline'", "'unsafe-eval'", "*"],
+    'style-src': ["'self'", "'unsafe-inline'", "*"],
+    'font-src': ["'self'", "*"],
+    'img-src': ["'self'", "data:", "*"],
+    'media-src': ["'self'", "*"],
+    'connect-src': ["'self'", "*"],
+    'form-action': ["'self'", "*"]
+}
+
+def create_app(config=None):
+    """
+    Cria e configura o aplicativo. As extensões (CORS, Limiter e Talisman)
+    só são importadas aqui, de modo que `import app` carrega apenas o Flask
+    e o núcleo do jogo.
+
+    Args:
+        config: Configurações aplicadas por cima das padrão (p.ex. {'RATELIMIT_ENABLED': False})
+    """
+    from flask_cors import CORS
+    from flask_limiter import Limiter  # type: ignore
+    from flask_limiter.util import get_remote_address  # type: ignore
+    from flask_talisman import Talisman
+
+    app = Flask(__name__, static_folder="static", template_folder="templates")
+    app.wsgi_app = ProxyFix(app.wsgi_app)
+
+    # Perfilamento opcional (JOKENPO_PERFIL ou token de administração): o
+    # middleware envolve o app inteiro, inclusive as extensões
+    token_perfil = os.environ.get('JOKENPO_PERFIL_TOKEN')
+    if PERFIL_ATIVO or token_perfil:
+        perfilador = PerfiladorAmostragem(intervalo=PERFIL_INTERVALO)
+        app.wsgi_app = MiddlewarePerfil(
+            app.wsgi_app, perfilador, taxa=PERFIL_TAXA if PERFIL_ATIVO else 0.0, token=token_perfil,
+        )
+        app.extensions['perfilador'] = perfilador
+
+    # Configuração da chave secreta
+    app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY') or generate_secret_key()
+
+    # Configurações de segurança da sessão
+    app.config.update(
+        SESSION_COOKIE_SECURE=True,
+        SESSION_COOKIE_HTTPONLY=True,
+        SESSION_COOKIE_SAMESITE='Lax',
+        PERMANENT_SESSION_LIFETIME=1800,  # 30 minutos
+    )
+    if config:
+        app.config.update(config)
+
+    # Canais WebSocket opcionais: sem flask-sock, o jogo usa apenas POST /jogar
+    try:
+        from flask_sock import Sock  # type: ignore
+    except ImportError:
+        Sock = None
+
+    # Controle de admissão: o mais externo, para que uma recusa não custe nada além dele
+    # (fora dos testes: TESTING=True desliga, como o RATELIMIT_ENABLED=False no Limiter)
+    if ADMISSAO_ATIVA and not app.testing:
+        controle = ControleAdmissao(
+            ADMISSAO_MAX, ADMISSAO_FILA, ADMISSAO_ESPERA,
+            ao_mudar=metricas.atualizar_admissao, ao_recusar=metricas.recusar_admissao,
+        )
+        app.wsgi_app = MiddlewareAdmissao(app.wsgi_app, controle, cabecalho_inicio=ADMISSAO_CABECALHO_INICIO)
+        app.extensions['admissao'] = controle
+    # As conexões WebSocket passam direto pela admissão e têm um limite próprio por worker
+    if Sock is not None:
+        conexoes = LimiteConexoes(WS_MAX_CONEXOES, ao_mudar=metricas.atualizar_conexoes,
+                                  ao_recusar=metricas.recusar_admissao)
+        app.wsgi_app = MiddlewareConexoes(app.wsgi_app, conexoes)
+        app.extensions['conexoes_ws'] = conexoes
+
+    # Configuração de CORS
+    CORS(app, resources={
+        r"/*": {
+            "origins": ["*"],  # Permitir todas as origens temporariamente para debug
+            "methods": ["GET", "POST", "OPTIONS"],
+            "allow_headers": ["Content-Type", "X-Requested-With", "Authorization"],
+            "supports_credentials": True
+        }
+    })
+
+    # Configuração do Limiter para rate limiting
+    limiter = Limiter(
+        app=app,
+        key_func=get_remote_address,
+        storage_uri=os.environ.get('JOKENPO_LIMITER_STORAGE', "memory://"),
+        default_limits=LIMITES_PADRAO
+    )
+    # Com RATELIMIT_ENABLED=False o Limiter não se registra no app, e as rotas
+    # decoradas só guardam uma referência fraca a ele
+    app.extensions.setdefault('limiter', set()).add(limiter)
+
+    # Configurações de desenvolvimento
+    if app.debug:
+        app.config["SEND_FILE_MAX_AGE_DEFAULT"] = 0
+
+    # No modo assíncrono as requisições só enfileiram registros; uma thread em
+    # segundo plano formata e grava no arquivo. Linhas INFO por requisição
+    # (marcadas com AMOSTRAR) podem ser amostradas em picos de tráfego.
+    configurar_logger(
+        app.logger,
+        assincrono=os.environ.get('JOKENPO_LOG_ASSINCRONO', 'true').lower() == 'true',
+        formato=os.environ.get('JOKENPO_LOG_FORMATO', 'texto'),
+        amostragem=float(os.environ.get('JOKENPO_LOG_AMOSTRAGEM', 1.0)),
+    )
+    app.logger.info("Aplicativo de Jokenpô iniciado!")
+
+    # Criação de diretórios necessários para arquivos estáticos e de som
+    os.makedirs(app.static_folder, exist_ok=True)
+    os.makedirs(os.path.join(app.static_folder, 'sounds'), exist_ok=True)
+
+    # Manifesto dos arquivos estáticos (publicados com hash em static/dist),
+    # usado por /static, /ativos e /check_files, e respostas montadas a partir
+    # dele guardadas em memória
+    manifesto = ManifestoAtivos(app.static_folder, 0 if app.debug else INTERVALO_VERIFICACAO_ATIVOS)
+    manifesto.construir()
+    manifesto.observar()
+    app.extensions['ativos'] = manifesto
+    app.extensions['pagina_inicial'] = app.extensions['check_files'] = (None, None)
+    arquivo_historico = app.config.get('HISTORICO_ARQUIVO') or os.environ.get(
+        'JOKENPO_SQLITE_HISTORICO', '/tmp/jokenpo_historico.db')
+    app.extensions['historico'] = HistoricoRodadas(
+        arquivo_historico,
+        tamanho_lote=HISTORICO_TAMANHO_LOTE,
+        intervalo=HISTORICO_INTERVALO,
+        max_pendentes=HISTORICO_MAX_PENDENTES,
+    )
+    app.extensions['ranking'] = Ranking(
+        arquivo_historico, tamanho=TAMANHO_RANKING, min_rodadas_taxa=MIN_RODADAS_TAXA, intervalo=INTERVALO_RANKING,
+    )
+    app.extensions['ranking_corpo'] = (None, None)
+    # Estado de controle por IP e modelos dos jogadores. O backend em memória é
+    # local ao worker; "sqlite" e "redis" compartilham o estado entre workers.
+    estado = app.extensions['estado'] = criar_backend(
+        capacidade_padrao=MAX_IPS_CONTROLE,
+        capacidades={'modelo': MAX_MODELOS, 'bandido': MAX_MODELOS},
+        ttl_padrao=TEMPO_BLOQUEIO,
+    )
+    # Instantâneo dos modelos: só faz sentido com o backend em memória (os
+    # compartilhados já guardam os modelos fora do worker)
+    arquivo_instantaneo = app.config.get('INSTANTANEO_ARQUIVO', os.environ.get(
+        'JOKENPO_INSTANTANEO', '/tmp/jokenpo_modelos.bin'))
+    if arquivo_instantaneo and hasattr(estado, 'itens'):
+        app.extensions['instantaneo'] = InstantaneoModelos(
+            arquivo_instantaneo, partial(coletar_instantaneo, estado), intervalo=INSTANTANEO_INTERVALO)
+    # Motor das partidas entre jogadores, em um laço asyncio criado no primeiro uso
+    app.extensions['partidas'] = LacoPartidas(MotorPartidas(
+        prazo_pareamento=PRAZO_PAREAMENTO, prazo_jogada=PRAZO_JOGADA, max_espera=MAX_PARTIDAS,
+        max_partidas=MAX_PARTIDAS, ao_encerrar=metricas.encerrar_partida, ao_recusar=metricas.recusar_partida,
+    ))
+    app.extensions['log_rodadas'] = LogRodadas(
+        app.config.get('LOG_RODADAS_ARQUIVO') or os.environ.get('JOKENPO_LOG_RODADAS', '/tmp/jokenpo_rodadas.bin'),
+    )
+    app.jinja_env.globals['ativo'] = url_ativo
+    app.jinja_env.globals['sprite_sons'] = sprite_sons
+
+    # Configuração do Talisman com opções ajustadas
+    Talisman(app,
+        force_https=True,
+        strict_transport_security=True,
+        session_cookie_secure=True,
+        content_security_policy=csp,
+        content_security_policy_nonce_in=['script-src'],
+        feature_policy={
+            'geolocation': "'none'",
+            'midi': "'none'",
+            'notifications': "'none'",
+            'push': "'none'",
+            'sync-xhr': "'self'",
+            'microphone': "'none'",
+            'camera': "'none'",
+            'magnetometer': "'none'",
+            'gyroscope': "'none'",
+            'speaker': "'self'",
+            'vibrate': "'none'",
+            'fullscreen': "'self'",
+            'payment': "'none'"
+        }
+    )
+
+    # Rate limiting mais restritivo para produção
+    if not app.debug:
+        limiter.default_limits = LIMITES_PRODUCAO
+
+    # Registrado antes dos hooks do Limiter e do Talisman para medir a requisição inteira
+    app.before_request_funcs.setdefault(None, []).insert(0, iniciar_medicao)
+    app.before_request(before_request)
+    app.before_request(marcar_inicio_view)
+    app.after_request(after_request)
+
+    app.add_url_rule('/', view_func=index)
+    app.add_url_rule('/jogar', view_func=jogar, methods=['POST'])
+    app.add_url_rule('/jogar/lote', view_func=limiter.limit(_limites_por_rodada, cost=_custo_lote)(jogar_lote),
+                     methods=['POST'])
+    app.add_url_rule('/ativos/<path:nome>', view_func=servir_ativo)
+    app.view_functions['static'] = servir_estatico
+    app.add_url_rule('/sons/sprite.json', view_func=manifesto_sprite)
+    app.add_url_rule('/check_files', view_func=check_files, methods=['GET'])
+    app.add_url_rule('/estatisticas', view_func=estatisticas)
+    app.add_url_rule('/ranking', view_func=ranking)
+    app.add_url_rule('/ping', view_func=ping)
+    app.add_url_rule('/metrics', view_func=limiter.exempt(metrics))
+    app.add_url_rule('/perfil', view_func=limiter.exempt(perfil))
+    app.add_url_rule('/safe-redirect', view_func=safe_redirect)
+
+    if Sock is not None:
+        app.config.setdefault('SOCK_SERVER_OPTIONS', {'ping_interval': 25, 'max_message_size': WS_TAMANHO_MAX_MENSAGEM})
+        sock = Sock(app)
+        sock.route('/ws/jogar')(canal_jogo)
+        sock.route('/ws/partida')(canal_partida)
+    app.jinja_env.globals['canal_ws'] = '/ws/jogar' if Sock is not None else ''
+
+    app.register_error_handler(400, error_400)
+    app.register_error_handler(404, error_404)
+    app.register_error_handler(500, error_500)
+    return app
+
+def __getattr__(nome):
+    """
+    Cria o aplicativo no primeiro acesso a `app.app` (como no `gunicorn app:app`),
+    sem custo para quem só importa as funções do módulo.
+    """
+    if nome == 'app':
+        aplicativo = globals()['app'] = create_app()
+        return aplicativo
+    raise AttributeError(f"module {__name__!r} has no attribute {nome!r}")
+
 # =============================
 # Execução do aplicativo
 # =============================
@@ -517,7 +1284,7 @@ if __name__ == "__main__":
     # Verifica se os arquivos de certificado existem
     if os.path.exists(cert_file) and os.path.exists(key_file):
         # Executa com SSL
-        app.run(host="0.0.0.0", port=port, debug=True, ssl_context=(cert_file, key_file))
+        create_app().run(host="0.0.0.0", port=port, debug=True, ssl_context=(cert_file, key_file))
     else:
         print("Erro: Certificados SSL não encontrados em:", cert_file, "e", key_file)
         print("Por favor, verifique se os arquivos existem no diretório correto.")
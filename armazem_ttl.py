@@ -0,0 +1,126 @@
+import heapq
+import itertools
+import threading
+import time
+
+# =============================
+# Armazém chave-valor com expiração
+# =============================
+class ArmazemTTL:
+    """
+    Dicionário com tempo de vida por chave e capacidade máxima.
+
+    As entradas ficam em um dict (chave -> [valor, expira]) e os prazos em um
+    heap de mínimo. A expiração é feita de forma preguiçosa: a cada escrita
+    as entradas vencidas no topo do heap são removidas, e leituras ignoram
+    entradas vencidas. Ao atingir a capacidade, a entrada mais próxima de
+    expirar é despejada. Entradas obsoletas do heap (chaves regravadas ou
+    removidas) são descartadas ao chegar ao topo ou quando o heap é
+    compactado, o que mantém o custo amortizado baixo e a memória limitada.
+    """
+
+    def __init__(self, capacidade, ttl_padrao, relogio=time.monotonic):
+        if capacidade < 1:
+            raise ValueError("A capacidade do armazém deve ser positiva")
+        self.capacidade = capacidade
+        self.ttl_padrao = ttl_padrao
+        self._relogio = relogio
+        self._dados = {}
+        self._prazos = []
+        self._sequencia = itertools.count()
+        self._lock = threading.Lock()
+        self.expirados = 0
+        self.despejados = 0
+
+    def __len__(self):
+        return len(self._dados)
+
+    def __contains__(self, chave):
+        return self.obter(chave, _AUSENTE) is not _AUSENTE
+
+    def obter(self, chave, padrao=None):
+        """Retorna o valor da chave ou `padrao` se ela não existir ou tiver expirado."""
+        entrada = self._dados.get(chave)
+        if entrada is None or entrada[1] <= self._relogio():
+            return padrao
+        return entrada[0]
+
+    def definir(self, chave, valor, ttl=None):
+        """Grava o valor da chave com o tempo de vida informado (ou o padrão)."""
+        with self._lock:
+            self._definir(chave, valor, ttl, self._relogio())
+
+    def incrementar(self, chave, ttl=None):
+        """Incrementa o contador da chave (iniciando em 0) e retorna o novo valor."""
+        with self._lock:
+            agora = self._relogio()
+            entrada = self._dados.get(chave)
+            if entrada is not None and entrada[1] > agora:
+                entrada[0] += 1
+                return entrada[0]
+            self._definir(chave, 1, ttl, agora)
+            return 1
+
+    def remover(self, chave):
+        """Remove a chave, se existir. A entrada no heap é descartada depois."""
+        with self._lock:
+            self._dados.pop(chave, None)
+
+    def expirar(self):
+        """Remove imediatamente todas as entradas vencidas."""
+        with self._lock:
+            self._expirar(self._relogio())
+
+    def itens(self):
+        """Lista (chave, valor, segundos até expirar) das entradas vigentes."""
+        with self._lock:
+            agora = self._relogio()
+            return [(chave, valor, expira - agora) for chave, (valor, expira) in self._dados.items() if expira > agora]
+
+    def estatisticas(self):
+        """Retorna tamanho, capacidade e contadores de expiração/despejo."""
+        return {
+            "tamanho": len(self._dados),
+            "capacidade": self.capacidade,
+            "prazos_pendentes": len(self._prazos),
+            "expirados": self.expirados,
+            "despejados": self.despejados,
+        }
+
+    def _definir(self, chave, valor, ttl, agora):
+        self._expirar(agora)
+        expira = agora + (self.ttl_padrao if ttl is None else ttl)
+        if chave not in self._dados and len(self._dados) >= self.capacidade:
+            self._despejar()
+        self._dados[chave] = [valor, expira]
+        heapq.heappush(self._prazos, (expira, next(self._sequencia), chave))
+        if len(self._prazos) > 2 * len(self._dados) + 64:
+            self._compactar()
+
+    def _vigente(self, expira, chave):
+        entrada = self._dados.get(chave)
+        return entrada is not None and entrada[1] == expira
+
+    def _expirar(self, agora):
+        prazos = self._prazos
+        while prazos and prazos[0][0] <= agora:
+            expira, _, chave = heapq.heappop(prazos)
+            if self._vigente(expira, chave):
+                del self._dados[chave]
+                self.expirados += 1
+
+    def _despejar(self):
+        prazos = self._prazos
+        while prazos:
+            expira, _, chave = heapq.heappop(prazos)
+            if self._vigente(expira, chave):
+                del self._dados[chave]
+                self.despejados += 1
+                return
+
+    def _compactar(self):
+        self._prazos = [(entrada[1], next(self._sequencia), chave) for chave, entrada in self._dados.items()]
+        heapq.heapify(self._prazos)
+
+
+_AUSENTE = object()
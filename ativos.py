@@ -0,0 +1,323 @@
+"""
+Pipeline dos arquivos estáticos: cópias com o hash do conteúdo no nome,
+variantes pré-comprimidas (gzip e, se o pacote `brotli` estiver instalado,
+brotli), o sprite com os efeitos sonoros e um manifesto em memória usado
+pelas rotas e pelos templates.
+
+Exemplo (etapa de build, como no Dockerfile):
+    python ativos.py
+"""
+import gzip
+import hashlib
+import mimetypes
+import os
+import threading
+import time
+
+try:
+    import brotli  # type: ignore
+except ImportError:  # sem brotli, apenas as variantes gzip são geradas
+    brotli = None
+
+try:
+    from watchdog.events import FileSystemEventHandler  # type: ignore
+    from watchdog.observers import Observer  # type: ignore
+except ImportError:  # sem watchdog, as mudanças são vistas só pela verificação periódica
+    Observer = None
+
+PASTA_SAIDA = "dist"  # dentro da pasta static
+EXTENSOES_COMPRIMIVEIS = {".css", ".js", ".svg", ".json", ".ico", ".txt", ".html", ".map"}
+TAMANHO_MINIMO_COMPRESSAO = 512  # bytes
+GANHO_MINIMO_COMPRESSAO = 0.9  # a variante precisa ter no máximo 90% do original
+TAMANHO_HASH = 12  # caracteres hexadecimais do hash no nome
+# Segundos que uma cópia fora do manifesto continua em dist/ antes de ser
+# removida: páginas já entregues (e outros workers, até a próxima verificação)
+# ainda podem pedir a versão anterior
+RETENCAO_OBSOLETOS = 3600
+
+# Efeitos sonoros concatenados em um único arquivo. Cada trecho continua sendo
+# um MP3 completo, que o navegador decodifica a partir do mesmo download.
+SONS_SPRITE = ("click", "win", "lose", "draw", "final_win", "final_lose", "final_draw")
+NOME_SPRITE = "sounds/sprite.mp3"
+
+
+class Ativo:
+    """Um arquivo estático publicado com hash no nome."""
+
+    __slots__ = ("nome", "nome_hash", "caminho", "tamanho", "hash", "mime", "variantes", "assinatura")
+
+    def __init__(self, nome, nome_hash, caminho, tamanho, hash_conteudo, mime, variantes, assinatura):
+        self.nome = nome  # caminho relativo à pasta static, p.ex. "css/styles.css"
+        self.nome_hash = nome_hash  # p.ex. "css/styles.3f2a9c1b7d4e.css"
+        self.caminho = caminho  # arquivo servido sem compressão
+        self.tamanho = tamanho
+        self.hash = hash_conteudo  # SHA-256 do conteúdo, em hexadecimal
+        self.mime = mime
+        self.variantes = variantes  # codificação ("br", "gzip") -> caminho
+        self.assinatura = assinatura  # (mtime_ns, tamanho) do arquivo de origem
+
+    @property
+    def etag(self):
+        return self.hash[:TAMANHO_HASH]
+
+    def descricao(self):
+        """Entrada do manifesto publicada em /check_files."""
+        return {"nome": self.nome, "tamanho": self.tamanho, "hash": self.hash, "mime": self.mime}
+
+
+def _nome_com_hash(nome, hash_conteudo):
+    raiz, extensao = os.path.splitext(nome)
+    return f"{raiz}.{hash_conteudo[:TAMANHO_HASH]}{extensao}"
+
+
+def _gravar_atomico(caminho, dados):
+    """Grava o arquivo por renomeação, para que outros workers nunca leiam um arquivo parcial."""
+    os.makedirs(os.path.dirname(caminho), exist_ok=True)
+    temporario = f"{caminho}.{os.getpid()}.tmp"
+    with open(temporario, "wb") as arquivo:
+        arquivo.write(dados)
+    os.replace(temporario, caminho)
+
+
+def _comprimir(dados):
+    """Retorna {codificação: bytes} das variantes que valem a pena."""
+    variantes = {"gzip": gzip.compress(dados, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        variantes["br"] = brotli.compress(dados, quality=11)
+    return {codificacao: comprimido for codificacao, comprimido in variantes.items()
+            if len(comprimido) <= len(dados) * GANHO_MINIMO_COMPRESSAO}
+
+
+class ManifestoAtivos:
+    """
+    Manifesto dos arquivos de `pasta_static`. `construir()` publica as cópias
+    com hash em `pasta_static/dist` e remove as que saíram do manifesto há
+    mais de `retencao` segundos; `atualizar()` refaz só o que mudou
+    (por mtime e tamanho), no máximo uma vez a cada `intervalo_verificacao`
+    segundos, ou logo após um evento do `observar()`. Os dicionários são
+    substituídos por inteiro, então as leituras não precisam de lock.
+    """
+
+    def __init__(self, pasta_static, intervalo_verificacao=5.0, relogio=time.monotonic,
+                 retencao=RETENCAO_OBSOLETOS):
+        self.pasta_static = os.path.abspath(pasta_static)
+        self.pasta_saida = os.path.join(self.pasta_static, PASTA_SAIDA)
+        self.intervalo_verificacao = intervalo_verificacao
+        self.retencao = retencao
+        self._relogio = relogio
+        self._lock = threading.Lock()
+        self._por_nome = {}
+        self._por_hash = {}
+        self._ultima_verificacao = None
+        self._observador = None
+        self.versao = ""
+
+    def _arquivos(self):
+        """Gera (nome relativo, caminho, stat) dos arquivos de origem, fora de dist/."""
+        for pasta, subpastas, arquivos in os.walk(self.pasta_static):
+            if pasta == self.pasta_static:
+                subpastas[:] = [s for s in subpastas if s != PASTA_SAIDA and not s.startswith(".")]
+            for arquivo in arquivos:
+                if arquivo.startswith("."):
+                    continue
+                caminho = os.path.join(pasta, arquivo)
+                nome = os.path.relpath(caminho, self.pasta_static).replace(os.sep, "/")
+                yield nome, caminho, os.stat(caminho)
+
+    def _publicar(self, nome, caminho, assinatura):
+        with open(caminho, "rb") as arquivo:
+            dados = arquivo.read()
+        return self._publicar_dados(nome, dados, assinatura, caminho)
+
+    def _publicar_dados(self, nome, dados, assinatura, origem=None):
+        """Publica `dados` em dist/ com hash no nome. Sem `origem`, retorna None se não puder gravar."""
+        hash_conteudo = hashlib.sha256(dados).hexdigest()
+        nome_hash = _nome_com_hash(nome, hash_conteudo)
+        mime = mimetypes.guess_type(nome)[0] or "application/octet-stream"
+        destino = os.path.join(self.pasta_saida, *nome_hash.split("/"))
+
+        variantes = {}
+        try:
+            if not os.path.exists(destino):
+                _gravar_atomico(destino, dados)
+            servido = destino
+            if os.path.splitext(nome)[1].lower() in EXTENSOES_COMPRIMIVEIS and len(dados) >= TAMANHO_MINIMO_COMPRESSAO:
+                sufixos = {"gzip": ".gz", "br": ".br"}
+                pendentes = [c for c in sufixos if c != "br" or brotli is not None]
+                if all(os.path.exists(destino + sufixos[c]) for c in pendentes):
+                    # Já publicadas por uma execução anterior (o nome muda com o conteúdo)
+                    variantes = {c: destino + sufixos[c] for c in pendentes}
+                else:
+                    for codificacao, comprimido in _comprimir(dados).items():
+                        _gravar_atomico(destino + sufixos[codificacao], comprimido)
+                        variantes[codificacao] = destino + sufixos[codificacao]
+        except OSError:
+            # Pasta somente leitura: serve o original, sem variantes comprimidas
+            if origem is None:
+                return None
+            servido, variantes = origem, {}
+        return Ativo(nome, nome_hash, servido, len(dados), hash_conteudo, mime, variantes, assinatura)
+
+    def construir(self):
+        """Varre a pasta static e publica os arquivos novos ou alterados. Retorna True se algo mudou."""
+        with self._lock:
+            self._ultima_verificacao = self._relogio()
+            anteriores = self._por_nome
+            por_nome = {}
+            for nome, caminho, info in self._arquivos():
+                assinatura = (info.st_mtime_ns, info.st_size)
+                ativo = anteriores.get(nome)
+                if ativo is None or ativo.assinatura != assinatura:
+                    ativo = self._publicar(nome, caminho, assinatura)
+                por_nome[nome] = ativo
+            self._publicar_sprite(por_nome, anteriores)
+            if por_nome.keys() == anteriores.keys() and all(
+                por_nome[n] is anteriores[n] for n in por_nome
+            ):
+                return False
+            self._por_nome = por_nome
+            self._por_hash = {ativo.nome_hash: ativo for ativo in por_nome.values()}
+            self.versao = hashlib.sha256(
+                "".join(sorted(ativo.nome_hash for ativo in por_nome.values())).encode()
+            ).hexdigest()[:TAMANHO_HASH]
+            self._remover_obsoletos(por_nome)
+            return True
+
+    def _remover_obsoletos(self, por_nome):
+        """
+        Remove de dist/ as cópias (e variantes) que não estão no manifesto e
+        não foram gravadas nos últimos `retencao` segundos. Sem isso, cada
+        mudança de conteúdo deixaria uma cópia a mais na pasta.
+        """
+        publicados = set()
+        for ativo in por_nome.values():
+            publicados.add(ativo.caminho)
+            publicados.update(ativo.variantes.values())
+        limite = time.time() - self.retencao
+        for pasta, _, arquivos in os.walk(self.pasta_saida):
+            for arquivo in arquivos:
+                caminho = os.path.join(pasta, arquivo)
+                try:
+                    if caminho not in publicados and os.stat(caminho).st_mtime <= limite:
+                        os.remove(caminho)
+                except OSError:  # removido por outro worker, ou pasta somente leitura
+                    pass
+
+    def _publicar_sprite(self, por_nome, anteriores):
+        """Publica o sprite com os sons existentes de SONS_SPRITE, refeito só quando algum deles muda."""
+        entradas = [por_nome[f"sounds/{som}.mp3"] for som in SONS_SPRITE if f"sounds/{som}.mp3" in por_nome]
+        if not entradas:
+            return
+        assinatura = tuple(ativo.hash for ativo in entradas)
+        sprite = anteriores.get(NOME_SPRITE)
+        if sprite is None or sprite.assinatura != assinatura:
+            partes = []
+            for ativo in entradas:
+                with open(ativo.caminho, "rb") as arquivo:
+                    partes.append(arquivo.read())
+            sprite = self._publicar_dados(NOME_SPRITE, b"".join(partes), assinatura)
+        if sprite is not None:
+            por_nome[NOME_SPRITE] = sprite
+
+    def segmentos_sprite(self):
+        """{som: [início, tamanho]} em bytes de cada trecho do sprite, ou None se não houver sprite."""
+        por_nome = self._por_nome
+        if NOME_SPRITE not in por_nome:
+            return None
+        segmentos, inicio = {}, 0
+        for som in SONS_SPRITE:
+            ativo = por_nome.get(f"sounds/{som}.mp3")
+            if ativo is not None:
+                segmentos[som] = [inicio, ativo.tamanho]
+                inicio += ativo.tamanho
+        return segmentos
+
+    def atualizar(self):
+        """Reconstrói o manifesto se o intervalo de verificação já passou. Retorna True se algo mudou."""
+        ultima = self._ultima_verificacao
+        if ultima is not None and self._relogio() - ultima < self.intervalo_verificacao:
+            return False
+        return self.construir()
+
+    def invalidar(self):
+        """Faz o próximo atualizar() varrer a pasta, sem esperar o intervalo."""
+        self._ultima_verificacao = None
+
+    def observar(self):
+        """
+        Observa a pasta static com o watchdog (se instalado) e invalida o
+        manifesto a cada mudança fora de dist/. Retorna True se o observador
+        foi iniciado.
+        """
+        if Observer is None or self._observador is not None:
+            return self._observador is not None
+        manifesto = self
+
+        class _Invalidador(FileSystemEventHandler):
+            def on_any_event(self, evento):
+                caminho = os.path.abspath(os.fsdecode(evento.src_path))
+                if caminho != manifesto.pasta_saida and not caminho.startswith(manifesto.pasta_saida + os.sep):
+                    manifesto.invalidar()
+
+        observador = Observer()
+        observador.daemon = True
+        observador.schedule(_Invalidador(), self.pasta_static, recursive=True)
+        try:
+            observador.start()
+        except OSError:  # p.ex. limite de inotify atingido
+            return False
+        self._observador = observador
+        return True
+
+    def parar(self):
+        """Para o observador iniciado por observar()."""
+        if self._observador is not None:
+            self._observador.stop()
+            self._observador = None
+
+    def nome_hash(self, nome):
+        """Nome com hash de um arquivo de static/, ou None se ele não existir."""
+        ativo = self._por_nome.get(nome)
+        return ativo.nome_hash if ativo is not None else None
+
+    def obter(self, nome_hash):
+        """O Ativo publicado com esse nome com hash, ou None."""
+        return self._por_hash.get(nome_hash)
+
+    def obter_original(self, nome):
+        """O Ativo de um arquivo de static/ pelo nome sem hash, ou None."""
+        return self._por_nome.get(nome)
+
+    def __len__(self):
+        return len(self._por_nome)
+
+    def __iter__(self):
+        return iter(list(self._por_nome.values()))
+
+
+def escolher_variante(ativo, codificacoes_aceitas):
+    """
+    Escolhe a variante pré-comprimida aceita pelo cliente (brotli antes de gzip).
+
+    Args:
+        ativo: O Ativo a servir
+        codificacoes_aceitas: Qualidade por codificação, como request.accept_encodings
+
+    Returns:
+        tuple: (caminho, codificação ou None)
+    """
+    for codificacao in ("br", "gzip"):
+        caminho = ativo.variantes.get(codificacao)
+        if caminho is not None and codificacoes_aceitas[codificacao] > 0:
+            return caminho, codificacao
+    return ativo.caminho, None
+
+
+if __name__ == "__main__":
+    manifesto = ManifestoAtivos(os.path.join(os.path.dirname(os.path.abspath(__file__)), "static"))
+    inicio = time.perf_counter()
+    manifesto.construir()
+    for ativo in manifesto:
+        variantes = ", ".join(f"{c} {os.path.getsize(p):,}" for c, p in sorted(ativo.variantes.items()))
+        print(f"{ativo.nome_hash:<45}{ativo.tamanho:>10,}  {variantes}")
+    print(f"\n{len(manifesto)} arquivos publicados em {time.perf_counter() - inicio:.2f}s (versão {manifesto.versao})")
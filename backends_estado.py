@@ -0,0 +1,222 @@
+import os
+import sqlite3
+import threading
+import time
+
+from armazem_ttl import ArmazemTTL
+
+# =============================
+# Backends de estado
+# =============================
+# Cada backend executa um lote de operações em uma única ida ao armazenamento.
+# As operações são tuplas:
+#   ("obter", chave)                 -> valor ou None
+#   ("definir", chave, valor, ttl)   -> None
+#   ("remover", chave)               -> None
+#   ("incrementar", chave, ttl)      -> novo valor (o prazo é definido só na criação)
+# As chaves têm a forma "<espaço>:<identificador>", p.ex. "bloqueio:10.0.0.1".
+
+class BackendEstado:
+    """Interface comum dos backends de estado."""
+
+    # Backends compartilhados entre processos só armazenam bytes, str e números
+    compartilhado = False
+
+    def lote(self, operacoes):
+        """Executa as operações em ordem e retorna a lista de resultados."""
+        raise NotImplementedError
+
+    def estatisticas(self):
+        """Retorna informações de ocupação do backend."""
+        return {}
+
+
+class BackendMemoria(BackendEstado):
+    """Estado local do processo, em um ArmazemTTL por espaço de chaves."""
+
+    def __init__(self, capacidade_padrao=50000, capacidades=None, ttl_padrao=3600):
+        self.capacidade_padrao = capacidade_padrao
+        self.capacidades = capacidades or {}
+        self.ttl_padrao = ttl_padrao
+        self._armazens = {}
+        self._lock = threading.Lock()
+
+    def _armazem(self, chave):
+        espaco, _, identificador = chave.partition(':')
+        armazem = self._armazens.get(espaco)
+        if armazem is None:
+            with self._lock:
+                armazem = self._armazens.get(espaco)
+                if armazem is None:
+                    capacidade = self.capacidades.get(espaco, self.capacidade_padrao)
+                    armazem = self._armazens[espaco] = ArmazemTTL(capacidade, self.ttl_padrao)
+        return armazem, identificador
+
+    def lote(self, operacoes):
+        resultados = []
+        for operacao in operacoes:
+            armazem, identificador = self._armazem(operacao[1])
+            tipo = operacao[0]
+            if tipo == "obter":
+                resultados.append(armazem.obter(identificador))
+            elif tipo == "definir":
+                armazem.definir(identificador, operacao[2], operacao[3])
+                resultados.append(None)
+            elif tipo == "remover":
+                armazem.remover(identificador)
+                resultados.append(None)
+            elif tipo == "incrementar":
+                resultados.append(armazem.incrementar(identificador, operacao[2]))
+            else:
+                raise ValueError(f"Operação desconhecida: {tipo}")
+        return resultados
+
+    def itens(self, espaco):
+        """Lista (identificador, valor, segundos até expirar) das chaves vigentes de um espaço."""
+        armazem = self._armazens.get(espaco)
+        return armazem.itens() if armazem is not None else []
+
+    def estatisticas(self):
+        return {espaco: armazem.estatisticas() for espaco, armazem in self._armazens.items()}
+
+
+class BackendSQLite(BackendEstado):
+    """
+    Estado compartilhado entre os workers da mesma máquina em um arquivo
+    SQLite no modo WAL. Cada lote é executado em uma única transação.
+    """
+
+    compartilhado = True
+    INTERVALO_LIMPEZA = 1000  # lotes de escrita entre remoções de chaves expiradas
+
+    def __init__(self, caminho):
+        self.caminho = caminho
+        self._local = threading.local()
+        self._escritas = 0
+        conexao = self._conexao()
+        conexao.execute("PRAGMA journal_mode=WAL")
+        conexao.execute(
+            "CREATE TABLE IF NOT EXISTS estado ("
+            "chave TEXT PRIMARY KEY, valor, expira REAL NOT NULL) WITHOUT ROWID"
+        )
+
+    def _conexao(self):
+        conexao = getattr(self._local, "conexao", None)
+        if conexao is None:
+            conexao = sqlite3.connect(self.caminho, timeout=5, isolation_level=None)
+            conexao.execute("PRAGMA synchronous=NORMAL")
+            self._local.conexao = conexao
+        return conexao
+
+    def lote(self, operacoes):
+        conexao = self._conexao()
+        agora = time.time()
+        escreve = any(operacao[0] != "obter" for operacao in operacoes)
+        resultados = []
+        conexao.execute("BEGIN IMMEDIATE" if escreve else "BEGIN")
+        try:
+            for operacao in operacoes:
+                tipo, chave = operacao[0], operacao[1]
+                if tipo == "obter":
+                    linha = conexao.execute(
+                        "SELECT valor FROM estado WHERE chave = ? AND expira > ?", (chave, agora)
+                    ).fetchone()
+                    resultados.append(linha[0] if linha else None)
+                elif tipo == "definir":
+                    conexao.execute(
+                        "INSERT OR REPLACE INTO estado (chave, valor, expira) VALUES (?, ?, ?)",
+                        (chave, operacao[2], agora + operacao[3]),
+                    )
+                    resultados.append(None)
+                elif tipo == "remover":
+                    conexao.execute("DELETE FROM estado WHERE chave = ?", (chave,))
+                    resultados.append(None)
+                elif tipo == "incrementar":
+                    linha = conexao.execute(
+                        "INSERT INTO estado (chave, valor, expira) VALUES (?, 1, ?) "
+                        "ON CONFLICT(chave) DO UPDATE SET "
+                        "valor = CASE WHEN expira > ? THEN valor + 1 ELSE 1 END, "
+                        "expira = CASE WHEN expira > ? THEN expira ELSE excluded.expira END "
+                        "RETURNING valor",
+                        (chave, agora + operacao[2], agora, agora),
+                    ).fetchone()
+                    resultados.append(linha[0])
+                else:
+                    raise ValueError(f"Operação desconhecida: {tipo}")
+            if escreve:
+                self._escritas += 1
+                if self._escritas % self.INTERVALO_LIMPEZA == 0:
+                    conexao.execute("DELETE FROM estado WHERE expira <= ?", (agora,))
+            conexao.execute("COMMIT")
+        except BaseException:
+            conexao.execute("ROLLBACK")
+            raise
+        return resultados
+
+    def estatisticas(self):
+        linha = self._conexao().execute("SELECT COUNT(*) FROM estado").fetchone()
+        return {"chaves": linha[0], "arquivo": self.caminho}
+
+
+class BackendRedis(BackendEstado):
+    """
+    Estado compartilhado via protocolo Redis. Cada lote é enviado em um
+    único pipeline. Aceita qualquer cliente compatível com redis-py
+    (por exemplo, fakeredis para testes locais).
+    """
+
+    compartilhado = True
+
+    def __init__(self, cliente=None, url=None, prefixo="jokenpo:"):
+        if cliente is None:
+            import redis  # type: ignore
+            cliente = redis.Redis.from_url(url or "redis://localhost:6379/0")
+        self.cliente = cliente
+        self.prefixo = prefixo
+
+    def lote(self, operacoes):
+        pipeline = self.cliente.pipeline(transaction=False)
+        # Posição, na resposta do pipeline, do resultado de cada operação
+        posicoes = []
+        comandos = 0
+        for operacao in operacoes:
+            tipo, chave = operacao[0], self.prefixo + operacao[1]
+            if tipo == "obter":
+                pipeline.get(chave)
+            elif tipo == "definir":
+                pipeline.set(chave, operacao[2], px=max(int(operacao[3] * 1000), 1))
+            elif tipo == "remover":
+                pipeline.delete(chave)
+            elif tipo == "incrementar":
+                # Cria a chave com o prazo apenas se ela não existir, depois incrementa
+                pipeline.set(chave, 0, px=max(int(operacao[2] * 1000), 1), nx=True)
+                pipeline.incr(chave)
+                comandos += 1
+            else:
+                raise ValueError(f"Operação desconhecida: {tipo}")
+            posicoes.append((tipo, comandos))
+            comandos += 1
+        respostas = pipeline.execute()
+        return [respostas[posicao] if tipo in ("obter", "incrementar") else None
+                for tipo, posicao in posicoes]
+
+    def estatisticas(self):
+        return {"chaves": self.cliente.dbsize()}
+
+
+def criar_backend(nome=None, **opcoes):
+    """
+    Cria o backend de estado configurado.
+
+    Args:
+        nome: "memoria", "sqlite" ou "redis" (padrão: variável JOKENPO_BACKEND_ESTADO)
+        opcoes: Parâmetros repassados ao construtor do backend em memória
+    """
+    nome = nome or os.environ.get('JOKENPO_BACKEND_ESTADO', 'memoria')
+    if nome == 'sqlite':
+        return BackendSQLite(os.environ.get('JOKENPO_SQLITE_ESTADO', '/tmp/jokenpo_estado.db'))
+    if nome == 'redis':
+        return BackendRedis(url=os.environ.get('JOKENPO_REDIS_URL'))
+    if nome == 'memoria':
+        return BackendMemoria(**opcoes)
+    raise ValueError(f"Backend de estado desconhecido: {nome}")
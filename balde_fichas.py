@@ -0,0 +1,36 @@
+import time
+
+
+class BaldeFichas:
+    """
+    Balde de fichas: permite rajadas de até `capacidade` ações, repostas à
+    razão de `taxa` fichas por segundo. Sem lock; cada instância pertence a
+    uma única conexão (ou thread).
+    """
+
+    __slots__ = ("capacidade", "taxa", "_fichas", "_atualizado", "_relogio")
+
+    def __init__(self, capacidade, taxa, relogio=time.monotonic):
+        self.capacidade = capacidade
+        self.taxa = taxa
+        self._relogio = relogio
+        self._fichas = float(capacidade)
+        self._atualizado = relogio()
+
+    def _repor(self):
+        agora = self._relogio()
+        self._fichas = min(self.capacidade, self._fichas + (agora - self._atualizado) * self.taxa)
+        self._atualizado = agora
+
+    def consumir(self, fichas=1):
+        """Retira `fichas` do balde. Retorna False (sem retirar nada) se não houver o suficiente."""
+        self._repor()
+        if self._fichas < fichas:
+            return False
+        self._fichas -= fichas
+        return True
+
+    def espera(self, fichas=1):
+        """Segundos até haver `fichas` disponíveis."""
+        self._repor()
+        return max(0.0, (fichas - self._fichas) / self.taxa) if self.taxa else float("inf")
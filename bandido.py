@@ -0,0 +1,149 @@
+import math
+import struct
+import threading
+from array import array
+
+from nucleo import ESTRATEGIAS_COMPUTADOR, RECOMPENSAS
+
+TIPO_BANDIDO = 3  # primeiro byte do formato binário (ver modelo_jogador)
+
+_CABECALHO_BANDIDO = struct.Struct('<BB')  # tipo, número de braços
+
+# =============================
+# Bandido de múltiplos braços
+# =============================
+class BandidoUCB:
+    """
+    Escolhe, para um único jogador, qual estratégia do registro usar em cada
+    rodada (UCB1): a de maior recompensa média somada a um bônus de
+    exploração que diminui à medida que o braço é usado. A recompensa é 1
+    quando o computador vence, 0,5 no empate e 0 na derrota.
+
+    Com `desconto` < 1, as contagens antigas perdem peso a cada rodada, e o
+    bandido volta a explorar quando o jogador muda de comportamento. Em vez de
+    multiplicar todas as contagens a cada rodada, cada nova rodada pesa
+    1/desconto vezes a anterior (`_escala`), e as contagens só são
+    renormalizadas quando a escala fica grande: registrar custa O(1) e
+    escolher, O(número de braços), fixo. O estado são duas contagens por braço.
+    """
+
+    __slots__ = ("bracos", "exploracao", "desconto", "_indices", "_usos", "_somas", "_total",
+                 "_escala", "_lock")
+
+    def __init__(self, bracos=tuple(ESTRATEGIAS_COMPUTADOR), exploracao=0.5, desconto=1.0):
+        """
+        Args:
+            bracos: Nomes das estratégias (chaves de ESTRATEGIAS_COMPUTADOR)
+            exploracao: Peso do bônus de exploração (√2 no UCB1 original)
+            desconto: Fator aplicado às contagens a cada rodada (1 = sem esquecimento)
+        """
+        self.bracos = tuple(bracos)
+        self.exploracao = exploracao
+        self.desconto = desconto
+        self._indices = {nome: indice for indice, nome in enumerate(self.bracos)}
+        self._usos = [0.0] * len(self.bracos)
+        self._somas = [0.0] * len(self.bracos)
+        self._total = 0.0
+        self._escala = 1.0  # peso da próxima rodada; contagens efetivas = contagens / escala
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        """Rodadas registradas (com o desconto, o peso efetivo delas)."""
+        return round(self._total / self._escala)
+
+    def escolher(self):
+        """Retorna o nome da estratégia para a próxima rodada."""
+        usos, somas = self._usos, self._somas
+        # Braços ainda não usados primeiro, na ordem do registro
+        for indice, uso in enumerate(usos):
+            if uso == 0.0:
+                return self.bracos[indice]
+        # média + exploracao * sqrt(ln(total efetivo) / uso efetivo)
+        bonus = self.exploracao * math.sqrt(math.log(max(self._total / self._escala, 1.0)) * self._escala)
+        melhor, valor_melhor = 0, -1.0
+        for indice, uso in enumerate(usos):
+            valor = (somas[indice] + bonus * math.sqrt(uso)) / uso
+            if valor > valor_melhor:
+                melhor, valor_melhor = indice, valor
+        return self.bracos[melhor]
+
+    def registrar(self, ramo, codigo):
+        """
+        Registra o resultado de uma rodada jogada com a estratégia `ramo`.
+        Ramos que não são braços (p.ex. aleatoria_inicial) são ignorados.
+
+        Args:
+            ramo: Nome do ramo retornado por escolher_jogada
+            codigo: Código do resultado (EMPATE, VITORIA_JOGADOR ou VITORIA_COMPUTADOR)
+        """
+        indice = self._indices.get(ramo)
+        if indice is None:
+            return
+        with self._lock:
+            if self.desconto < 1.0:
+                self._escala /= self.desconto
+                if self._escala > 1e100:
+                    self._normalizar()
+            escala = self._escala
+            self._usos[indice] += escala
+            self._somas[indice] += RECOMPENSAS[codigo] * escala
+            self._total += escala
+
+    def _normalizar(self):
+        # Sob self._lock: volta a escala a 1 sem mudar as contagens efetivas
+        escala = self._escala
+        self._usos = [uso / escala for uso in self._usos]
+        self._somas = [soma / escala for soma in self._somas]
+        self._total /= escala
+        self._escala = 1.0
+
+    def medias(self):
+        """Recompensa média de cada braço já usado."""
+        return {nome: round(self._somas[i] / self._usos[i], 4)
+                for i, nome in enumerate(self.bracos) if self._usos[i]}
+
+    def contagens(self):
+        """Usos e somas de recompensa efetivos (já com o desconto) de cada braço."""
+        with self._lock:
+            escala = self._escala
+            return [uso / escala for uso in self._usos], [soma / escala for soma in self._somas]
+
+    @classmethod
+    def a_priori(cls, usos, somas, peso=2.0, **opcoes):
+        """
+        Bandido novo que começa com a recompensa média de cada braço em outras
+        sessões (`usos` e `somas` somados), valendo `peso` rodadas por braço:
+        orienta as primeiras escolhas sem impedir a exploração.
+        """
+        bandido = cls(**opcoes)
+        for indice, (uso, soma) in enumerate(zip(usos, somas)):
+            if uso > 0:
+                bandido._usos[indice] = peso
+                bandido._somas[indice] = peso * soma / uso
+        bandido._total = sum(bandido._usos)
+        return bandido
+
+    def para_bytes(self):
+        """Serializa o estado (8 bytes por braço)."""
+        with self._lock:
+            self._normalizar()
+            return (_CABECALHO_BANDIDO.pack(TIPO_BANDIDO, len(self.bracos))
+                    + array('f', self._usos).tobytes() + array('f', self._somas).tobytes())
+
+    @classmethod
+    def de_bytes(cls, dados, **opcoes):
+        """
+        Reconstrói um bandido serializado por `para_bytes`. Se o número de
+        braços mudou desde a gravação, o bandido recomeça do zero.
+        """
+        tipo, quantidade = _CABECALHO_BANDIDO.unpack_from(dados)
+        if tipo != TIPO_BANDIDO:
+            raise ValueError(f"Tipo de bandido inesperado: {tipo}")
+        bandido = cls(**opcoes)
+        if quantidade != len(bandido.bracos):
+            return bandido
+        posicao = _CABECALHO_BANDIDO.size
+        bandido._usos = list(array('f', dados[posicao:posicao + 4 * quantidade]))
+        bandido._somas = list(array('f', dados[posicao + 4 * quantidade:posicao + 8 * quantidade]))
+        bandido._total = sum(bandido._usos)
+        return bandido
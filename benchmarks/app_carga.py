@@ -0,0 +1,4 @@
+# Ponto de entrada do gunicorn para o teste de carga: benchmarks.app_carga:app
+from benchmarks.comum import preparar_app_para_carga
+
+app = preparar_app_para_carga().app
@@ -0,0 +1,92 @@
+"""
+Rodadas consecutivas por POST /jogar (uma requisição HTTP por rodada, com
+keep-alive) contra o canal WebSocket /ws/jogar (uma conexão por jogador),
+em um gunicorn local. Requer flask-sock (e seu simple-websocket).
+
+Exemplo:
+    python -m benchmarks.canal --rodadas 500 --jogadores 4 --saida canal.json
+"""
+import argparse
+import http.client
+import json
+import threading
+import time
+
+from benchmarks.carga import CABECALHOS, _corpo, _resumir, gunicorn_local
+from benchmarks.comum import metadados, salvar
+
+
+def _rodadas_http(porta, rodadas, latencias):
+    conexao = http.client.HTTPConnection("127.0.0.1", porta, timeout=30)
+    erros = 0
+    for i in range(rodadas):
+        t0 = time.perf_counter()
+        conexao.request("POST", "/jogar", body=_corpo(i), headers=CABECALHOS)
+        resposta = conexao.getresponse()
+        resposta.read()
+        latencias.append(time.perf_counter() - t0)
+        erros += resposta.status >= 400
+    conexao.close()
+    return erros
+
+
+def _rodadas_ws(porta, rodadas, latencias):
+    from simple_websocket import Client  # type: ignore
+
+    cliente = Client.connect(f"ws://127.0.0.1:{porta}/ws/jogar", headers={"X-Forwarded-Proto": "https"})
+    erros = 0
+    try:
+        for i in range(rodadas):
+            t0 = time.perf_counter()
+            cliente.send(_corpo(i))
+            resposta = json.loads(cliente.receive(timeout=30))
+            latencias.append(time.perf_counter() - t0)
+            erros += resposta.get("status", 200) >= 400
+    finally:
+        cliente.close()
+    return erros
+
+
+def comparar_canais(porta, rodadas, jogadores):
+    """Executa `rodadas` rodadas por jogador, com `jogadores` threads simultâneas, em cada canal."""
+    resultados = {}
+    for nome, executar in (("http_post", _rodadas_http), ("websocket", _rodadas_ws)):
+        latencias, erros = [], [0]
+        lock = threading.Lock()
+
+        def jogar():
+            locais = []
+            falhas = executar(porta, rodadas, locais)
+            with lock:
+                latencias.extend(locais)
+                erros[0] += falhas
+
+        trabalhadores = [threading.Thread(target=jogar) for _ in range(jogadores)]
+        inicio = time.perf_counter()
+        for trabalhador in trabalhadores:
+            trabalhador.start()
+        for trabalhador in trabalhadores:
+            trabalhador.join()
+        resultados[nome] = _resumir(latencias, erros[0], time.perf_counter() - inicio)
+    return resultados
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compara POST /jogar com o canal WebSocket.")
+    parser.add_argument('--rodadas', type=int, default=500, help="rodadas por jogador")
+    parser.add_argument('--jogadores', type=int, default=4, help="conexões simultâneas")
+    parser.add_argument('--workers', type=int, default=1)
+    parser.add_argument('--threads', type=int, default=8, help="cada WebSocket aberto ocupa uma thread")
+    parser.add_argument('--saida', help="arquivo JSON de resultado")
+    args = parser.parse_args()
+
+    with gunicorn_local(args.workers, args.threads) as porta:
+        resultados = comparar_canais(porta, args.rodadas, args.jogadores)
+
+    configuracao = {key: getattr(args, key) for key in ("rodadas", "jogadores", "workers", "threads")}
+    salvar({"tipo": "canal", "ambiente": metadados(), "configuracao": configuracao,
+            "resultados": resultados}, args.saida)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+"""
+Teste de carga dos endpoints, pelo cliente de teste do Flask (em processo)
+ou contra um gunicorn iniciado localmente.
+
+Exemplos:
+    python -m benchmarks.carga --modo cliente --requisicoes 2000
+    python -m benchmarks.carga --modo gunicorn --workers 2 --threads 4 --concorrencia 8 --saida carga.json
+"""
+import argparse
+import contextlib
+import http.client
+import json
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+from benchmarks.comum import RAIZ, metadados, percentis, preparar_app_para_carga, salvar
+
+ROTAS = {
+    "jogar": ("POST", "/jogar"),
+    "index": ("GET", "/"),
+    "ping": ("GET", "/ping"),
+    "css": ("GET", "/static/css/styles.css"),
+    "som": ("GET", "/static/sounds/click.mp3"),
+}
+CABECALHOS = {"X-Forwarded-Proto": "https", "Content-Type": "application/json"}
+
+
+def _corpo(indice):
+    return json.dumps({"jogador": indice % 3, "ultimo_jogador": (indice - 1) % 3})
+
+
+def _resumir(latencias, erros, duracao):
+    return {
+        "requisicoes": len(latencias),
+        "erros": erros,
+        "rps": round(len(latencias) / duracao, 1) if duracao else None,
+        **{chave: round(valor * 1000, 3) if valor is not None else None
+           for chave, valor in percentis(latencias).items()},
+        "unidade_latencia": "ms",
+    }
+
+
+def carga_cliente(requisicoes):
+    """Executa as rotas pelo cliente de teste do Flask, sem rede."""
+    app = preparar_app_para_carga().app
+    cliente = app.test_client()
+    resultados = {}
+    for nome, (metodo, caminho) in ROTAS.items():
+        latencias, erros = [], 0
+        inicio = time.perf_counter()
+        for i in range(requisicoes):
+            t0 = time.perf_counter()
+            resposta = cliente.open(caminho, method=metodo, base_url="https://localhost",
+                                    data=_corpo(i) if metodo == "POST" else None,
+                                    content_type="application/json")
+            latencias.append(time.perf_counter() - t0)
+            erros += resposta.status_code >= 400
+            resposta.close()
+        resultados[nome] = _resumir(latencias, erros, time.perf_counter() - inicio)
+    return resultados
+
+
+def _porta_livre():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _aguardar(porta, limite=30.0):
+    prazo = time.monotonic() + limite
+    while time.monotonic() < prazo:
+        try:
+            conexao = http.client.HTTPConnection("127.0.0.1", porta, timeout=1)
+            conexao.request("GET", "/ping", headers=CABECALHOS)
+            conexao.getresponse().read()
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError("gunicorn não respondeu a tempo")
+
+
+@contextlib.contextmanager
+def gunicorn_local(workers, threads):
+    """Inicia um gunicorn com benchmarks.app_carga:app e fornece a porta; encerra-o ao sair."""
+    porta = _porta_livre()
+    processo = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "--bind", f"127.0.0.1:{porta}", "--workers", str(workers),
+         "--threads", str(threads), "--log-level", "warning", "benchmarks.app_carga:app"],
+        cwd=RAIZ, env={**os.environ, "PYTHONPATH": RAIZ},
+    )
+    try:
+        _aguardar(porta)
+        yield porta
+    finally:
+        processo.terminate()
+        processo.wait(timeout=30)
+
+
+def carga_gunicorn(requisicoes, concorrencia, workers, threads):
+    """Inicia um gunicorn local e dispara as rotas com `concorrencia` threads."""
+    with gunicorn_local(workers, threads) as porta:
+        resultados = {}
+        for nome, (metodo, caminho) in ROTAS.items():
+            latencias, erros = [], [0]
+            lock = threading.Lock()
+            por_thread = requisicoes // concorrencia
+
+            def trabalhar():
+                conexao = http.client.HTTPConnection("127.0.0.1", porta, timeout=30)
+                locais, falhas = [], 0
+                for i in range(por_thread):
+                    t0 = time.perf_counter()
+                    try:
+                        conexao.request(metodo, caminho, body=_corpo(i) if metodo == "POST" else None,
+                                        headers=CABECALHOS)
+                        resposta = conexao.getresponse()
+                        resposta.read()
+                        falhas += resposta.status >= 400
+                        if resposta.will_close:
+                            conexao.close()
+                    except OSError:
+                        falhas += 1
+                        conexao.close()
+                    locais.append(time.perf_counter() - t0)
+                with lock:
+                    latencias.extend(locais)
+                    erros[0] += falhas
+
+            trabalhadores = [threading.Thread(target=trabalhar) for _ in range(concorrencia)]
+            inicio = time.perf_counter()
+            for trabalhador in trabalhadores:
+                trabalhador.start()
+            for trabalhador in trabalhadores:
+                trabalhador.join()
+            resultados[nome] = _resumir(latencias, erros[0], time.perf_counter() - inicio)
+        return resultados
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Teste de carga dos endpoints do jogo.")
+    parser.add_argument('--modo', choices=("cliente", "gunicorn"), default="cliente")
+    parser.add_argument('--requisicoes', type=int, default=1000, help="requisições por rota")
+    parser.add_argument('--concorrencia', type=int, default=8, help="threads clientes (modo gunicorn)")
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--threads', type=int, default=4)
+    parser.add_argument('--saida', help="arquivo JSON de resultado")
+    args = parser.parse_args()
+
+    if args.modo == "cliente":
+        resultados = carga_cliente(args.requisicoes)
+        configuracao = {"requisicoes": args.requisicoes}
+    else:
+        resultados = carga_gunicorn(args.requisicoes, args.concorrencia, args.workers, args.threads)
+        configuracao = {key: getattr(args, key) for key in ("requisicoes", "concorrencia", "workers", "threads")}
+
+    salvar({"tipo": f"carga_{args.modo}", "ambiente": metadados(), "configuracao": configuracao,
+            "resultados": resultados}, args.saida)
+
+
+if __name__ == "__main__":
+    main()
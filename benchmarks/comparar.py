@@ -0,0 +1,53 @@
+"""
+Compara dois resultados JSON de benchmark (p.ex. de commits diferentes).
+
+Exemplo:
+    python -m benchmarks.comparar antes.json depois.json --tolerancia 0.1
+"""
+import argparse
+import json
+import sys
+
+# Métrica principal de cada tipo de benchmark e se valores maiores são melhores
+METRICAS = {"mediana_ns": False, "p95": False, "rps": True}
+
+
+def comparar(antes, depois, tolerancia):
+    """Retorna as linhas do relatório e se houve regressão acima da tolerância."""
+    linhas, regressao = [], False
+    for nome, valores in depois["resultados"].items():
+        anteriores = antes["resultados"].get(nome)
+        if not anteriores:
+            continue
+        for metrica, maior_melhor in METRICAS.items():
+            a, b = anteriores.get(metrica), valores.get(metrica)
+            if not a or b is None:
+                continue
+            variacao = (b - a) / a
+            piorou = variacao < -tolerancia if maior_melhor else variacao > tolerancia
+            regressao |= piorou
+            linhas.append(f"{'REGRESSÃO ' if piorou else '          '}{nome:<55}{metrica:<12}"
+                          f"{a:>14,.1f}{b:>14,.1f}{variacao:>+9.1%}")
+    return linhas, regressao
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compara dois resultados de benchmark.")
+    parser.add_argument('antes')
+    parser.add_argument('depois')
+    parser.add_argument('--tolerancia', type=float, default=0.10, help="variação aceita (padrão 10%%)")
+    args = parser.parse_args()
+
+    with open(args.antes, encoding="utf-8") as arquivo:
+        antes = json.load(arquivo)
+    with open(args.depois, encoding="utf-8") as arquivo:
+        depois = json.load(arquivo)
+
+    print(f"{antes['ambiente'].get('commit')} -> {depois['ambiente'].get('commit')}")
+    linhas, regressao = comparar(antes, depois, args.tolerancia)
+    print("\n".join(linhas))
+    sys.exit(1 if regressao else 0)
+
+
+if __name__ == "__main__":
+    main()
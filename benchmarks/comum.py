@@ -0,0 +1,62 @@
+import json
+import os
+import platform
+import subprocess
+import sys
+from datetime import datetime, timezone
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if RAIZ not in sys.path:
+    sys.path.insert(0, RAIZ)
+
+
+def percentis(amostras, pontos=(50, 95, 99)):
+    """Retorna {"p50": ..., "p95": ..., "p99": ...} das amostras (em segundos)."""
+    ordenadas = sorted(amostras)
+    if not ordenadas:
+        return {f"p{p}": None for p in pontos}
+    return {f"p{p}": ordenadas[min(len(ordenadas) - 1, int(len(ordenadas) * p / 100))] for p in pontos}
+
+
+def metadados():
+    """Informações do ambiente e do commit, para comparar resultados entre versões."""
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=RAIZ, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "commit": commit,
+        "data": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "plataforma": platform.platform(),
+        "cpus": os.cpu_count(),
+    }
+
+
+def salvar(resultado, caminho):
+    """Grava o resultado em JSON (e também o imprime)."""
+    texto = json.dumps(resultado, indent=2, ensure_ascii=False)
+    print(texto)
+    if caminho:
+        with open(caminho, "w", encoding="utf-8") as arquivo:
+            arquivo.write(texto + "\n")
+
+
+def preparar_app_para_carga():
+    """
+    Cria o app com rate limiting (inclusive do WebSocket) e intervalo mínimo desligados, para que
+    a carga meça o processamento e não as respostas 429/400 de proteção.
+    """
+    import app as modulo
+    modulo.INTERVALO_MIN_JOGADAS = 0.0
+    modulo.WS_RAJADA = modulo.WS_FICHAS_POR_SEGUNDO = 1e9
+    # O controle de admissão (503 de proteção) só fica ligado se pedido explicitamente
+    if 'JOKENPO_ADMISSAO' not in os.environ:
+        modulo.ADMISSAO_ATIVA = False
+    # As conexões WebSocket ficam limitadas só pelas --threads passadas ao gunicorn
+    if 'JOKENPO_WS_MAX_CONEXOES' not in os.environ:
+        modulo.WS_MAX_CONEXOES = 1_000_000
+    modulo.app = modulo.create_app({'RATELIMIT_ENABLED': False})
+    return modulo
@@ -0,0 +1,109 @@
+"""
+Tempo de inicialização a frio: do início do processo Python até a primeira
+resposta, em processos novos (sem cache de módulos já importados).
+
+Exemplos:
+    python -m benchmarks.inicializacao --amostras 20 --saida inicializacao.json
+    python -m benchmarks.inicializacao --gunicorn --saida inicializacao.json
+"""
+import argparse
+import http.client
+import json
+import os
+import subprocess
+import sys
+import time
+
+from benchmarks.carga import CABECALHOS, _porta_livre
+from benchmarks.comum import RAIZ, metadados, percentis, salvar
+
+# Executado em cada processo novo; imprime os instantes (perf_counter) de cada etapa
+SCRIPT_ETAPAS = """
+import json, time
+t0 = time.perf_counter()
+import nucleo
+t1 = time.perf_counter()
+import app as modulo
+t2 = time.perf_counter()
+aplicativo = modulo.create_app()
+t3 = time.perf_counter()
+resposta = aplicativo.test_client().get('/ping', base_url='https://localhost')
+assert resposta.status_code == 200, resposta.status_code
+t4 = time.perf_counter()
+print(json.dumps({"import_nucleo": t1 - t0, "import_app": t2 - t1, "create_app": t3 - t2,
+                  "primeira_resposta": t4 - t3}))
+"""
+
+
+def _resumir(amostras):
+    return {
+        "amostras": len(amostras),
+        **{chave: round(valor * 1000, 3) if valor is not None else None
+           for chave, valor in percentis(amostras).items()},
+        "unidade_latencia": "ms",
+    }
+
+
+def medir_etapas(amostras):
+    """Mede cada etapa e o total (incluindo a partida do interpretador) em processos novos."""
+    etapas = {}
+    for _ in range(amostras):
+        inicio = time.perf_counter()
+        saida = subprocess.run(
+            [sys.executable, "-c", SCRIPT_ETAPAS], cwd=RAIZ, capture_output=True, text=True, check=True,
+            env={**os.environ, "PYTHONPATH": RAIZ, "PYTHONDONTWRITEBYTECODE": "1"},
+        ).stdout
+        total = time.perf_counter() - inicio
+        for nome, segundos in json.loads(saida.strip().splitlines()[-1]).items():
+            etapas.setdefault(nome, []).append(segundos)
+        etapas.setdefault("processo_ate_primeira_resposta", []).append(total)
+    return {nome: _resumir(valores) for nome, valores in etapas.items()}
+
+
+def medir_gunicorn(amostras):
+    """Do lançamento do gunicorn (um worker) até a primeira resposta de /ping."""
+    tempos = []
+    for _ in range(amostras):
+        porta = _porta_livre()
+        inicio = time.perf_counter()
+        processo = subprocess.Popen(
+            [sys.executable, "-m", "gunicorn", "--bind", f"127.0.0.1:{porta}", "--workers", "1",
+             "--log-level", "warning", "app:app"],
+            cwd=RAIZ, env={**os.environ, "PYTHONPATH": RAIZ},
+        )
+        try:
+            prazo = inicio + 30
+            while True:
+                try:
+                    conexao = http.client.HTTPConnection("127.0.0.1", porta, timeout=1)
+                    conexao.request("GET", "/ping", headers=CABECALHOS)
+                    if conexao.getresponse().status == 200:
+                        break
+                except OSError:
+                    if time.perf_counter() > prazo:
+                        raise RuntimeError("gunicorn não respondeu a tempo")
+                    time.sleep(0.005)
+            tempos.append(time.perf_counter() - inicio)
+        finally:
+            processo.terminate()
+            processo.wait(timeout=30)
+    return {"gunicorn_ate_primeira_resposta": _resumir(tempos)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tempo de inicialização até a primeira resposta.")
+    parser.add_argument('--amostras', type=int, default=10, help="processos medidos")
+    parser.add_argument('--gunicorn', action='store_true', help="mede também um gunicorn real")
+    parser.add_argument('--saida', help="arquivo JSON de resultado")
+    args = parser.parse_args()
+
+    resultados = medir_etapas(args.amostras)
+    if args.gunicorn:
+        resultados.update(medir_gunicorn(args.amostras))
+
+    salvar({"tipo": "inicializacao", "ambiente": metadados(), "configuracao": {"amostras": args.amostras},
+            "resultados": resultados}, args.saida)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Meta-estratégia com bandido (UCB) x mistura fixa: custo por rodada e taxa de
+vitórias do computador na simulação contra os jogadores sintéticos.
+
+Exemplo:
+    python -m benchmarks.meta_estrategia --rodadas 200000 --saida meta.json
+"""
+import argparse
+import random
+
+from benchmarks.comum import metadados, salvar
+from benchmarks.micro import medir
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bandido x mistura fixa na estratégia do computador.")
+    parser.add_argument('--rodadas', type=int, default=200_000, help="rodadas simuladas por combinação")
+    parser.add_argument('--processos', type=int, default=None, help="padrão: número de CPUs")
+    parser.add_argument('--repeticoes', type=int, default=5)
+    parser.add_argument('--saida', help="arquivo JSON de resultado")
+    args = parser.parse_args()
+
+    from bandido import BandidoUCB
+    from modelo_jogador import ModeloJogador
+    from nucleo import TABELA_RESULTADOS, escolher_jogada
+    from simulacao import POLITICAS, torneio
+
+    resultados = {}
+
+    # Custo por rodada: escolha da jogada com cada meta-estratégia, registro do
+    # resultado no bandido e serialização do estado da sessão
+    gerador = random.Random(0)
+    modelo, bandido = ModeloJogador(100), BandidoUCB()
+    for _ in range(500):
+        jogada_comp, ramo = escolher_jogada(modelo.ultima, modelo, gerador, bandido)
+        jogada = gerador.randrange(3)
+        modelo.registrar(jogada, jogada_comp)
+        bandido.registrar(ramo, TABELA_RESULTADOS[jogada * 3 + jogada_comp])
+    resultados["escolher_jogada[fixa]"] = medir(lambda: escolher_jogada(1, modelo, gerador), args.repeticoes)
+    resultados["escolher_jogada[ucb]"] = medir(lambda: escolher_jogada(1, modelo, gerador, bandido), args.repeticoes)
+    resultados["bandido.registrar"] = medir(lambda: bandido.registrar('contra_padrao', 2), args.repeticoes)
+    resultados["bandido.para_bytes"] = medir(bandido.para_bytes, args.repeticoes)
+    dados = bandido.para_bytes()
+    resultados["bandido.de_bytes"] = medir(lambda: BandidoUCB.de_bytes(dados), args.repeticoes)
+    resultados["bandido.bytes_por_sessao"] = {"bytes": len(dados)}
+
+    # Taxa de vitórias do computador contra cada jogador sintético
+    pares = {'markov': 'markov_ucb', 'ngram': 'ngram_ucb'}
+    simulacao = torneio([*pares, *pares.values()], list(POLITICAS), args.rodadas, processos=args.processos)
+    for fixa, ucb in pares.items():
+        for politica in POLITICAS:
+            taxas = {}
+            for estrategia in (fixa, ucb):
+                empates, derrotas, vitorias = simulacao[(estrategia, politica)]["contagem"]
+                taxas[estrategia] = vitorias / (empates + derrotas + vitorias)
+            resultados[f"taxa_vitorias[{fixa},{politica}]"] = {
+                "fixa": round(taxas[fixa], 4),
+                "ucb": round(taxas[ucb], 4),
+                "ganho": round(taxas[ucb] - taxas[fixa], 4),
+            }
+
+    salvar({"tipo": "meta_estrategia", "ambiente": metadados(), "resultados": resultados}, args.saida)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Micro-benchmarks das funções do caminho de /jogar.
+
+Exemplo:
+    python -m benchmarks.micro --saida micro.json
+"""
+import argparse
+import itertools
+import random
+import statistics
+import timeit
+
+from benchmarks.comum import metadados, preparar_app_para_carga, salvar
+
+TAMANHOS_HISTORICO = (0, 10, 100, 1000, 10000)
+
+
+def medir(funcao, repeticoes=5):
+    """Retorna a mediana e o mínimo, em nanossegundos por chamada, de `repeticoes` medições."""
+    temporizador = timeit.Timer(funcao)
+    numero, _ = temporizador.autorange()
+    tempos = [t / numero * 1e9 for t in temporizador.repeat(repeat=repeticoes, number=numero)]
+    return {"mediana_ns": round(statistics.median(tempos), 1), "minimo_ns": round(min(tempos), 1)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Micro-benchmarks do jogo.")
+    parser.add_argument('--saida', help="arquivo JSON de resultado")
+    parser.add_argument('--repeticoes', type=int, default=5)
+    args = parser.parse_args()
+
+    app = preparar_app_para_carga()
+    app.app.app_context().push()  # calcular_jogada_computador registra no logger do app
+    resultados = {}
+
+    # calcular_jogada_computador com históricos de tamanhos diferentes
+    for preditor in ('markov', 'ngram'):
+        app.PREDITOR = preditor
+        for tamanho in TAMANHOS_HISTORICO:
+            modelo = app.criar_modelo()
+            gerador = random.Random(tamanho)
+            for _ in range(tamanho):
+                modelo.registrar(gerador.randrange(3), gerador.randrange(3))
+            nome = f"calcular_jogada_computador[{preditor},historico={tamanho}]"
+            resultados[nome] = medir(lambda: app.calcular_jogada_computador(1, modelo), args.repeticoes)
+
+            # Custo de registrar a rodada no modelo (atualização incremental)
+            resultados[f"registrar[{preditor},historico={tamanho}]"] = medir(
+                lambda: modelo.registrar(1, 2), args.repeticoes
+            )
+    app.PREDITOR = 'markov'
+
+    # validar_jogada no caminho de sucesso, com um IP diferente a cada chamada
+    ips = itertools.cycle([f"10.0.{i // 256}.{i % 256}" for i in range(10000)])
+    resultados["validar_jogada"] = medir(lambda: app.validar_jogada(1, next(ips)), args.repeticoes)
+
+    resultados["determinar_resultado"] = medir(lambda: app.determinar_resultado(0, 2), args.repeticoes)
+
+    carga = {"jogador": 1, "ultimo_jogador": 0, "nome": "<script>alert(1);</script>", "extra": ["a&b", "c"]}
+    resultados["sanitize_input"] = medir(lambda: app.sanitize_input(carga), args.repeticoes)
+
+    salvar({"tipo": "micro", "ambiente": metadados(), "resultados": resultados}, args.saida)
+
+
+if __name__ == "__main__":
+    main()
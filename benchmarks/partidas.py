@@ -0,0 +1,232 @@
+"""
+Gerador de carga das partidas entre jogadores: latência do pareamento e da
+resolução, partidas por segundo e memória por partida pendente.
+
+No modo "motor" (padrão), milhares de jogadores simulados (corrotinas)
+procuram partidas e jogam direto no MotorPartidas, no mesmo processo; uma
+fração abandona a partida depois do pareamento, para exercitar os prazos.
+No modo "ws", threads jogam pelo /ws/partida de um gunicorn local (requer
+flask-sock e simple-websocket; cada conexão ocupa uma thread do worker).
+
+Exemplos:
+    python -m benchmarks.partidas --jogadores 5000 --segundos 10 --saida partidas.json
+    python -m benchmarks.partidas --modo ws --jogadores 8 --segundos 10
+"""
+import argparse
+import asyncio
+import gc
+import json
+import os
+import random
+import threading
+import time
+import tracemalloc
+
+from benchmarks.carga import gunicorn_local
+from benchmarks.comum import metadados, percentis, salvar
+
+
+def _ms(latencias):
+    return {chave: round(valor * 1000, 3) if valor is not None else None
+            for chave, valor in percentis(latencias).items()}
+
+
+def _resumir(pareamento, resolucao, partidas, desfechos, segundos):
+    return {
+        "partidas": partidas,
+        "partidas_por_segundo": round(partidas / segundos, 1),
+        "desfechos": desfechos,
+        "pareamento": _ms(pareamento),
+        "resolucao": _ms(resolucao),
+        "unidade_latencia": "ms",
+    }
+
+
+# =============================
+# Modo motor (em processo)
+# =============================
+async def _carga_motor(jogadores, segundos, abandono, pensar, prazo_jogada, semente):
+    from partidas import MotorPartidas, RecusaPartida
+
+    motor = MotorPartidas(prazo_pareamento=30.0, prazo_jogada=prazo_jogada,
+                          max_espera=jogadores, max_partidas=jogadores)
+    gerador = random.Random(semente)
+    pareamento, resolucao = [], []
+    picos = {"esperando": 0, "em_andamento": 0}
+    laco = asyncio.get_running_loop()
+    fim = laco.time() + segundos
+
+    async def jogador(indice):
+        habilidade = gerador.uniform(0, 100)
+        while laco.time() < fim:
+            t0 = laco.time()
+            try:
+                partida, lado = await motor.procurar(indice, habilidade)
+            except RecusaPartida:
+                await asyncio.sleep(0.01)
+                continue
+            pareamento.append(laco.time() - t0)
+            if gerador.random() < abandono:
+                # Abandona: o adversário ganha por W.O. no prazo; volta depois dele
+                await asyncio.sleep(prazo_jogada)
+                continue
+            await asyncio.sleep(gerador.uniform(0, pensar))
+            t0 = laco.time()
+            try:
+                await motor.jogar(partida, lado, gerador.randrange(3))
+            except RecusaPartida:
+                continue
+            resolucao.append(laco.time() - t0)
+
+    async def observar():
+        while laco.time() < fim:
+            picos["esperando"] = max(picos["esperando"], motor.esperando)
+            picos["em_andamento"] = max(picos["em_andamento"], motor.em_andamento)
+            await asyncio.sleep(0.05)
+
+    inicio = time.perf_counter()
+    tarefas = [asyncio.create_task(jogador(i)) for i in range(jogadores)]
+    await observar()
+    # Quem ainda está na fila no fim não tem mais com quem ser pareado
+    _, restantes = await asyncio.wait(tarefas, timeout=prazo_jogada + pensar)
+    for tarefa in restantes:
+        tarefa.cancel()
+    await asyncio.gather(*restantes, return_exceptions=True)
+    duracao = time.perf_counter() - inicio
+    contagens = motor.situacao()["contagens"]
+    desfechos = {chave: contagens.get(chave, 0) for chave in ("concluidas", "wo", "canceladas")}
+    resultado = _resumir(pareamento, resolucao, contagens.get("pareadas", 0), desfechos, duracao)
+    resultado["pico"] = picos
+    resultado["recusas"] = {chave: valor for chave, valor in contagens.items() if chave.startswith("recusa_")}
+    return resultado
+
+
+async def _memoria_pendentes(quantidade):
+    """
+    Bytes por partida pendente (pareada, esperando as jogadas) e por jogador
+    na fila (incluindo a tarefa que espera), medidos com tracemalloc.
+    """
+    from partidas import MotorPartidas
+
+    motor = MotorPartidas(prazo_pareamento=600.0, prazo_jogada=600.0, max_espera=quantidade,
+                          max_partidas=quantidade, faixas_vizinhas=0, ampliar_apos=float("inf"))
+    tracemalloc.start()
+    antes = tracemalloc.take_snapshot()
+    # Pares na mesma faixa: cada par vira uma partida pendente
+    tarefas = [asyncio.create_task(motor.procurar(("p", i), i // 2 * 10)) for i in range(2 * quantidade)]
+    pares = await asyncio.gather(*tarefas)
+    del tarefas
+    await asyncio.sleep(0)  # solta a referência do gather às tarefas
+    gc.collect()  # as tarefas já concluídas dos clientes não entram na conta
+    depois = tracemalloc.take_snapshot()
+    por_partida = sum(s.size_diff for s in depois.compare_to(antes, "filename")) / quantidade
+    # Um jogador por faixa: ninguém é pareado e todos ficam na fila
+    esperas = [asyncio.create_task(motor.procurar(("f", i), (quantidade + i) * 10)) for i in range(quantidade)]
+    await asyncio.sleep(0)
+    gc.collect()
+    fila = tracemalloc.take_snapshot()
+    por_espera = sum(s.size_diff for s in fila.compare_to(depois, "filename")) / quantidade
+    situacao = motor.situacao()
+    tracemalloc.stop()
+    for tarefa in esperas:
+        tarefa.cancel()
+    await asyncio.gather(*esperas, return_exceptions=True)
+    del pares
+    return {
+        "partidas_pendentes": situacao["em_andamento"],
+        "jogadores_na_fila": situacao["esperando"],
+        "bytes_por_partida_pendente": round(por_partida),
+        "bytes_por_jogador_na_fila": round(por_espera),
+    }
+
+
+# =============================
+# Modo ws (gunicorn local)
+# =============================
+def _carga_ws(porta, jogadores, segundos, abandono, pensar, semente):
+    from simple_websocket import Client  # type: ignore
+
+    lock = threading.Lock()
+    pareamento, resolucao = [], []
+    desfechos = {}
+    fim = time.monotonic() + segundos
+
+    def jogador(indice):
+        gerador = random.Random(semente + indice)
+        cliente = Client.connect(f"ws://127.0.0.1:{porta}/ws/partida", headers={"X-Forwarded-Proto": "https"})
+        try:
+            while time.monotonic() < fim:
+                t0 = time.perf_counter()
+                cliente.send(json.dumps({"tipo": "procurar"}))
+                # No fim da carga, quem ainda está na fila desiste (fecha a conexão)
+                mensagem = cliente.receive(timeout=max(0.0, fim - time.monotonic()) + 0.5)
+                if mensagem is None:
+                    break
+                resposta = json.loads(mensagem)
+                if resposta["tipo"] != "pareado":
+                    time.sleep(0.05)
+                    continue
+                with lock:
+                    pareamento.append(time.perf_counter() - t0)
+                if gerador.random() < abandono:
+                    time.sleep(resposta["prazo"])
+                    continue
+                time.sleep(gerador.uniform(0, pensar))
+                t0 = time.perf_counter()
+                cliente.send(json.dumps({"tipo": "jogar", "jogada": gerador.randrange(3)}))
+                resposta = json.loads(cliente.receive(timeout=60))
+                with lock:
+                    if resposta["tipo"] == "resultado":
+                        resolucao.append(time.perf_counter() - t0)
+                        chave = "wo" if resposta["wo"] else resposta["resultado"]
+                    else:
+                        chave = resposta.get("motivo", "erro")
+                    desfechos[chave] = desfechos.get(chave, 0) + 1
+        finally:
+            cliente.close()
+
+    threads = [threading.Thread(target=jogador, args=(i,)) for i in range(jogadores)]
+    inicio = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    duracao = time.perf_counter() - inicio
+    # Cada partida tem dois lados: cada pareamento foi contado duas vezes
+    return _resumir(pareamento, resolucao, len(pareamento) // 2, desfechos, duracao)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Carga das partidas entre jogadores.")
+    parser.add_argument('--modo', choices=("motor", "ws"), default="motor")
+    parser.add_argument('--jogadores', type=int, default=5000, help="jogadores simulados ao mesmo tempo")
+    parser.add_argument('--segundos', type=float, default=10.0)
+    parser.add_argument('--abandono', type=float, default=0.05, help="fração das partidas abandonadas")
+    parser.add_argument('--pensar', type=float, default=0.2, help="segundos máximos até enviar a jogada")
+    parser.add_argument('--prazo-jogada', type=float, default=1.0, help="segundos para jogar após o pareamento")
+    parser.add_argument('--pendentes', type=int, default=10000, help="partidas pendentes na medição de memória")
+    parser.add_argument('--threads', type=int, default=None, help="threads do gunicorn no modo ws (padrão: jogadores + 2)")
+    parser.add_argument('--semente', type=int, default=0)
+    parser.add_argument('--saida', help="arquivo JSON de resultado")
+    args = parser.parse_args()
+
+    if args.modo == "motor":
+        resultados = {
+            "carga": asyncio.run(_carga_motor(args.jogadores, args.segundos, args.abandono, args.pensar,
+                                              args.prazo_jogada, args.semente)),
+            "memoria": asyncio.run(_memoria_pendentes(args.pendentes)),
+        }
+    else:
+        # Um worker: o pareamento é por worker, jogadores em workers diferentes não se encontram
+        os.environ["JOKENPO_PRAZO_JOGADA"] = str(args.prazo_jogada)
+        with gunicorn_local(1, args.threads or args.jogadores + 2) as porta:
+            resultados = {"carga": _carga_ws(porta, args.jogadores, args.segundos, args.abandono,
+                                             args.pensar, args.semente)}
+
+    configuracao = {key: getattr(args, key) for key in ("modo", "jogadores", "segundos", "abandono", "pensar", "prazo_jogada")}
+    salvar({"tipo": "partidas", "ambiente": metadados(), "configuracao": configuracao,
+            "resultados": resultados}, args.saida)
+
+
+if __name__ == "__main__":
+    main()
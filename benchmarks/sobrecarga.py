@@ -0,0 +1,105 @@
+"""
+Sobrecarga contra um gunicorn local, com e sem o controle de admissão: muitas
+conexões disparam POST /jogar enquanto uma sonda mede a latência de /ping.
+
+Exemplo:
+    python -m benchmarks.sobrecarga --concorrencia 32 --segundos 10 --saida sobrecarga.json
+"""
+import argparse
+import collections
+import http.client
+import os
+import threading
+import time
+
+from benchmarks.carga import CABECALHOS, _corpo, gunicorn_local
+from benchmarks.comum import metadados, percentis, salvar
+
+
+def _ms(latencias):
+    return {chave: round(valor * 1000, 3) if valor is not None else None
+            for chave, valor in percentis(latencias).items()}
+
+
+def rajada(porta, concorrencia, segundos, timeout):
+    """
+    Dispara /jogar com `concorrencia` conexões por `segundos` e mede /ping a
+    cada 50 ms. Como o scripts.js, cada conexão respeita o Retry-After de um 503.
+    """
+    fim = time.monotonic() + segundos
+    lock = threading.Lock()
+    por_status = collections.defaultdict(list)  # status -> latências de /jogar
+    ping = []
+
+    def jogar():
+        conexao = http.client.HTTPConnection("127.0.0.1", porta, timeout=timeout)
+        i = 0
+        while time.monotonic() < fim:
+            t0 = time.perf_counter()
+            try:
+                conexao.request("POST", "/jogar", body=_corpo(i), headers=CABECALHOS)
+                resposta = conexao.getresponse()
+                resposta.read()
+                status = resposta.status
+                retry_after = resposta.getheader("Retry-After")
+                if resposta.will_close:
+                    conexao.close()
+            except OSError:
+                status, retry_after = "falha", None
+                conexao.close()
+            with lock:
+                por_status[status].append(time.perf_counter() - t0)
+            i += 1
+            if status == 503 and retry_after:
+                time.sleep(min(float(retry_after), max(0.0, fim - time.monotonic())))
+
+    def sondar():
+        while time.monotonic() < fim:
+            conexao = http.client.HTTPConnection("127.0.0.1", porta, timeout=timeout)
+            t0 = time.perf_counter()
+            try:
+                conexao.request("GET", "/ping", headers=CABECALHOS)
+                conexao.getresponse().read()
+                ping.append(time.perf_counter() - t0)
+            except OSError:
+                ping.append(timeout)
+            finally:
+                conexao.close()
+            time.sleep(0.05)
+
+    threads = [threading.Thread(target=jogar) for _ in range(concorrencia)] + [threading.Thread(target=sondar)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return {
+        "jogar": {str(status): {"respostas": len(latencias), **_ms(latencias)}
+                  for status, latencias in sorted(por_status.items(), key=lambda item: str(item[0]))},
+        "ping": {"respostas": len(ping), **_ms(ping)},
+        "unidade_latencia": "ms",
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sobrecarga com e sem controle de admissão.")
+    parser.add_argument('--concorrencia', type=int, default=32, help="conexões disparando /jogar")
+    parser.add_argument('--segundos', type=float, default=10.0, help="duração de cada rodada")
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--threads', type=int, default=4)
+    parser.add_argument('--timeout', type=float, default=60.0, help="timeout do cliente, em segundos")
+    parser.add_argument('--saida', help="arquivo JSON de resultado")
+    args = parser.parse_args()
+
+    resultados = {}
+    for nome, valor in (("com_admissao", "true"), ("sem_admissao", "false")):
+        os.environ["JOKENPO_ADMISSAO"] = valor
+        with gunicorn_local(args.workers, args.threads) as porta:
+            resultados[nome] = rajada(porta, args.concorrencia, args.segundos, args.timeout)
+
+    configuracao = {key: getattr(args, key) for key in ("concorrencia", "segundos", "workers", "threads")}
+    salvar({"tipo": "sobrecarga", "ambiente": metadados(), "configuracao": configuracao,
+            "resultados": resultados}, args.saida)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,28 @@
+import os
+import shutil
+
+# Configuração lida automaticamente pelo gunicorn a partir do diretório de trabalho.
+# Workers/threads continuam definidos na linha de comando ou em GUNICORN_CMD_ARGS.
+
+# Métricas do Prometheus agregadas entre workers (ver metricas.py)
+PROMETHEUS_DIR = os.environ.setdefault('PROMETHEUS_MULTIPROC_DIR', '/tmp/jokenpo_prometheus')
+
+
+def on_starting(server):
+    """Limpa as métricas de execuções anteriores antes de criar os workers."""
+    shutil.rmtree(PROMETHEUS_DIR, ignore_errors=True)
+    os.makedirs(PROMETHEUS_DIR, exist_ok=True)
+
+
+def when_ready(server):
+    """Avisa quando a fila de partidas entre jogadores fica dividida entre workers."""
+    if server.cfg.workers > 1:
+        server.log.warning(
+            "%d workers: o pareamento de /ws/partida é por worker, e jogadores em workers "
+            "diferentes não se encontram (use --workers=1 com mais --threads)", server.cfg.workers)
+
+
+def child_exit(server, worker):
+    """Descarta os gauges 'live' do worker que terminou."""
+    from prometheus_client import multiprocess  # type: ignore
+    multiprocess.mark_process_dead(worker.pid)
@@ -0,0 +1,360 @@
+import atexit
+import logging
+import os
+import sqlite3
+import threading
+import time
+import weakref
+
+from armazem_ttl import ArmazemTTL
+from nucleo import VITORIA_JOGADOR
+
+# =============================
+# Histórico de rodadas (write-behind)
+# =============================
+# As rodadas entram em uma lista em memória e uma thread em segundo plano as
+# grava no SQLite em lotes, cada lote em uma única transação, quando a lista
+# atinge `tamanho_lote` ou a cada `intervalo` segundos. Quem registra nunca
+# espera pelo disco.
+#
+# As contagens por jogador ficam na tabela `jogadores`, incrementadas uma vez
+# por jogador a cada lote; a linha TOTAL guarda as contagens de todos. As
+# estatísticas combinam a linha gravada (lida por chave e mantida em cache por
+# `validade` segundos) com as rodadas deste processo ainda não gravadas.
+# Contagens na ordem dos códigos de resultado: [empates, vitórias, derrotas].
+#
+# As linhas também guardam a sequência atual e a maior sequência de vitórias,
+# e `jogadores_dia` repete as contagens por dia (UTC). Cada transação marca as
+# linhas que alterou com uma `versao` crescente, para que o ranking leia
+# apenas o que mudou desde a última leitura.
+
+logger = logging.getLogger(__name__)
+
+TOTAL = "*"  # os identificadores de jogador são hexadecimais
+DIAS_RETIDOS = 7  # dias mantidos em jogadores_dia
+
+# Históricos abertos no processo: um único handler do atexit grava os
+# pendentes de cada um, sem manter vivos os que já foram descartados
+_abertos = weakref.WeakSet()
+
+
+def _fechar_abertos():
+    for historico in list(_abertos):
+        historico.fechar()
+
+
+atexit.register(_fechar_abertos)
+
+COLUNAS_SEQUENCIA = (
+    ("sequencia", "INTEGER NOT NULL DEFAULT 0"),
+    ("maior_sequencia", "INTEGER NOT NULL DEFAULT 0"),
+    ("versao", "INTEGER NOT NULL DEFAULT 0"),
+)
+
+# Incrementa as contagens e compõe as sequências de vitórias do lote com as
+# da linha gravada (no UPDATE, as colunas à direita têm os valores antigos)
+ATUALIZACAO_CONTAGENS = (
+    "empates = empates + excluded.empates, vitorias = vitorias + excluded.vitorias, "
+    "derrotas = derrotas + excluded.derrotas, "
+    "maior_sequencia = MAX(maior_sequencia, sequencia + :prefixo, excluded.maior_sequencia), "
+    "sequencia = CASE WHEN :completo THEN sequencia + excluded.sequencia ELSE excluded.sequencia END, "
+    "versao = excluded.versao, atualizado = excluded.atualizado"
+)
+
+
+def dia_utc(instante):
+    """Data (AAAA-MM-DD, UTC) de um instante em segundos desde a época."""
+    return time.strftime("%Y-%m-%d", time.gmtime(instante))
+
+
+def _resumir_lote(lote):
+    """
+    Agrupa as rodadas do lote por jogador e por (dia, jogador). Cada resumo é
+    [empates, vitórias, derrotas, vitórias iniciais, maior sequência,
+    sequência final, só vitórias].
+    """
+    por_jogador, por_dia = {}, {}
+    for jogador, instante, _, _, resultado in lote:
+        for resumo in (por_jogador.setdefault(jogador, [0, 0, 0, 0, 0, 0, 1]),
+                       por_dia.setdefault((dia_utc(instante), jogador), [0, 0, 0, 0, 0, 0, 1])):
+            resumo[resultado] += 1
+            if resultado == VITORIA_JOGADOR:
+                resumo[5] += 1
+                resumo[4] = max(resumo[4], resumo[5])
+                resumo[3] += resumo[6]
+            else:
+                resumo[5] = resumo[6] = 0
+    return por_jogador, por_dia
+
+
+def _parametros(resumo, versao, agora, **chaves):
+    empates, vitorias, derrotas, prefixo, maior, sufixo, completo = resumo
+    return dict(chaves, empates=empates, vitorias=vitorias, derrotas=derrotas, prefixo=prefixo,
+                maior=maior, sequencia=sufixo, completo=completo, versao=versao, atualizado=agora)
+
+
+class HistoricoRodadas:
+    """
+    Estatísticas e histórico de rodadas por jogador, persistidos no SQLite
+    por uma thread de gravação. Seguro para uso por várias threads; cada
+    processo (worker) tem a sua thread, iniciada na primeira rodada.
+    """
+
+    def __init__(self, caminho, tamanho_lote=256, intervalo=1.0, max_pendentes=100000,
+                 validade=2.0, max_jogadores=10000, relogio=time.monotonic):
+        """
+        Args:
+            caminho: Arquivo SQLite (modo WAL, compartilhável entre workers)
+            tamanho_lote: Rodadas pendentes que antecipam a gravação
+            intervalo: Segundos máximos entre gravações
+            max_pendentes: Acima disso, novas rodadas são descartadas (e contadas)
+            validade: Segundos em que uma linha lida de `jogadores` é reaproveitada
+            max_jogadores: Linhas de `jogadores` mantidas em cache
+        """
+        self.caminho = caminho
+        self.tamanho_lote = tamanho_lote
+        self.intervalo = intervalo
+        self.max_pendentes = max_pendentes
+        self.descartadas = 0
+        self.rodadas_gravadas = 0
+        self.lotes_gravados = 0
+        self._lock = threading.Lock()
+        self._lock_gravacao = threading.Lock()
+        self._local = threading.local()
+        self._pendentes = []  # (jogador, instante, jogada, computador, resultado)
+        self._deltas = {}  # jogador -> contagens registradas desde a última gravação
+        self._em_gravacao = {}  # jogador -> contagens do lote sendo gravado
+        self._gravadas = ArmazemTTL(max_jogadores, validade, relogio=relogio)
+        self._geracao = 0
+        self._evento = threading.Event()
+        self._thread = None
+        self._pid = None
+        self._parar = False
+        self._dia_limpeza = None
+
+        conexao = sqlite3.connect(caminho, timeout=5)
+        try:
+            conexao.execute("PRAGMA journal_mode=WAL")
+            conexao.executescript(
+                "CREATE TABLE IF NOT EXISTS rodadas ("
+                "id INTEGER PRIMARY KEY, jogador TEXT NOT NULL, instante REAL NOT NULL, "
+                "jogada INTEGER NOT NULL, computador INTEGER NOT NULL, resultado INTEGER NOT NULL);"
+                "CREATE INDEX IF NOT EXISTS rodadas_jogador ON rodadas (jogador, id);"
+                "CREATE TABLE IF NOT EXISTS jogadores ("
+                "jogador TEXT PRIMARY KEY, empates INTEGER NOT NULL, vitorias INTEGER NOT NULL, "
+                "derrotas INTEGER NOT NULL, atualizado REAL NOT NULL, "
+                + ", ".join(f"{coluna} {definicao}" for coluna, definicao in COLUNAS_SEQUENCIA)
+                + ") WITHOUT ROWID;"
+                "CREATE TABLE IF NOT EXISTS jogadores_dia ("
+                "dia TEXT NOT NULL, jogador TEXT NOT NULL, empates INTEGER NOT NULL, "
+                "vitorias INTEGER NOT NULL, derrotas INTEGER NOT NULL, sequencia INTEGER NOT NULL, "
+                "maior_sequencia INTEGER NOT NULL, versao INTEGER NOT NULL, atualizado REAL NOT NULL, "
+                "PRIMARY KEY (dia, jogador)) WITHOUT ROWID;"
+                "CREATE INDEX IF NOT EXISTS jogadores_dia_versao ON jogadores_dia (dia, versao);"
+            )
+            # Arquivos criados antes das colunas de sequência e versão
+            existentes = {linha[1] for linha in conexao.execute("PRAGMA table_info(jogadores)")}
+            for coluna, definicao in COLUNAS_SEQUENCIA:
+                if coluna not in existentes:
+                    conexao.execute(f"ALTER TABLE jogadores ADD COLUMN {coluna} {definicao}")
+            conexao.execute("CREATE INDEX IF NOT EXISTS jogadores_versao ON jogadores (versao)")
+            conexao.commit()
+        finally:
+            conexao.close()
+        _abertos.add(self)
+
+    def _conexao(self):
+        conexao = getattr(self._local, "conexao", None)
+        if conexao is None or self._local.pid != os.getpid():
+            conexao = sqlite3.connect(self.caminho, timeout=5, isolation_level=None)
+            conexao.execute("PRAGMA synchronous=NORMAL")
+            self._local.conexao, self._local.pid = conexao, os.getpid()
+        return conexao
+
+    def _iniciar(self):
+        # Sob self._lock. Após um fork, o processo filho precisa da própria thread.
+        if self._pid != os.getpid():
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._executar, name="historico-rodadas", daemon=True)
+            self._thread.start()
+
+    # =============================
+    # Registro (caminho da requisição)
+    # =============================
+    def registrar(self, jogador, rodadas):
+        """
+        Acrescenta rodadas do jogador ao buffer, sem acessar o disco.
+
+        Args:
+            jogador: Identificador do jogador
+            rodadas: Lista de (jogada, computador, código do resultado)
+
+        Returns:
+            bool: False se o buffer estava cheio e as rodadas foram descartadas
+        """
+        agora = time.time()
+        with self._lock:
+            if self._parar:
+                return False
+            if len(self._pendentes) + len(rodadas) > self.max_pendentes:
+                self.descartadas += len(rodadas)
+                return False
+            self._iniciar()
+            contagens = self._deltas.setdefault(jogador, [0, 0, 0])
+            totais = self._deltas.setdefault(TOTAL, [0, 0, 0])
+            for jogada, computador, resultado in rodadas:
+                self._pendentes.append((jogador, agora, jogada, computador, resultado))
+                contagens[resultado] += 1
+                totais[resultado] += 1
+            cheio = len(self._pendentes) >= self.tamanho_lote
+        if cheio:
+            self._evento.set()
+        return True
+
+    # =============================
+    # Consulta
+    # =============================
+    def estatisticas(self, jogador=TOTAL):
+        """
+        Contagens do jogador (ou de todos, com TOTAL): a linha gravada mais as
+        rodadas deste processo que ainda não chegaram ao disco.
+        """
+        with self._lock:
+            gravadas = self._gravadas.obter(jogador)
+            geracao = self._geracao
+        if gravadas is None:
+            linha = self._conexao().execute(
+                "SELECT empates, vitorias, derrotas FROM jogadores WHERE jogador = ?", (jogador,)
+            ).fetchone()
+            gravadas = tuple(linha) if linha else (0, 0, 0)
+            with self._lock:
+                # Um lote gravado durante a leitura invalidaria o valor lido
+                if geracao == self._geracao:
+                    self._gravadas.definir(jogador, gravadas)
+        with self._lock:
+            contagens = list(gravadas)
+            for deltas in (self._em_gravacao.get(jogador), self._deltas.get(jogador)):
+                if deltas:
+                    contagens = [a + b for a, b in zip(contagens, deltas)]
+        empates, vitorias, derrotas = contagens
+        total = empates + vitorias + derrotas
+        return {
+            'vitorias': vitorias,
+            'derrotas': derrotas,
+            'empates': empates,
+            'total': total,
+            'taxa_vitorias': round(vitorias / total, 4) if total else 0.0,
+        }
+
+    def ultimas_rodadas(self, jogador, limite=10):
+        """Rodadas mais recentes do jogador já gravadas, da mais nova para a mais antiga (usa o índice)."""
+        return self._conexao().execute(
+            "SELECT instante, jogada, computador, resultado FROM rodadas "
+            "WHERE jogador = ? ORDER BY id DESC LIMIT ?", (jogador, limite)
+        ).fetchall()
+
+    def pendentes(self):
+        """Rodadas no buffer aguardando gravação."""
+        with self._lock:
+            return len(self._pendentes)
+
+    # =============================
+    # Gravação (thread em segundo plano)
+    # =============================
+    def _executar(self):
+        while not self._parar:
+            self._evento.wait(self.intervalo)
+            self._evento.clear()
+            try:
+                self.descarregar()
+            except Exception:
+                logger.exception("Falha ao gravar o histórico de rodadas em %s", self.caminho)
+
+    def descarregar(self):
+        """Grava todas as rodadas pendentes em uma transação. Retorna quantas foram gravadas."""
+        with self._lock_gravacao:
+            with self._lock:
+                if not self._pendentes:
+                    return 0
+                lote, self._pendentes = self._pendentes, []
+                deltas, self._deltas = self._deltas, {}
+                self._em_gravacao = deltas
+            agora = time.time()
+            por_jogador, por_dia = _resumir_lote(lote)
+            por_jogador[TOTAL] = deltas[TOTAL] + [0, 0, 0, 0]
+            conexao = self._conexao()
+            try:
+                conexao.execute("BEGIN IMMEDIATE")
+                try:
+                    # Com a escrita serializada pelo SQLite, as versões crescem na ordem dos commits
+                    versao = conexao.execute("SELECT COALESCE(MAX(versao), 0) + 1 FROM jogadores").fetchone()[0]
+                    conexao.executemany(
+                        "INSERT INTO rodadas (jogador, instante, jogada, computador, resultado) "
+                        "VALUES (?, ?, ?, ?, ?)", lote
+                    )
+                    conexao.executemany(
+                        "INSERT INTO jogadores (jogador, empates, vitorias, derrotas, sequencia, "
+                        "maior_sequencia, versao, atualizado) VALUES (:jogador, :empates, :vitorias, "
+                        ":derrotas, :sequencia, :maior, :versao, :atualizado) "
+                        "ON CONFLICT(jogador) DO UPDATE SET " + ATUALIZACAO_CONTAGENS,
+                        [_parametros(resumo, versao, agora, jogador=jogador)
+                         for jogador, resumo in por_jogador.items()],
+                    )
+                    conexao.executemany(
+                        "INSERT INTO jogadores_dia (dia, jogador, empates, vitorias, derrotas, sequencia, "
+                        "maior_sequencia, versao, atualizado) VALUES (:dia, :jogador, :empates, :vitorias, "
+                        ":derrotas, :sequencia, :maior, :versao, :atualizado) "
+                        "ON CONFLICT(dia, jogador) DO UPDATE SET " + ATUALIZACAO_CONTAGENS,
+                        [_parametros(resumo, versao, agora, dia=dia, jogador=jogador)
+                         for (dia, jogador), resumo in por_dia.items()],
+                    )
+                    hoje = dia_utc(agora)
+                    if hoje != self._dia_limpeza:
+                        conexao.execute("DELETE FROM jogadores_dia WHERE dia < ?",
+                                        (dia_utc(agora - DIAS_RETIDOS * 86400),))
+                        self._dia_limpeza = hoje
+                    conexao.execute("COMMIT")
+                except BaseException:
+                    conexao.execute("ROLLBACK")
+                    raise
+            except BaseException:
+                # Devolve o lote ao início do buffer para a próxima tentativa
+                with self._lock:
+                    self._pendentes[:0] = lote
+                    for jogador, contagens in deltas.items():
+                        atuais = self._deltas.setdefault(jogador, [0, 0, 0])
+                        atuais[:] = [a + b for a, b in zip(atuais, contagens)]
+                    self._em_gravacao = {}
+                raise
+            with self._lock:
+                self._em_gravacao = {}
+                self._geracao += 1
+                for jogador in deltas:
+                    self._gravadas.remover(jogador)
+                self.rodadas_gravadas += len(lote)
+                self.lotes_gravados += 1
+            return len(lote)
+
+    def fechar(self):
+        """Interrompe a thread e grava o que estiver pendente."""
+        _abertos.discard(self)
+        with self._lock:
+            self._parar = True
+            thread = self._thread if self._pid == os.getpid() else None
+        self._evento.set()
+        if thread is not None:
+            thread.join(timeout=5)
+        try:
+            self.descarregar()
+        except Exception:
+            logger.exception("Falha ao gravar o histórico de rodadas em %s", self.caminho)
+
+    def situacao(self):
+        """Contadores de funcionamento do buffer."""
+        with self._lock:
+            return {
+                'pendentes': len(self._pendentes),
+                'descartadas': self.descartadas,
+                'rodadas_gravadas': self.rodadas_gravadas,
+                'lotes_gravados': self.lotes_gravados,
+            }
@@ -0,0 +1,252 @@
+import atexit
+import logging
+import mmap
+import os
+import struct
+import threading
+import time
+import weakref
+
+try:
+    import fcntl
+except ImportError:  # fora do Unix, sem trava entre processos
+    fcntl = None
+
+from log_rodadas import bytes_jogador
+
+logger = logging.getLogger(__name__)
+
+# =============================
+# Instantâneo dos modelos
+# =============================
+# Com o backend em memória, os modelos dos jogadores se perdem a cada deploy
+# ou quando a máquina para por falta de tráfego. Periodicamente (e no
+# encerramento), uma thread de cada worker grava os modelos vigentes em um
+# arquivo binário, que os workers mapeiam na memória (somente leitura, com as
+# páginas compartilhadas pelo sistema). Quando o modelo de um jogador não
+# está no backend, ele é procurado no arquivo por busca binária.
+#
+# Formato (little-endian):
+#   cabeçalho   assinatura, versão, tamanho do registro, entradas, criado em,
+#               tamanho do bandido a priori
+#   a priori    bandido (bandido.py) com as médias de todas as sessões
+#   índice      um registro por jogador, em ordem crescente de identificador:
+#               identificador (16 bytes), expira em (segundos desde a época),
+#               posição, tamanho do modelo e tamanho do bandido
+#   dados       modelos e bandidos serializados, na posição do índice
+# Cada gravação junta os modelos do worker às entradas ainda vigentes do
+# arquivo (a mais recente vence), escreve em um arquivo temporário e o
+# substitui com os.replace: leitores nunca veem um arquivo pela metade.
+
+ASSINATURA = b"JKPI"
+VERSAO_FORMATO = 1
+CABECALHO = struct.Struct("<4sHHIdI")
+REGISTRO = struct.Struct("<16sdIII")
+
+
+def _ler_arquivo(caminho):
+    """Mapeia o arquivo; retorna (mapa, entradas, a priori, início do índice, início dos dados) ou None."""
+    try:
+        with open(caminho, "rb") as arquivo:
+            mapa = mmap.mmap(arquivo.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):  # ausente ou vazio
+        return None
+    try:
+        assinatura, versao, tamanho, entradas, _, tamanho_priori = CABECALHO.unpack_from(mapa)
+    except struct.error:
+        assinatura = None
+    if assinatura != ASSINATURA or versao != VERSAO_FORMATO or tamanho != REGISTRO.size:
+        mapa.close()
+        return None
+    inicio_indice = CABECALHO.size + tamanho_priori
+    priori = bytes(mapa[CABECALHO.size:inicio_indice]) or None
+    return mapa, entradas, priori, inicio_indice, inicio_indice + entradas * REGISTRO.size
+
+
+# Instantâneos ainda abertos no processo, gravados no encerramento por um
+# único atexit (um registro por instância manteria vivos os descartados, com
+# a função de coleta e o backend que ela referencia)
+_abertos = weakref.WeakSet()
+
+
+def _fechar_abertos():
+    for instantaneo in list(_abertos):
+        instantaneo.fechar()
+
+
+atexit.register(_fechar_abertos)
+
+
+class InstantaneoModelos:
+    """
+    Arquivo de instantâneo dos modelos: leitura por jogador via mmap e
+    gravação periódica em segundo plano.
+    """
+
+    def __init__(self, caminho, coletar, intervalo=60.0, agora=time.time):
+        """
+        Args:
+            caminho: Arquivo do instantâneo
+            coletar: Função sem argumentos que retorna (entradas, a priori):
+                uma lista de (jogador, expira em, bytes do modelo, bytes do
+                bandido ou b"") e os bytes do bandido a priori (ou None)
+            intervalo: Segundos entre gravações
+        """
+        self.caminho = caminho
+        self.intervalo = intervalo
+        self.gravacoes = 0
+        self.ultima_gravacao = None
+        self._coletar = coletar
+        self._agora = agora
+        self._lock = threading.Lock()  # protege o mapa atual
+        self._lock_gravacao = threading.Lock()
+        self._atual = _ler_arquivo(caminho)
+        self._pid = None
+        self._parar = threading.Event()
+        _abertos.add(self)
+
+    @property
+    def priori(self):
+        """Bytes do bandido a priori do instantâneo atual (ou None)."""
+        atual = self._atual
+        return atual[2] if atual is not None else None
+
+    def __len__(self):
+        atual = self._atual
+        return atual[1] if atual is not None else 0
+
+    def observar(self):
+        """Garante a thread de gravação no processo atual (após um fork, o filho precisa da própria)."""
+        if self._pid != os.getpid():
+            with self._lock_gravacao:
+                if self._pid != os.getpid():
+                    self._pid = os.getpid()
+                    threading.Thread(target=self._executar, name="instantaneo-modelos", daemon=True).start()
+
+    def _executar(self):
+        while not self._parar.wait(self.intervalo):
+            try:
+                self.gravar()
+            except Exception:  # tenta de novo no próximo ciclo
+                logger.exception("Falha ao gravar o instantâneo dos modelos em %s", self.caminho)
+
+    def obter(self, jogador):
+        """
+        Retorna (bytes do modelo, bytes do bandido ou None) do jogador no
+        instantâneo, ou None se ele não estiver lá ou tiver expirado.
+        """
+        with self._lock:
+            atual = self._atual
+            if atual is None:
+                return None
+            mapa, entradas, _, inicio_indice, inicio_dados = atual
+            chave = bytes_jogador(jogador)
+            baixo, alto = 0, entradas
+            while baixo < alto:
+                meio = (baixo + alto) // 2
+                posicao = inicio_indice + meio * REGISTRO.size
+                if mapa[posicao:posicao + 16] < chave:
+                    baixo = meio + 1
+                else:
+                    alto = meio
+            if baixo == entradas:
+                return None
+            identificador, expira, posicao, tamanho_modelo, tamanho_bandido = REGISTRO.unpack_from(
+                mapa, inicio_indice + baixo * REGISTRO.size)
+            if identificador != chave or expira <= self._agora():
+                return None
+            posicao += inicio_dados
+            modelo = bytes(mapa[posicao:posicao + tamanho_modelo])
+            bandido = bytes(mapa[posicao + tamanho_modelo:posicao + tamanho_modelo + tamanho_bandido])
+            return modelo, bandido or None
+
+    def _entradas_arquivo(self, atual, agora):
+        """Entradas vigentes do arquivo mapeado: identificador -> (expira, modelo, bandido)."""
+        entradas = {}
+        if atual is None:
+            return entradas
+        mapa, quantidade, _, inicio_indice, inicio_dados = atual
+        for identificador, expira, posicao, tamanho_modelo, tamanho_bandido in REGISTRO.iter_unpack(
+                mapa[inicio_indice:inicio_dados]):
+            if expira > agora:
+                posicao += inicio_dados
+                entradas[identificador] = (
+                    expira,
+                    bytes(mapa[posicao:posicao + tamanho_modelo]),
+                    bytes(mapa[posicao + tamanho_modelo:posicao + tamanho_modelo + tamanho_bandido]),
+                )
+        return entradas
+
+    def gravar(self):
+        """
+        Grava um novo instantâneo com os modelos do worker e as entradas
+        vigentes do arquivo. Entre processos, as gravações são serializadas
+        com flock. Retorna o número de entradas gravadas.
+        """
+        with self._lock_gravacao:
+            coletadas, priori = self._coletar()
+            trava = open(f"{self.caminho}.lock", "a+b")
+            try:
+                if fcntl is not None:
+                    fcntl.flock(trava, fcntl.LOCK_EX)
+                agora = self._agora()
+                # Relê o arquivo: outro worker pode tê-lo substituído
+                atual = _ler_arquivo(self.caminho)
+                try:
+                    entradas = self._entradas_arquivo(atual, agora)
+                    if priori is None and atual is not None:
+                        priori = atual[2]
+                finally:
+                    if atual is not None:
+                        atual[0].close()
+                for jogador, expira, modelo, bandido in coletadas:
+                    identificador = bytes_jogador(jogador)
+                    anterior = entradas.get(identificador)
+                    if expira > agora and (anterior is None or expira >= anterior[0]):
+                        entradas[identificador] = (expira, modelo, bandido)
+                self._escrever(sorted(entradas.items()), priori or b"", agora)
+            finally:
+                trava.close()
+            novo = _ler_arquivo(self.caminho)
+            with self._lock:
+                anterior, self._atual = self._atual, novo
+            if anterior is not None:
+                anterior[0].close()
+            self.gravacoes += 1
+            self.ultima_gravacao = agora
+            return len(entradas)
+
+    def _escrever(self, entradas, priori, agora):
+        temporario = f"{self.caminho}.{os.getpid()}.tmp"
+        indice, dados, posicao = bytearray(), [], 0
+        for identificador, (expira, modelo, bandido) in entradas:
+            indice += REGISTRO.pack(identificador, expira, posicao, len(modelo), len(bandido))
+            dados.append(modelo)
+            dados.append(bandido)
+            posicao += len(modelo) + len(bandido)
+        with open(temporario, "wb") as arquivo:
+            arquivo.write(CABECALHO.pack(ASSINATURA, VERSAO_FORMATO, REGISTRO.size, len(entradas), agora, len(priori)))
+            arquivo.write(priori)
+            arquivo.write(indice)
+            arquivo.writelines(dados)
+            arquivo.flush()
+            os.fsync(arquivo.fileno())
+        os.replace(temporario, self.caminho)
+
+    def situacao(self):
+        """Entradas do instantâneo mapeado e gravações deste worker."""
+        return {
+            'entradas': len(self),
+            'gravacoes': self.gravacoes,
+            'ultima_gravacao': self.ultima_gravacao,
+        }
+
+    def fechar(self):
+        """Para a thread e grava um último instantâneo (no encerramento do worker)."""
+        _abertos.discard(self)
+        self._parar.set()
+        if self._pid == os.getpid():
+            try:
+                self.gravar()
+            except Exception:
+                logger.exception("Falha ao gravar o instantâneo dos modelos em %s", self.caminho)
@@ -0,0 +1,335 @@
+"""
+Log binário de rodadas: um registro de largura fixa por rodada, gravado em
+blocos, e um leitor que mapeia o arquivo na memória (mmap) como um array
+estruturado do NumPy para calcular agregados sem criar objetos por rodada.
+
+Exemplo:
+    python log_rodadas.py /tmp/jokenpo_rodadas.bin --desde 2026-10-01
+"""
+import argparse
+import atexit
+import hashlib
+import json
+import logging
+import mmap
+import os
+import struct
+import threading
+import time
+import weakref
+from datetime import datetime, timezone
+
+from nucleo import ITENS, RAMOS_ESTRATEGIA, RESULTADOS
+
+logger = logging.getLogger(__name__)
+
+# =============================
+# Formato
+# =============================
+# Cabeçalho: assinatura, versão do formato e tamanho do registro. Cada
+# registro (little-endian, sem alinhamento):
+#   instante    float64   segundos desde a época (UTC)
+#   jogador     16 bytes  identificador da sessão (token hexadecimal decodificado)
+#   jogada      uint8     jogada do jogador (índice em ITENS)
+#   computador  uint8     jogada do computador
+#   resultado   uint8     código do resultado (índice em RESULTADOS)
+#   estrategia  uint8     ramo da estratégia (índice em RAMOS_ESTRATEGIA; 255 se desconhecido)
+ASSINATURA = b"JKPR"
+VERSAO_FORMATO = 1
+REGISTRO = struct.Struct("<d16s4B")
+CABECALHO = struct.Struct("<4sHH")
+ESTRATEGIA_DESCONHECIDA = 255
+CODIGOS_ESTRATEGIA = {nome: codigo for codigo, nome in enumerate(RAMOS_ESTRATEGIA)}
+
+_tipo_registro = None
+
+
+def _numpy():
+    """
+    Retorna (numpy, dtype do registro). Só o leitor precisa do NumPy: importá-lo
+    aqui evita carregá-lo em cada worker, que apenas grava.
+    """
+    global _tipo_registro
+    try:
+        import numpy as np
+    except ImportError:
+        raise RuntimeError("A leitura do log binário requer NumPy (pip install numpy)") from None
+    if _tipo_registro is None:
+        _tipo_registro = np.dtype([
+            ("instante", "<f8"), ("jogador", "S16"), ("jogada", "u1"),
+            ("computador", "u1"), ("resultado", "u1"), ("estrategia", "u1"),
+        ])
+        assert _tipo_registro.itemsize == REGISTRO.size
+    return np, _tipo_registro
+
+
+def bytes_jogador(jogador):
+    """Os 16 bytes do identificador da sessão (32 dígitos hexadecimais); outros formatos são resumidos."""
+    try:
+        dados = bytes.fromhex(jogador)
+    except ValueError:
+        dados = b""
+    return dados if len(dados) == 16 else hashlib.blake2s(jogador.encode(), digest_size=16).digest()
+
+
+def _criar_arquivo(caminho):
+    """Cria o arquivo com o cabeçalho de forma atômica: só um processo o cria, e nunca pela metade."""
+    temporario = f"{caminho}.{os.getpid()}.tmp"
+    with open(temporario, "wb") as arquivo:
+        arquivo.write(CABECALHO.pack(ASSINATURA, VERSAO_FORMATO, REGISTRO.size))
+    try:
+        os.link(temporario, caminho)
+    except FileExistsError:
+        pass
+    finally:
+        os.remove(temporario)
+
+
+# =============================
+# Gravação
+# =============================
+# Logs ainda abertos no processo, gravados no encerramento por um único
+# atexit (um registro por instância manteria vivos os logs descartados)
+_abertos = weakref.WeakSet()
+
+
+def _fechar_abertos():
+    for log in list(_abertos):
+        log.fechar()
+
+
+atexit.register(_fechar_abertos)
+
+
+class LogRodadas:
+    """
+    Acrescenta rodadas ao log binário. Os registros se acumulam em um buffer
+    e são gravados com um único write (O_APPEND) quando o buffer enche, quando
+    o registro mais antigo passa de `intervalo` segundos (mesmo sem novas
+    rodadas: uma thread em segundo plano cuida do prazo) ou no encerramento. Como
+    cada write contém registros inteiros, vários workers podem gravar no mesmo
+    arquivo.
+    """
+
+    def __init__(self, caminho, tamanho_buffer=65536, intervalo=5.0, relogio=time.monotonic):
+        """
+        Args:
+            caminho: Arquivo do log (criado com o cabeçalho se não existir)
+            tamanho_buffer: Bytes acumulados antes de uma gravação
+            intervalo: Segundos máximos que um registro espera no buffer
+        """
+        self.caminho = caminho
+        self.tamanho_buffer = tamanho_buffer
+        self.intervalo = intervalo
+        self._relogio = relogio
+        self._lock = threading.Lock()
+        self._buffer = bytearray()
+        self._inicio_buffer = None
+        self._descritor = None
+        self._pid = None
+        self._pid_thread = None
+        self._pendente = threading.Event()  # há registros no buffer esperando o prazo
+        self._parar = threading.Event()
+        self._thread = None
+        if not os.path.exists(caminho):
+            _criar_arquivo(caminho)
+        _abertos.add(self)
+
+    def registrar(self, jogador, rodadas, instante=None):
+        """
+        Acrescenta rodadas do jogador ao buffer.
+
+        Args:
+            jogador: Identificador da sessão
+            rodadas: Lista de (jogada, computador, código do resultado, ramo da estratégia)
+            instante: Segundos desde a época (padrão: agora)
+        """
+        instante = time.time() if instante is None else instante
+        jogador = bytes_jogador(jogador)
+        with self._lock:
+            for jogada, computador, resultado, estrategia in rodadas:
+                self._buffer += REGISTRO.pack(
+                    instante, jogador, jogada, computador, resultado,
+                    CODIGOS_ESTRATEGIA.get(estrategia, ESTRATEGIA_DESCONHECIDA),
+                )
+            agora = self._relogio()
+            if self._inicio_buffer is None:
+                self._inicio_buffer = agora
+                self._observar()
+                self._pendente.set()
+            if len(self._buffer) >= self.tamanho_buffer or agora - self._inicio_buffer >= self.intervalo:
+                self._gravar()
+
+    def _observar(self):
+        # Sob self._lock. A thread do prazo é do processo: após um fork, o filho precisa da própria.
+        if self._pid_thread != os.getpid():
+            self._pid_thread = os.getpid()
+            self._pendente = threading.Event()
+            self._thread = threading.Thread(
+                target=self._executar, args=(self._pendente,), name="log-rodadas", daemon=True)
+            self._thread.start()
+
+    def _executar(self, pendente):
+        """Grava o buffer quando o registro mais antigo completa `intervalo` segundos."""
+        while not self._parar.is_set():
+            pendente.wait()
+            with self._lock:
+                if self._parar.is_set():
+                    return
+                if self._inicio_buffer is None:
+                    pendente.clear()
+                    continue
+                espera = self._inicio_buffer + self.intervalo - self._relogio()
+                if espera <= 0:
+                    try:
+                        self._gravar()
+                    except OSError:  # tenta de novo no próximo prazo
+                        logger.exception("Falha ao gravar o log de rodadas em %s", self.caminho)
+                        self._inicio_buffer = self._relogio()
+                    continue
+            self._parar.wait(espera)
+
+    def descarregar(self):
+        """Grava o que estiver no buffer."""
+        with self._lock:
+            self._gravar()
+
+    def fechar(self):
+        """Grava o que estiver no buffer, encerra a thread do prazo e fecha o arquivo."""
+        _abertos.discard(self)
+        with self._lock:
+            self._parar.set()
+            self._pendente.set()
+            thread = self._thread if self._pid_thread == os.getpid() else None
+            try:
+                self._gravar()
+            except OSError:
+                logger.exception("Falha ao gravar o log de rodadas em %s", self.caminho)
+            if self._pid == os.getpid():
+                os.close(self._descritor)
+            self._descritor = self._pid = None
+        if thread is not None:
+            thread.join(timeout=5)
+
+    def _gravar(self):
+        # Sob self._lock. Após um fork, o processo filho abre o próprio descritor.
+        if not self._buffer:
+            return
+        if self._pid != os.getpid():
+            self._descritor = os.open(self.caminho, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            self._pid = os.getpid()
+        dados = memoryview(self._buffer)
+        while dados:
+            dados = dados[os.write(self._descritor, dados):]
+        self._buffer = bytearray()
+        self._inicio_buffer = None
+        self._pendente.clear()
+
+
+# =============================
+# Leitura e agregados
+# =============================
+def ler_rodadas(caminho):
+    """
+    Mapeia o log na memória e retorna (rodadas, mapa): um array estruturado
+    do NumPy apoiado diretamente no arquivo (sem cópia) e o mmap, a ser
+    fechado depois de usar o array. Um registro incompleto no fim é ignorado.
+    """
+    np, tipo_registro = _numpy()
+    with open(caminho, "rb") as arquivo:
+        mapa = mmap.mmap(arquivo.fileno(), 0, access=mmap.ACCESS_READ)
+    assinatura, versao, tamanho = CABECALHO.unpack_from(mapa)
+    if assinatura != ASSINATURA or versao != VERSAO_FORMATO or tamanho != REGISTRO.size:
+        mapa.close()
+        raise ValueError(f"{caminho} não é um log de rodadas na versão {VERSAO_FORMATO}")
+    quantidade = (len(mapa) - CABECALHO.size) // REGISTRO.size
+    return np.frombuffer(mapa, dtype=tipo_registro, count=quantidade, offset=CABECALHO.size), mapa
+
+
+def resumir_rodadas(rodadas, desde=None, ate=None, contar_jogadores=False):
+    """
+    Agregados vetorizados de um array de rodadas: totais por resultado, por
+    jogada do jogador e por ramo da estratégia (com a taxa de vitórias do
+    computador em cada ramo) e período coberto. As contagens saem de um único
+    bincount sobre (ramo, jogada, resultado).
+
+    Args:
+        rodadas: Array retornado por ler_rodadas()
+        desde, ate: Limites opcionais do instante (segundos desde a época)
+        contar_jogadores: Conta também os jogadores distintos (ordena os
+            identificadores: bem mais lento que o restante)
+    """
+    np, _ = _numpy()
+    if desde is not None or ate is not None:
+        instantes = rodadas["instante"]
+        filtro = np.ones(len(rodadas), dtype=bool)
+        if desde is not None:
+            filtro &= instantes >= desde
+        if ate is not None:
+            filtro &= instantes < ate
+        rodadas = rodadas[filtro]
+    total = len(rodadas)
+    # Códigos de ramo desconhecidos (255) caem na última posição
+    ramos = len(RAMOS_ESTRATEGIA) + 1
+    combinado = np.minimum(rodadas["estrategia"], ramos - 1).astype(np.intp)
+    combinado *= len(ITENS)
+    combinado += rodadas["jogada"]
+    combinado *= len(RESULTADOS)
+    combinado += rodadas["resultado"]
+    contagens = np.bincount(combinado, minlength=ramos * len(ITENS) * len(RESULTADOS)).reshape(
+        ramos, len(ITENS), len(RESULTADOS))
+    resultados = contagens.sum(axis=(0, 1))
+    jogadas = contagens.sum(axis=(0, 2))
+    por_ramo = contagens.sum(axis=1)
+    estrategias = {}
+    for codigo, nome in enumerate((*RAMOS_ESTRATEGIA, "desconhecida")):
+        rodadas_ramo = int(por_ramo[codigo].sum())
+        if rodadas_ramo:
+            estrategias[nome] = {
+                "rodadas": rodadas_ramo,
+                "taxa_vitorias_computador": round(int(por_ramo[codigo][2]) / rodadas_ramo, 4),
+            }
+    resumo = {
+        "rodadas": total,
+        "inicio": float(rodadas["instante"].min()) if total else None,
+        "fim": float(rodadas["instante"].max()) if total else None,
+        "resultados": {"empates": int(resultados[0]), "vitorias_jogador": int(resultados[1]),
+                       "vitorias_computador": int(resultados[2])},
+        "jogadas_jogador": {item: int(jogadas[indice]) for indice, item in enumerate(ITENS)},
+        "estrategias": estrategias,
+    }
+    if contar_jogadores:
+        resumo["jogadores"] = int(len(np.unique(rodadas["jogador"])))
+    return resumo
+
+
+def _instante(texto):
+    """Data (AAAA-MM-DD, UTC) ou segundos desde a época."""
+    try:
+        return float(texto)
+    except ValueError:
+        return datetime.strptime(texto, "%Y-%m-%d").replace(tzinfo=timezone.utc).timestamp()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Agregados do log binário de rodadas.")
+    parser.add_argument('arquivo', nargs='?',
+                        default=os.environ.get('JOKENPO_LOG_RODADAS', '/tmp/jokenpo_rodadas.bin'))
+    parser.add_argument('--desde', type=_instante, help="data AAAA-MM-DD (UTC) ou segundos desde a época")
+    parser.add_argument('--ate', type=_instante, help="data AAAA-MM-DD (UTC) ou segundos desde a época")
+    parser.add_argument('--jogadores', action='store_true', help="conta os jogadores distintos (mais lento)")
+    args = parser.parse_args()
+
+    inicio = time.perf_counter()
+    rodadas, mapa = ler_rodadas(args.arquivo)
+    try:
+        resumo = resumir_rodadas(rodadas, args.desde, args.ate, args.jogadores)
+    finally:
+        del rodadas
+        mapa.close()
+    resumo["segundos"] = round(time.perf_counter() - inicio, 4)
+    print(json.dumps(resumo, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
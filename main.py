@@ -1,55 +1,261 @@
+"""
+Jokenpô no terminal. Sem argumentos, é o jogo interativo; com --entrada,
+joga em lote as jogadas lidas de um arquivo (ou "-" para a entrada padrão)
+e grava as rodadas em CSV ou JSONL, com um resumo no fim (na saída de erro).
+
+Exemplos:
+    python main.py
+    python main.py --entrada jogadas.txt --formato jsonl --semente 42 > rodadas.jsonl
+    python -c "print('012' * 1000000)" | python main.py --entrada - --somente-resumo
+"""
+import argparse
+import io
+import json
+import os
 import random
+import re
+import sys
+import time
 from time import sleep
 
-itens = ("pedra", "papel", "tesoura")
-
-def jogada_computador(ultimo):
-    pesos = [1.0, 1.0, 1.0]
-    if ultimo is not None:
-        pesos[ultimo] = 0.3
-    return random.choices([0, 1, 2], weights=pesos, k=1)[0]
-
-ultimo_computador = None
-
-while True:
-    computador = jogada_computador(ultimo_computador)
-    ultimo_computador = computador
-
-    print("\nSUAS OPÇÕES:")
-    print("[0] PEDRA\n[1] PAPEL\n[2] TESOURA")
-
-    try:
-        jogador = int(input("Qual é sua jogada?: "))
-        if jogador not in [0, 1, 2]:
-            raise ValueError
-
-        print("\nJO")
-        sleep(1)
-        print("KEN")
-        sleep(1)
-        print("PÔ!!!\n")
-        sleep(1)
-
-        print("=*=" * 20)
-        print(" "*15, f"O computador jogou {itens[computador]}.", " "*7)
-        print(" "*3,"=*="*8,"&","=*="*8)
-        print(" "*16, f"O jogador jogou {itens[jogador]}.", " "*7)
-        print("=*=" * 20)
-
-        if computador == jogador:
-            print("EMPATE!")
-        elif (computador == 0 and jogador == 2) or \
-             (computador == 1 and jogador == 0) or \
-             (computador == 2 and jogador == 1):
-            print("O COMPUTADOR GANHOU!")
+from bandido import BandidoUCB
+from modelo_jogador import ModeloJogador
+from nucleo import (
+    ITENS, RAMOS_ESTRATEGIA, TABELA_RESULTADOS, VITORIA_COMPUTADOR, VITORIA_JOGADOR, determinar_resultado,
+    escolher_jogada,
+)
+
+TAMANHO_BLOCO = 1 << 16  # caracteres lidos por vez da entrada
+RODADAS_POR_ESCRITA = 4096  # linhas acumuladas antes de cada escrita na saída
+MAX_TOKEN = 16  # um nome de jogada nunca é maior que isso
+SEPARADORES = str.maketrans({",": " ", ";": " "})
+NOMES = {nome: indice for indice, nome in enumerate(ITENS)}
+TRECHOS = re.compile(r"\d+|\D+")  # dígitos e letras colados em um token
+CONTINUACAO_TEXTO = re.compile(r"[^\s\d,;]*")  # letras até o próximo separador ou dígito
+VENCEDORES = ("empate", "jogador", "computador")  # por código de resultado
+
+
+# =============================
+# Jogo interativo
+# =============================
+def jogar_interativo(aleatorio=random, bandido=None):
+    # Mesma IA da versão web: aprende o padrão do jogador ao longo das rodadas
+    modelo = ModeloJogador(100)
+
+    while True:
+        computador, ramo = escolher_jogada(modelo.ultima, modelo, aleatorio, bandido)
+
+        print("\nSUAS OPÇÕES:")
+        print("[0] PEDRA\n[1] PAPEL\n[2] TESOURA")
+
+        try:
+            jogador = int(input("Qual é sua jogada?: "))
+            if jogador not in [0, 1, 2]:
+                raise ValueError
+
+            print("\nJO")
+            sleep(1)
+            print("KEN")
+            sleep(1)
+            print("PÔ!!!\n")
+            sleep(1)
+
+            print("=*=" * 20)
+            print(" "*15, f"O computador jogou {ITENS[computador]}.", " "*7)
+            print(" "*3,"=*="*8,"&","=*="*8)
+            print(" "*16, f"O jogador jogou {ITENS[jogador]}.", " "*7)
+            print("=*=" * 20)
+
+            print(determinar_resultado(jogador, computador))
+            modelo.registrar(jogador, computador)
+            if bandido is not None:
+                bandido.registrar(ramo, TABELA_RESULTADOS[jogador * 3 + computador])
+
+        except ValueError:
+            print("⚠️ Jogada inválida! Digite 0, 1 ou 2.")
+            continue
+
+        repetir = input("\nDeseja jogar novamente? [S/N]: ").strip().upper()
+        if repetir != "S":
+            print("Obrigado por jogar. Até logo!")
+            break
+
+
+# =============================
+# Modo em lote
+# =============================
+def _jogadas_token(token, invalidas):
+    """Jogadas de um token sem separadores: dígito a dígito, um nome ou trechos dos dois colados."""
+    if token.isdecimal():
+        if not token.strip("012"):
+            for caractere in token:
+                yield ord(caractere) - 48
+            return
+        # 0, 1 e 2 valem; cada outro dígito é uma jogada inválida
+        for caractere in token:
+            if caractere in "012":
+                yield ord(caractere) - 48
+            else:
+                invalidas[0] += 1
+        return
+    jogada = NOMES.get(token.lower())
+    if jogada is not None:
+        yield jogada
+    elif not any(caractere.isdecimal() for caractere in token):
+        invalidas[0] += 1
+    else:
+        # Dígitos colados a letras ("2pedra"): cada trecho vale por si
+        for trecho in TRECHOS.findall(token):
+            yield from _jogadas_token(trecho, invalidas)
+
+
+def ler_jogadas(entrada, invalidas, tamanho_bloco=TAMANHO_BLOCO):
+    """
+    Gera as jogadas (0, 1 ou 2) de um arquivo de texto, lido em blocos.
+    Aceita uma por linha ou compactas ("0120", "0,1,2", "0 1 2") e os nomes
+    (pedra, papel, tesoura). Trechos inválidos são ignorados e contados em
+    `invalidas` (uma lista de um elemento): cada dígito fora de 0-2 e cada
+    trecho de letras que não é um nome. Como os dígitos valem um a um, o
+    resultado não depende de onde os blocos são cortados.
+    """
+    resto = ""
+    descartando = False  # no meio de um trecho de letras longo demais para ser um nome (já contado)
+    while True:
+        bloco = entrada.read(tamanho_bloco)
+        if descartando:
+            inicio = CONTINUACAO_TEXTO.match(bloco).end()
+            descartando = bool(bloco) and inicio == len(bloco)
+            texto = bloco[inicio:]
         else:
-            print("O JOGADOR GANHOU!")
+            texto = resto + bloco
+        tokens = texto.translate(SEPARADORES).split()
+        resto = ""
+        # Só um trecho de letras no fim pode continuar no próximo bloco: os dígitos já podem ser jogados
+        if bloco and tokens and not texto[-1].isspace() and texto[-1] not in ",;":
+            ultimo = tokens[-1]
+            if not ultimo.isdecimal():
+                tokens.pop()
+                trechos = TRECHOS.findall(ultimo)
+                final = trechos.pop()
+                if final[0].isdecimal():
+                    trechos.append(final)
+                elif len(final) <= MAX_TOKEN:
+                    resto = final
+                else:
+                    invalidas[0] += 1
+                    descartando = True
+                tokens.extend(trechos)
+        for token in tokens:
+            yield from _jogadas_token(token, invalidas)
+        if not bloco:
+            return
+
+
+def _formatos_linha(formato):
+    """Sufixo pronto de cada (jogador, computador, ramo), para não formatar campo a campo."""
+    sufixos = {}
+    for jogador in range(3):
+        for computador in range(3):
+            vencedor = VENCEDORES[TABELA_RESULTADOS[jogador * 3 + computador]]
+            for ramo in RAMOS_ESTRATEGIA:
+                if formato == "csv":
+                    sufixo = f",{ITENS[jogador]},{ITENS[computador]},{vencedor},{ramo}\n"
+                else:
+                    sufixo = (f',"jogador":"{ITENS[jogador]}","computador":"{ITENS[computador]}",'
+                              f'"resultado":"{vencedor}","estrategia":"{ramo}"}}\n')
+                sufixos[jogador, computador, ramo] = sufixo
+    return sufixos
+
+
+def jogar_lote(entrada, saida, formato="csv", aleatorio=random, bandido=None, somente_resumo=False):
+    """
+    Joga todas as jogadas da entrada contra a IA, sem pausas, e escreve uma
+    linha por rodada na saída. A memória usada não depende do número de
+    rodadas: a entrada é lida em blocos e a saída, escrita a cada
+    RODADAS_POR_ESCRITA linhas.
+
+    Returns:
+        dict: Resumo (rodadas, resultados, ramos da estratégia, inválidas, tempo)
+    """
+    inicio = time.perf_counter()
+    modelo = ModeloJogador(100)
+    sufixos = _formatos_linha(formato)
+    prefixo = "" if formato == "csv" else '{"rodada":'
+    contagens = [0, 0, 0]
+    ramos = dict.fromkeys(RAMOS_ESTRATEGIA, 0)
+    invalidas = [0]
+    linhas = []
+    rodada = 0
+
+    if not somente_resumo and formato == "csv":
+        saida.write("rodada,jogador,computador,resultado,estrategia\n")
+    for jogador in ler_jogadas(entrada, invalidas):
+        computador, ramo = escolher_jogada(modelo.ultima, modelo, aleatorio, bandido)
+        codigo = TABELA_RESULTADOS[jogador * 3 + computador]
+        modelo.registrar(jogador, computador)
+        if bandido is not None:
+            bandido.registrar(ramo, codigo)
+        rodada += 1
+        contagens[codigo] += 1
+        ramos[ramo] += 1
+        if not somente_resumo:
+            linhas.append(f"{prefixo}{rodada}{sufixos[jogador, computador, ramo]}")
+            if len(linhas) >= RODADAS_POR_ESCRITA:
+                saida.write("".join(linhas))
+                linhas.clear()
+    if linhas:
+        saida.write("".join(linhas))
+    saida.flush()
+
+    segundos = time.perf_counter() - inicio
+    return {
+        "rodadas": rodada,
+        "invalidas": invalidas[0],
+        "empates": contagens[0],
+        "vitorias_jogador": contagens[VITORIA_JOGADOR],
+        "vitorias_computador": contagens[VITORIA_COMPUTADOR],
+        "taxa_vitorias_computador": round(contagens[VITORIA_COMPUTADOR] / rodada, 4) if rodada else 0.0,
+        "estrategias": {ramo: quantidade for ramo, quantidade in ramos.items() if quantidade},
+        "segundos": round(segundos, 3),
+        "rodadas_por_segundo": round(rodada / segundos) if segundos else None,
+    }
+
+
+def _abrir_entrada(caminho):
+    if caminho == "-":
+        return io.TextIOWrapper(sys.stdin.buffer, encoding="utf-8", errors="replace")
+    return open(caminho, encoding="utf-8", errors="replace")
+
+
+def _abrir_saida(caminho):
+    if caminho in (None, "-"):
+        return io.TextIOWrapper(os.fdopen(os.dup(sys.stdout.fileno()), "wb", buffering=1 << 20),
+                                encoding="utf-8", newline="\n")
+    return open(caminho, "w", encoding="utf-8", newline="\n", buffering=1 << 20)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Jokenpô no terminal: interativo ou em lote (--entrada).")
+    parser.add_argument('--entrada', help='arquivo com as jogadas do jogador ("-" para a entrada padrão)')
+    parser.add_argument('--saida', help="arquivo das rodadas (padrão: saída padrão)")
+    parser.add_argument('--formato', choices=("csv", "jsonl"), default="csv")
+    parser.add_argument('--semente', '--seed', type=int, help="semente da IA, para resultados reproduzíveis")
+    parser.add_argument('--meta', choices=("fixa", "ucb"), default="fixa",
+                        help="escolha da estratégia da IA: mistura fixa ou bandido UCB")
+    parser.add_argument('--somente-resumo', action='store_true', help="não escreve as rodadas, só o resumo")
+    args = parser.parse_args()
+
+    aleatorio = random.Random(args.semente) if args.semente is not None else random
+    bandido = BandidoUCB() if args.meta == "ucb" else None
+    if args.entrada is None:
+        jogar_interativo(aleatorio, bandido)
+        return
+
+    with _abrir_entrada(args.entrada) as entrada, _abrir_saida(args.saida) as saida:
+        resumo = jogar_lote(entrada, saida, args.formato, aleatorio, bandido, args.somente_resumo)
+    resumo["semente"] = args.semente
+    print(json.dumps(resumo, ensure_ascii=False), file=sys.stderr)
 
-    except ValueError:
-        print("⚠️ Jogada inválida! Digite 0, 1 ou 2.")
-        continue
 
-    repetir = input("\nDeseja jogar novamente? [S/N]: ").strip().upper()
-    if repetir != "S":
-        print("Obrigado por jogar. Até logo!")
-        break
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+import os
+
+from prometheus_client import (  # type: ignore
+    CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge, Histogram, generate_latest, multiprocess,
+)
+
+# =============================
+# Métricas com Prometheus
+# =============================
+# Com gunicorn, defina PROMETHEUS_MULTIPROC_DIR (o gunicorn.conf.py já faz isso)
+# para que /metrics agregue os valores de todos os workers.
+
+FAIXAS_REQUISICAO = (.001, .0025, .005, .01, .025, .05, .1, .25, .5, 1, 2.5)
+FAIXAS_ETAPA = (.00001, .000025, .00005, .0001, .00025, .0005, .001, .0025, .005, .01, .05)
+
+jogadas_counter = Counter('jokenpo_jogadas_total', 'Total de jogadas realizadas')
+vitorias_jogador = Counter('jokenpo_vitorias_jogador', 'Total de vitórias do jogador')
+
+latencia_requisicao = Histogram(
+    'jokenpo_requisicao_segundos', 'Latência das requisições por endpoint',
+    ['endpoint', 'metodo', 'status'], buckets=FAIXAS_REQUISICAO,
+)
+duracao_etapa = Histogram(
+    'jokenpo_etapa_segundos', 'Tempo gasto em cada etapa de uma jogada',
+    ['etapa'], buckets=FAIXAS_ETAPA,
+)
+etapa_validacao = duracao_etapa.labels('validar_jogada')
+etapa_ia = duracao_etapa.labels('calcular_jogada_computador')
+etapa_resultado = duracao_etapa.labels('determinar_resultado')
+
+estrategias_counter = Counter(
+    'jokenpo_estrategia_total', 'Jogadas do computador por ramo da estratégia', ['estrategia'],
+)
+
+itens_estado = Gauge(
+    'jokenpo_estado_itens', 'Itens em cada espaço de chaves do estado em memória',
+    ['espaco'], multiprocess_mode='livesum',
+)
+despejos_estado = Gauge(
+    'jokenpo_estado_despejos', 'Itens despejados por capacidade em cada espaço de chaves',
+    ['espaco'], multiprocess_mode='livesum',
+)
+
+admissao_em_andamento = Gauge(
+    'jokenpo_admissao_em_andamento', 'Requisições comuns em atendimento no controle de admissão',
+    multiprocess_mode='livesum',
+)
+admissao_fila = Gauge(
+    'jokenpo_admissao_fila', 'Requisições esperando vaga no controle de admissão',
+    multiprocess_mode='livesum',
+)
+admissao_recusadas = Counter(
+    'jokenpo_admissao_recusadas_total', 'Requisições recusadas com 503 pelo controle de admissão', ['motivo'],
+)
+conexoes_websocket = Gauge(
+    'jokenpo_websocket_conexoes', 'Conexões WebSocket abertas (cada uma ocupa uma thread do worker)',
+    multiprocess_mode='livesum',
+)
+
+partidas_encerradas = Counter(
+    'jokenpo_partidas_total', 'Partidas entre jogadores encerradas, por desfecho', ['desfecho'],
+)
+partidas_recusadas = Counter(
+    'jokenpo_partidas_recusadas_total', 'Pedidos recusados pelo motor de partidas', ['motivo'],
+)
+
+
+def atualizar_estado(estatisticas):
+    """Atualiza os gauges de ocupação a partir de BackendMemoria.estatisticas()."""
+    for espaco, valores in estatisticas.items():
+        if isinstance(valores, dict) and 'tamanho' in valores:
+            itens_estado.labels(espaco).set(valores['tamanho'])
+            despejos_estado.labels(espaco).set(valores['despejados'])
+
+
+def atualizar_admissao(em_andamento, fila):
+    """Atualiza os gauges de ocupação do controle de admissão (chamado pelo ControleAdmissao)."""
+    admissao_em_andamento.set(em_andamento)
+    admissao_fila.set(fila)
+
+
+def atualizar_conexoes(abertas):
+    """Atualiza o gauge de conexões WebSocket abertas (chamado pelo LimiteConexoes)."""
+    conexoes_websocket.set(abertas)
+
+
+def recusar_admissao(motivo):
+    """Conta uma requisição recusada pelo controle de admissão."""
+    admissao_recusadas.labels(motivo).inc()
+
+
+def encerrar_partida(desfecho):
+    """Conta uma partida entre jogadores encerrada (chamado pelo MotorPartidas)."""
+    partidas_encerradas.labels(desfecho).inc()
+
+
+def recusar_partida(motivo):
+    """Conta um pedido recusado pelo motor de partidas."""
+    partidas_recusadas.labels(motivo).inc()
+
+
+def gerar_metricas():
+    """Retorna (conteúdo, content type) das métricas no formato de exposição do Prometheus."""
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        registro = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registro)
+        return generate_latest(registro), CONTENT_TYPE_LATEST
+    return generate_latest(), CONTENT_TYPE_LATEST
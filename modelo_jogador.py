@@ -0,0 +1,117 @@
+import struct
+import threading
+from array import array
+
+from preditor_ngram import PreditorNGram, TIPO_NGRAM
+
+TIPO_MARKOV = 1  # primeiro byte do formato binário
+
+_CABECALHO_MARKOV = struct.Struct('<BHHH')  # tipo, janela, início, tamanho
+
+# =============================
+# Modelo incremental do jogador
+# =============================
+class ModeloJogador:
+    """
+    Modelo de transições das jogadas de um único jogador.
+
+    Mantém uma matriz 3x3 de contagens (jogada anterior -> próxima jogada)
+    atualizada em O(1) a cada rodada e uma janela circular de tamanho fixo
+    com as jogadas mais recentes. Quando a janela enche, a transição mais
+    antiga é descontada da matriz, de modo que as contagens refletem sempre
+    apenas as últimas `janela` jogadas.
+    """
+
+    __slots__ = ("janela", "transicoes", "_buffer", "_inicio", "_tamanho", "_lock")
+
+    def __init__(self, janela=100):
+        if janela < 2:
+            raise ValueError("A janela do modelo deve ter pelo menos 2 jogadas")
+        self.janela = janela
+        self.transicoes = [0] * 9  # índice = anterior * 3 + proxima
+        self._buffer = bytearray(janela)
+        self._inicio = 0
+        self._tamanho = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return self._tamanho
+
+    @property
+    def ultima(self):
+        """Última jogada registrada ou None se o histórico estiver vazio."""
+        if not self._tamanho:
+            return None
+        return self._buffer[(self._inicio + self._tamanho - 1) % self.janela]
+
+    def registrar(self, jogada, computador=None):
+        """
+        Registra uma nova jogada do jogador.
+
+        Args:
+            jogada: A jogada do jogador (0, 1 ou 2)
+            computador: A jogada do computador na mesma rodada (ignorada por este modelo)
+        """
+        with self._lock:
+            buffer = self._buffer
+            if self._tamanho:
+                anterior = buffer[(self._inicio + self._tamanho - 1) % self.janela]
+                self.transicoes[anterior * 3 + jogada] += 1
+
+            if self._tamanho == self.janela:
+                # Descarta a transição mais antiga antes de sobrescrevê-la
+                mais_antiga = buffer[self._inicio]
+                seguinte = buffer[(self._inicio + 1) % self.janela]
+                self.transicoes[mais_antiga * 3 + seguinte] -= 1
+                buffer[self._inicio] = jogada
+                self._inicio = (self._inicio + 1) % self.janela
+            else:
+                buffer[(self._inicio + self._tamanho) % self.janela] = jogada
+                self._tamanho += 1
+
+    def prever(self, ultima=None):
+        """
+        Retorna a próxima jogada mais provável do jogador ou None se não
+        houver transições observadas a partir da última jogada.
+        """
+        if ultima is None:
+            ultima = self.ultima
+        if ultima not in (0, 1, 2):
+            return None
+        linha = self.transicoes[ultima * 3:ultima * 3 + 3]
+        maior = max(linha)
+        if maior == 0:
+            return None
+        return linha.index(maior)
+
+    def historico(self):
+        """Retorna as jogadas da janela, da mais antiga para a mais recente."""
+        return [self._buffer[(self._inicio + i) % self.janela] for i in range(self._tamanho)]
+
+    def para_bytes(self):
+        """Serializa o modelo em formato binário compacto."""
+        with self._lock:
+            return (_CABECALHO_MARKOV.pack(TIPO_MARKOV, self.janela, self._inicio, self._tamanho)
+                    + array('H', self.transicoes).tobytes() + bytes(self._buffer))
+
+    @classmethod
+    def de_bytes(cls, dados):
+        """Reconstrói um modelo serializado por `para_bytes`."""
+        tipo, janela, inicio, tamanho = _CABECALHO_MARKOV.unpack_from(dados)
+        if tipo != TIPO_MARKOV:
+            raise ValueError(f"Tipo de modelo inesperado: {tipo}")
+        modelo = cls(janela)
+        posicao = _CABECALHO_MARKOV.size
+        modelo.transicoes = list(array('H', dados[posicao:posicao + 18]))
+        modelo._buffer[:] = dados[posicao + 18:posicao + 18 + janela]
+        modelo._inicio = inicio
+        modelo._tamanho = tamanho
+        return modelo
+
+
+def modelo_de_bytes(dados):
+    """Reconstrói um modelo de qualquer tipo a partir do formato binário."""
+    if dados[0] == TIPO_NGRAM:
+        return PreditorNGram.de_bytes(dados)
+    return ModeloJogador.de_bytes(dados)
+
@@ -0,0 +1,120 @@
+"""
+Regras e estratégia do jogo, sem dependências externas. Compartilhado por
+app.py, main.py e simulacao.py; importá-lo não carrega o Flask.
+"""
+import random
+
+# =============================
+# Constantes do jogo
+# =============================
+ITENS = ["pedra", "papel", "tesoura"]
+REGRAS_VITORIA = {
+    0: 2,  # Pedra vence Tesoura
+    1: 0,  # Papel vence Pedra
+    2: 1   # Tesoura vence Papel
+}
+JOGADA_QUE_VENCE = {
+    0: 1,  # Pedra é vencida por Papel
+    1: 2,  # Papel é vencido por Tesoura
+    2: 0   # Tesoura é vencida por Pedra
+}
+RESULTADOS = ("EMPATE!", "O JOGADOR GANHOU!", "O COMPUTADOR GANHOU!")
+# Índice em RESULTADOS para cada par, na posição jogador * 3 + computador
+TABELA_RESULTADOS = tuple(
+    0 if jogador == computador else 1 if REGRAS_VITORIA[jogador] == computador else 2
+    for jogador in range(3) for computador in range(3)
+)
+
+EMPATE, VITORIA_JOGADOR, VITORIA_COMPUTADOR = 0, 1, 2
+
+# Probabilidades da estratégia do computador
+PROB_CONTRA_PADRAO = 0.4
+PROB_VENCE_ULTIMA = 0.3
+# Ramos da estratégia, na ordem dos códigos gravados no log binário de rodadas
+# (novos ramos entram sempre no fim, para não mudar os códigos já gravados)
+RAMOS_ESTRATEGIA = ("aleatoria_inicial", "contra_padrao", "vence_ultima", "aleatoria", "contra_ciclo")
+# Recompensa do computador por código de resultado, usada pelo bandido
+RECOMPENSAS = (0.5, 0.0, 1.0)
+
+# =============================
+# Resultado da rodada
+# =============================
+def codigo_resultado(jogador, computador):
+    """Retorna EMPATE, VITORIA_JOGADOR ou VITORIA_COMPUTADOR (índice em RESULTADOS)."""
+    return TABELA_RESULTADOS[int(jogador) * 3 + int(computador)]
+
+def determinar_resultado(jogador, computador):
+    """Determina o resultado do jogo com base nas regras definidas."""
+    return RESULTADOS[codigo_resultado(jogador, computador)]
+
+# =============================
+# Registro de estratégias
+# =============================
+# Cada estratégia recebe (ultimo_jogador, modelo, aleatorio) e devolve a
+# jogada do computador, ou None quando não se aplica (p.ex. o modelo ainda
+# não tem previsão). São os braços do bandido (bandido.py).
+
+def estrategia_contra_padrao(ultimo_jogador, modelo, aleatorio):
+    """Vence a próxima jogada prevista pelo modelo."""
+    provavel_proxima = modelo.prever()
+    return None if provavel_proxima is None else JOGADA_QUE_VENCE[provavel_proxima]
+
+def estrategia_vence_ultima(ultimo_jogador, modelo, aleatorio):
+    """Vence a última jogada do jogador (contra quem repete)."""
+    return JOGADA_QUE_VENCE[ultimo_jogador]
+
+def estrategia_contra_ciclo(ultimo_jogador, modelo, aleatorio):
+    """Vence a jogada que venceria a última (contra quem avança pedra → papel → tesoura)."""
+    return JOGADA_QUE_VENCE[JOGADA_QUE_VENCE[ultimo_jogador]]
+
+def estrategia_aleatoria(ultimo_jogador, modelo, aleatorio):
+    """Joga aleatório: não pode ser explorada pelo jogador."""
+    return aleatorio.choice((0, 1, 2))
+
+ESTRATEGIAS_COMPUTADOR = {
+    'contra_padrao': estrategia_contra_padrao,
+    'vence_ultima': estrategia_vence_ultima,
+    'contra_ciclo': estrategia_contra_ciclo,
+    'aleatoria': estrategia_aleatoria,
+}
+
+# =============================
+# Estratégia do computador
+# =============================
+def escolher_jogada(ultimo_jogador, modelo, aleatorio=random, bandido=None):
+    """
+    Escolhe a jogada do computador. Sem histórico suficiente joga aleatório.
+    Depois, sem bandido, usa a mistura fixa: contra-ataca o padrão previsto
+    pelo modelo (40%), joga o que vence a última jogada do jogador (30%) ou
+    joga aleatório (30%). Com bandido, a estratégia do registro é a que ele
+    escolher; o chamador informa o resultado com bandido.registrar().
+
+    Args:
+        ultimo_jogador: A última jogada do jogador (0, 1, 2 ou None)
+        modelo: Modelo de previsão do jogador (ModeloJogador ou PreditorNGram)
+        aleatorio: Fonte de números aleatórios com random() e choice()
+        bandido: BandidoUCB da sessão (opcional)
+
+    Returns:
+        tuple: (jogada, nome do ramo da estratégia usado)
+    """
+    if ultimo_jogador not in [0, 1, 2] or len(modelo) < 3:
+        return aleatorio.choice((0, 1, 2)), 'aleatoria_inicial'
+
+    if bandido is not None:
+        ramo = bandido.escolher()
+        jogada = ESTRATEGIAS_COMPUTADOR[ramo](ultimo_jogador, modelo, aleatorio)
+        # O braço responde pela rodada mesmo quando não se aplicou
+        return (aleatorio.choice((0, 1, 2)) if jogada is None else jogada), ramo
+
+    estrategia = aleatorio.random()
+
+    if estrategia < PROB_CONTRA_PADRAO:
+        jogada = estrategia_contra_padrao(ultimo_jogador, modelo, aleatorio)
+        if jogada is not None:
+            return jogada, 'contra_padrao'
+
+    elif estrategia < PROB_CONTRA_PADRAO + PROB_VENCE_ULTIMA:
+        return estrategia_vence_ultima(ultimo_jogador, modelo, aleatorio), 'vence_ultima'
+
+    return estrategia_aleatoria(ultimo_jogador, modelo, aleatorio), 'aleatoria'
@@ -0,0 +1,325 @@
+import asyncio
+import collections
+import itertools
+import os
+import threading
+
+from nucleo import EMPATE, ITENS, VITORIA_COMPUTADOR, VITORIA_JOGADOR, codigo_resultado
+
+# =============================
+# Partidas entre jogadores
+# =============================
+# Motor de pareamento em asyncio, sem dependência do Flask. Quem procura uma
+# partida entra em uma fila por faixa de habilidade (a faixa vizinha também
+# serve; depois de `ampliar_apos` segundos, qualquer faixa serve) e é pareado
+# com o mais antigo da fila. Cada lado então tem `prazo_jogada` segundos para
+# enviar a jogada; as duas são reveladas juntas. Quem não joga no prazo perde
+# por W.O. (sem nenhuma jogada, a partida é cancelada).
+#
+# Os prazos são timers do próprio laço (loop.call_at), não uma tarefa por
+# partida, e as filas e partidas têm limites (max_espera, max_partidas): a
+# memória fica proporcional ao que está pendente e tem um teto. Todos os
+# métodos do MotorPartidas rodam na thread do laço; o LacoPartidas leva as
+# chamadas das threads do gunicorn até ele.
+
+PRAZO = "prazo"
+LOTADO = "lotado"
+OCUPADO = "ocupado"
+JA_JOGOU = "ja_jogou"
+ENCERRADA = "encerrada"
+
+VITORIA, DERROTA, EMPATADA, CANCELADA = "vitoria", "derrota", "empate", "cancelada"
+MENSAGENS = {
+    VITORIA: "VOCÊ GANHOU!",
+    DERROTA: "O ADVERSÁRIO GANHOU!",
+    EMPATADA: "EMPATE!",
+    CANCELADA: "PARTIDA CANCELADA",
+}
+
+
+class RecusaPartida(Exception):
+    """Pedido recusado pelo motor; `motivo` é PRAZO, LOTADO, OCUPADO, JA_JOGOU ou ENCERRADA."""
+
+    def __init__(self, motivo):
+        super().__init__(motivo)
+        self.motivo = motivo
+
+
+class _Espera:
+    """Um jogador na fila de pareamento."""
+
+    __slots__ = ("jogador", "faixa", "entrada", "futuro", "timer")
+
+    def __init__(self, jogador, faixa, entrada, futuro):
+        self.jogador = jogador
+        self.faixa = faixa
+        self.entrada = entrada
+        self.futuro = futuro
+        self.timer = None
+
+
+class Partida:
+    """Dois jogadores pareados, suas jogadas (reveladas só no fim) e o prazo."""
+
+    __slots__ = ("id", "jogadores", "jogadas", "prazo", "futuro", "timer")
+
+    def __init__(self, id_partida, jogadores, prazo, futuro):
+        self.id = id_partida
+        self.jogadores = jogadores
+        self.jogadas = [None, None]
+        self.prazo = prazo
+        self.futuro = futuro  # resolvido com o código do resultado (ou None se cancelada)
+        self.timer = None
+
+
+class MotorPartidas:
+    """
+    Fila de pareamento por faixas de habilidade e partidas com prazo para as
+    jogadas. Não é thread-safe: use de dentro do laço (ou pelo LacoPartidas).
+    """
+
+    def __init__(self, prazo_pareamento=30.0, prazo_jogada=10.0, max_espera=10000, max_partidas=10000,
+                 largura_faixa=10, faixas_vizinhas=1, ampliar_apos=5.0, ao_encerrar=None, ao_recusar=None):
+        """
+        Args:
+            prazo_pareamento: Segundos máximos na fila antes de desistir
+            prazo_jogada: Segundos, a partir do pareamento, para enviar a jogada
+            max_espera: Jogadores na fila; acima disso, LOTADO
+            max_partidas: Partidas em andamento; acima disso, LOTADO
+            largura_faixa: Pontos de habilidade por faixa da fila
+            faixas_vizinhas: Faixas de cada lado aceitas desde a chegada
+            ampliar_apos: Segundos na fila depois dos quais qualquer faixa serve
+            ao_encerrar: Função (desfecho) chamada a cada partida encerrada
+                ("concluidas", "wo" ou "canceladas")
+            ao_recusar: Função (motivo) chamada a cada recusa
+        """
+        self.prazo_pareamento = prazo_pareamento
+        self.prazo_jogada = prazo_jogada
+        self.max_espera = max_espera
+        self.max_partidas = max_partidas
+        self.largura_faixa = largura_faixa
+        self.faixas_vizinhas = faixas_vizinhas
+        self.ampliar_apos = ampliar_apos
+        self._ao_encerrar = ao_encerrar
+        self._ao_recusar = ao_recusar
+        self._filas = {}  # faixa -> {jogador: _Espera}, na ordem de chegada
+        self._esperas = {}  # jogador -> _Espera, na ordem de chegada
+        self._partidas = {}  # jogador -> Partida em andamento
+        self._ids = itertools.count(1)
+        self.contagens = collections.Counter()
+        self.tempo_pareamento = 0.0  # soma dos segundos na fila de quem foi pareado
+
+    @property
+    def esperando(self):
+        return len(self._esperas)
+
+    @property
+    def em_andamento(self):
+        return len(self._partidas) // 2
+
+    def _faixa(self, habilidade):
+        return 0 if habilidade is None else int(habilidade // self.largura_faixa)
+
+    def _retirar(self, espera):
+        """Tira o jogador da fila e cancela o prazo dele."""
+        fila = self._filas[espera.faixa]
+        del fila[espera.jogador]
+        if not fila:
+            del self._filas[espera.faixa]
+        del self._esperas[espera.jogador]
+        if espera.timer is not None:
+            espera.timer.cancel()
+
+    def _adversario(self, faixa, agora):
+        """O mais antigo da própria faixa ou das vizinhas; se não houver, o de outra faixa que já esperou demais."""
+        for distancia in range(self.faixas_vizinhas + 1):
+            for vizinha in {faixa - distancia, faixa + distancia}:
+                fila = self._filas.get(vizinha)
+                if fila:
+                    return next(iter(fila.values()))
+        # _esperas está em ordem de chegada: o primeiro é quem espera há mais tempo
+        if self._esperas:
+            antigo = next(iter(self._esperas.values()))
+            if antigo.entrada <= agora - self.ampliar_apos:
+                return antigo
+        return None
+
+    async def procurar(self, jogador, habilidade=None):
+        """
+        Entra na fila e espera um adversário.
+
+        Returns:
+            tuple: (Partida, lado do jogador: 0 ou 1)
+
+        Raises:
+            RecusaPartida: OCUPADO (já na fila ou em partida), LOTADO ou PRAZO
+        """
+        if jogador in self._esperas or jogador in self._partidas:
+            raise self._recusa(OCUPADO)
+        laco = asyncio.get_running_loop()
+        agora = laco.time()
+        faixa = self._faixa(habilidade)
+        adversario = self._adversario(faixa, agora)
+        while adversario is not None and adversario.futuro.done():
+            # Cancelado, mas a tarefa ainda não saiu da fila
+            self._retirar(adversario)
+            adversario = self._adversario(faixa, agora)
+        if adversario is not None:
+            if len(self._partidas) >= 2 * self.max_partidas:
+                raise self._recusa(LOTADO)
+            self._retirar(adversario)
+            partida = self._criar_partida(laco, (adversario.jogador, jogador), agora)
+            self.tempo_pareamento += agora - adversario.entrada
+            adversario.futuro.set_result(partida)
+            return partida, 1
+
+        if len(self._esperas) >= self.max_espera:
+            raise self._recusa(LOTADO)
+        espera = _Espera(jogador, faixa, agora, laco.create_future())
+        self._filas.setdefault(faixa, {})[jogador] = espera
+        self._esperas[jogador] = espera
+        espera.timer = laco.call_at(agora + self.prazo_pareamento, self._expirar_espera, espera)
+        try:
+            return await espera.futuro, 0
+        except asyncio.CancelledError:
+            # O cliente desistiu (p.ex. a conexão caiu) antes do pareamento
+            if self._esperas.get(jogador) is espera:
+                self._retirar(espera)
+                self.contagens['desistencias'] += 1
+            raise
+
+    def _recusa(self, motivo):
+        self.contagens[f'recusa_{motivo}'] += 1
+        if self._ao_recusar is not None:
+            self._ao_recusar(motivo)
+        return RecusaPartida(motivo)
+
+    def _expirar_espera(self, espera):
+        espera.timer = None
+        self._retirar(espera)
+        if not espera.futuro.done():
+            espera.futuro.set_exception(self._recusa(PRAZO))
+
+    def _criar_partida(self, laco, jogadores, agora):
+        partida = Partida(next(self._ids), jogadores, agora + self.prazo_jogada, laco.create_future())
+        partida.timer = laco.call_at(partida.prazo, self._encerrar, partida)
+        self._partidas[jogadores[0]] = self._partidas[jogadores[1]] = partida
+        self.contagens['pareadas'] += 1
+        return partida
+
+    def _encerrar(self, partida):
+        """Resolve a partida: com as duas jogadas, pelas regras do jogo; no prazo, por W.O."""
+        if partida.timer is not None:
+            partida.timer.cancel()
+            partida.timer = None
+        for jogador in partida.jogadores:
+            del self._partidas[jogador]
+        jogada_0, jogada_1 = partida.jogadas
+        if jogada_0 is not None and jogada_1 is not None:
+            codigo, desfecho = codigo_resultado(jogada_0, jogada_1), 'concluidas'
+        elif jogada_0 is None and jogada_1 is None:
+            codigo, desfecho = None, 'canceladas'
+        else:
+            # W.O.: vence quem jogou (nos códigos, o lado 0 é o "jogador" e o 1, o "computador")
+            codigo = VITORIA_JOGADOR if jogada_1 is None else VITORIA_COMPUTADOR
+            desfecho = 'wo'
+        self.contagens[desfecho] += 1
+        if self._ao_encerrar is not None:
+            self._ao_encerrar(desfecho)
+        partida.futuro.set_result(codigo)
+
+    async def jogar(self, partida, lado, jogada):
+        """
+        Registra a jogada (0, 1 ou 2) de um lado e espera a do adversário
+        (ou o fim do prazo).
+
+        Returns:
+            dict: O resultado da partida do ponto de vista desse lado
+
+        Raises:
+            RecusaPartida: JA_JOGOU ou ENCERRADA (prazo vencido)
+        """
+        if partida.futuro.done():
+            raise self._recusa(ENCERRADA)
+        if partida.jogadas[lado] is not None:
+            raise self._recusa(JA_JOGOU)
+        partida.jogadas[lado] = jogada
+        if partida.jogadas[1 - lado] is not None:
+            self._encerrar(partida)
+        # shield: se um lado desistir de esperar, o futuro continua valendo para o outro
+        await asyncio.shield(partida.futuro)
+        return visao_partida(partida, lado)
+
+    def situacao(self):
+        """Ocupação atual e contagens acumuladas do motor."""
+        pareadas = self.contagens['pareadas']
+        return {
+            'esperando': self.esperando,
+            'em_andamento': self.em_andamento,
+            'faixas': len(self._filas),
+            'max_espera': self.max_espera,
+            'max_partidas': self.max_partidas,
+            'contagens': dict(self.contagens),
+            'espera_media': round(self.tempo_pareamento / pareadas, 6) if pareadas else None,
+        }
+
+
+def visao_partida(partida, lado):
+    """Resultado de uma partida encerrada do ponto de vista de um lado."""
+    codigo = partida.futuro.result()
+    minha, dele = partida.jogadas[lado], partida.jogadas[1 - lado]
+    if codigo is None:
+        resultado = CANCELADA
+    elif codigo == EMPATE:
+        resultado = EMPATADA
+    else:
+        resultado = VITORIA if (codigo == VITORIA_JOGADOR) == (lado == 0) else DERROTA
+    return {
+        'partida': partida.id,
+        'resultado': resultado,
+        'mensagem': MENSAGENS[resultado],
+        'jogada': ITENS[minha] if minha is not None else None,
+        'jogada_adversario': ITENS[dele] if dele is not None else None,
+        'wo': codigo is not None and (minha is None or dele is None),
+    }
+
+
+class LacoPartidas:
+    """
+    Um laço asyncio em uma thread do worker, dono do MotorPartidas. As
+    threads do gunicorn (p.ex. a de cada WebSocket) chamam `executar`, que
+    agenda a corrotina no laço e devolve um concurrent.futures.Future;
+    cancelá-lo cancela a corrotina (e tira o jogador da fila).
+    """
+
+    def __init__(self, motor):
+        self.motor = motor
+        self._laco = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def _garantir(self):
+        # O laço é criado no processo que o usa: após um fork, o filho precisa do próprio
+        if self._pid != os.getpid():
+            with self._lock:
+                if self._pid != os.getpid():
+                    laco = asyncio.new_event_loop()
+                    threading.Thread(target=laco.run_forever, name="partidas", daemon=True).start()
+                    self._laco, self._pid = laco, os.getpid()
+        return self._laco
+
+    def executar(self, corrotina):
+        """Agenda a corrotina no laço das partidas."""
+        return asyncio.run_coroutine_threadsafe(corrotina, self._garantir())
+
+    def procurar(self, jogador, habilidade=None):
+        return self.executar(self.motor.procurar(jogador, habilidade))
+
+    def jogar(self, partida, lado, jogada):
+        return self.executar(self.motor.jogar(partida, lado, jogada))
+
+    def situacao(self):
+        """Situação do motor, lida na thread do laço."""
+        async def ler():
+            return self.motor.situacao()
+        return self.executar(ler()).result(timeout=5)
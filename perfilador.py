@@ -0,0 +1,163 @@
+import collections
+import os
+import random
+import secrets
+import sys
+import threading
+import time
+
+from werkzeug.wsgi import ClosingIterator
+
+# =============================
+# Perfilador por amostragem
+# =============================
+# Enquanto há requisições perfiladas em andamento, uma thread lê a pilha de
+# cada thread que as atende (sys._current_frames) a cada `intervalo` segundos
+# e soma as pilhas iguais. O resultado sai no formato "collapsed stacks"
+# (quadros separados por ";" e a contagem no fim), aceito pelo flamegraph.pl,
+# pelo speedscope e por outros visualizadores de flame graph.
+#
+# A thread de amostragem só roda quando obtém o GIL. Com o intervalo de troca
+# padrão (5 ms), quase sempre o obtém quando a requisição o libera em uma
+# chamada ao sistema (p.ex. os.urandom), e as amostras se concentram nesses
+# pontos. Por isso, enquanto há requisições perfiladas, o intervalo de troca
+# do processo é reduzido para `intervalo_troca`.
+
+OUTRAS = "[outras pilhas]"
+
+
+def _nome_quadro(codigo, modulo):
+    return f"{modulo}:{getattr(codigo, 'co_qualname', codigo.co_name)}"
+
+
+class PerfiladorAmostragem:
+    """
+    Amostra as pilhas das threads registradas com iniciar()/terminar().
+    A thread de amostragem só acorda enquanto houver alguma registrada.
+    """
+
+    def __init__(self, intervalo=0.005, profundidade=64, max_pilhas=5000, intervalo_troca=0.0001):
+        """
+        Args:
+            intervalo: Segundos entre amostras
+            profundidade: Quadros mantidos a partir do topo da pilha
+            max_pilhas: Pilhas distintas guardadas; as novas além disso somam em OUTRAS
+            intervalo_troca: sys.setswitchinterval() enquanto há requisições perfiladas
+        """
+        self.intervalo = intervalo
+        self.intervalo_troca = intervalo_troca
+        self._troca_original = None
+        self.profundidade = profundidade
+        self.max_pilhas = max_pilhas
+        self.amostras = 0
+        self.requisicoes = 0
+        self._lock = threading.Lock()
+        self._ativas = collections.Counter()  # ident da thread -> requisições em andamento
+        self._pilhas = collections.Counter()  # tupla de (código, módulo) -> amostras
+        self._evento = threading.Event()
+        self._pid = None
+
+    def iniciar(self):
+        """Passa a amostrar a thread atual."""
+        with self._lock:
+            if self._pid != os.getpid():
+                # Após um fork, o processo filho precisa da própria thread
+                self._pid = os.getpid()
+                threading.Thread(target=self._executar, name="perfilador", daemon=True).start()
+            if not self._ativas:
+                self._troca_original = sys.getswitchinterval()
+                sys.setswitchinterval(self.intervalo_troca)
+            self._ativas[threading.get_ident()] += 1
+            self.requisicoes += 1
+            self._evento.set()
+
+    def terminar(self):
+        """Deixa de amostrar a thread atual."""
+        with self._lock:
+            ident = threading.get_ident()
+            self._ativas[ident] -= 1
+            if self._ativas[ident] <= 0:
+                del self._ativas[ident]
+            if not self._ativas:
+                self._evento.clear()
+                sys.setswitchinterval(self._troca_original)
+
+    def _executar(self):
+        while True:
+            self._evento.wait()
+            time.sleep(self.intervalo)
+            with self._lock:
+                alvos = tuple(self._ativas)
+            if alvos:
+                self._amostrar(alvos)
+
+    def _amostrar(self, alvos):
+        quadros = sys._current_frames()
+        pilhas = []
+        for ident in alvos:
+            quadro = quadros.get(ident)
+            pilha = []
+            while quadro is not None and len(pilha) < self.profundidade:
+                pilha.append((quadro.f_code, quadro.f_globals.get('__name__', '?')))
+                quadro = quadro.f_back
+            if pilha:
+                pilhas.append(tuple(reversed(pilha)))
+        with self._lock:
+            for pilha in pilhas:
+                if pilha not in self._pilhas and len(self._pilhas) >= self.max_pilhas:
+                    pilha = OUTRAS
+                self._pilhas[pilha] += 1
+            self.amostras += len(pilhas)
+
+    def pilhas_colapsadas(self):
+        """Pilhas agregadas, uma por linha ("raiz;...;topo contagem"), da mais frequente para a menos."""
+        with self._lock:
+            pilhas = self._pilhas.most_common()
+        linhas = []
+        for pilha, contagem in pilhas:
+            nome = pilha if pilha == OUTRAS else ";".join(_nome_quadro(*quadro) for quadro in pilha)
+            linhas.append(f"{nome} {contagem}")
+        return "\n".join(linhas) + "\n" if linhas else ""
+
+    def reiniciar(self):
+        """Descarta as amostras acumuladas."""
+        with self._lock:
+            self._pilhas.clear()
+            self.amostras = 0
+            self.requisicoes = 0
+
+
+class MiddlewarePerfil:
+    """
+    Middleware WSGI que perfila uma fração `taxa` das requisições, ou as que
+    trazem o cabeçalho X-Jokenpo-Perfil com o `token` de administração. Por
+    envolver o app inteiro, a amostra cobre também Talisman, Limiter, hooks,
+    leitura do JSON e a serialização da resposta. Conexões WebSocket ficam de
+    fora, para não amostrar a espera por mensagens.
+    """
+
+    def __init__(self, app_wsgi, perfilador, taxa=0.0, token=None, aleatorio=random.random):
+        self.app_wsgi = app_wsgi
+        self.perfilador = perfilador
+        self.taxa = taxa
+        self.token = token
+        self._aleatorio = aleatorio
+
+    def _selecionar(self, environ):
+        if environ.get('HTTP_UPGRADE', '').lower() == 'websocket':
+            return False
+        cabecalho = environ.get('HTTP_X_JOKENPO_PERFIL')
+        if self.token and cabecalho and secrets.compare_digest(cabecalho.encode('latin-1'), self.token.encode()):
+            return True
+        return self.taxa > 0 and self._aleatorio() < self.taxa
+
+    def __call__(self, environ, start_response):
+        if not self._selecionar(environ):
+            return self.app_wsgi(environ, start_response)
+        self.perfilador.iniciar()
+        try:
+            resposta = self.app_wsgi(environ, start_response)
+        except BaseException:
+            self.perfilador.terminar()
+            raise
+        return ClosingIterator(resposta, self.perfilador.terminar)
@@ -0,0 +1,186 @@
+import struct
+import threading
+from array import array
+
+# =============================
+# Preditor n-grama
+# =============================
+LIMITE_CONTAGEM = 255  # contagens em bytes; a linha é reduzida à metade ao saturar
+TIPO_NGRAM = 2  # primeiro byte do formato binário (ver modelo_jogador)
+
+# tipo, ordem, ordem conjunta, mínimo de observações, última (255 = nenhuma),
+# rodadas, contexto, contexto conjunto
+_CABECALHO = struct.Struct('<BBBBBIII')
+
+
+class PreditorNGram:
+    """
+    Preditor de ordens 1..N sobre o histórico do jogador.
+
+    Cada ordem k possui uma tabela plana `array('B')` indexada por
+    `contexto * 3 + proxima`, onde o contexto é o código em base 3 das k
+    últimas jogadas. Com `conjunto=True` são mantidas também tabelas sobre o
+    histórico (jogador, computador) — o resultado é implícito no par —, cujo
+    símbolo ocupa dois dígitos em base 3 (9 valores por rodada).
+
+    Atualização e previsão custam O(N) por rodada, independente do tamanho
+    do histórico. Ao saturar uma contagem, a linha inteira é dividida por
+    dois, o que limita a memória e dá mais peso às jogadas recentes.
+    """
+
+    def __init__(self, ordem_max=3, conjunto=False, limite_bytes=8192, minimo_observacoes=2):
+        if ordem_max < 1:
+            raise ValueError("A ordem máxima do preditor deve ser pelo menos 1")
+        self.minimo_observacoes = minimo_observacoes
+        self._rodadas = 0
+        self._ultima = None
+        self._contexto = 0
+        self._contexto_conjunto = 0
+        self._lock = threading.Lock()
+
+        # Tabelas do jogador têm prioridade; as conjuntas usam o que sobrar do limite
+        self.tabelas = []
+        usado = 0
+        for ordem in range(1, ordem_max + 1):
+            tamanho = 3 ** ordem * 3
+            if usado + tamanho > limite_bytes:
+                break
+            self.tabelas.append(array('B', bytes(tamanho)))
+            usado += tamanho
+        if not self.tabelas:
+            raise ValueError(f"limite_bytes={limite_bytes} não comporta nem a tabela de ordem 1")
+
+        self.tabelas_conjuntas = []
+        if conjunto:
+            for ordem in range(1, ordem_max + 1):
+                tamanho = 9 ** ordem * 3
+                if usado + tamanho > limite_bytes:
+                    break
+                self.tabelas_conjuntas.append(array('B', bytes(tamanho)))
+                usado += tamanho
+
+        self.bytes_tabelas = usado
+        self._modulo = 3 ** len(self.tabelas)
+        self._modulo_conjunto = 9 ** max(len(self.tabelas_conjuntas), 1)
+
+    @property
+    def ordem_max(self):
+        return len(self.tabelas)
+
+    @property
+    def ordem_max_conjunta(self):
+        return len(self.tabelas_conjuntas)
+
+    def __len__(self):
+        return self._rodadas
+
+    @property
+    def ultima(self):
+        """Última jogada registrada ou None se o histórico estiver vazio."""
+        return self._ultima
+
+    @staticmethod
+    def _incrementar(tabela, indice):
+        if tabela[indice] == LIMITE_CONTAGEM:
+            base = indice - indice % 3
+            for i in range(base, base + 3):
+                tabela[i] >>= 1
+        tabela[indice] += 1
+
+    def registrar(self, jogada, computador=None):
+        """
+        Registra uma rodada.
+
+        Args:
+            jogada: A jogada do jogador (0, 1 ou 2)
+            computador: A jogada do computador (necessária apenas para as tabelas conjuntas)
+        """
+        with self._lock:
+            rodadas = self._rodadas
+            contexto = self._contexto
+            potencia = 1
+            for ordem, tabela in enumerate(self.tabelas, start=1):
+                if rodadas < ordem:
+                    break
+                potencia *= 3
+                self._incrementar(tabela, (contexto % potencia) * 3 + jogada)
+            self._contexto = (contexto * 3 + jogada) % self._modulo
+
+            if self.tabelas_conjuntas and computador is not None:
+                contexto = self._contexto_conjunto
+                potencia = 1
+                for ordem, tabela in enumerate(self.tabelas_conjuntas, start=1):
+                    if rodadas < ordem:
+                        break
+                    potencia *= 9
+                    self._incrementar(tabela, (contexto % potencia) * 3 + jogada)
+                self._contexto_conjunto = (contexto * 9 + jogada * 3 + computador) % self._modulo_conjunto
+
+            self._rodadas = rodadas + 1
+            self._ultima = jogada
+
+    def _melhor(self, tabelas, contexto, base, melhor):
+        potencia = 1
+        for ordem, tabela in enumerate(tabelas, start=1):
+            if self._rodadas < ordem:
+                break
+            potencia *= base
+            inicio = (contexto % potencia) * 3
+            a, b, c = tabela[inicio], tabela[inicio + 1], tabela[inicio + 2]
+            total = a + b + c
+            if total < self.minimo_observacoes:
+                continue
+            maior = max(a, b, c)
+            confianca = maior / total
+            # Em caso de empate de confiança, a ordem mais alta prevalece
+            if melhor is None or confianca >= melhor[1]:
+                melhor = ((a, b, c).index(maior), confianca, ordem)
+        return melhor
+
+    def prever_com_confianca(self):
+        """
+        Retorna (jogada_prevista, confianca, ordem) da ordem mais confiante,
+        ou None se nenhuma ordem tiver observações suficientes.
+        """
+        melhor = self._melhor(self.tabelas, self._contexto, 3, None)
+        if self.tabelas_conjuntas:
+            melhor = self._melhor(self.tabelas_conjuntas, self._contexto_conjunto, 9, melhor)
+        return melhor
+
+    def prever(self, ultima=None):
+        """Retorna a próxima jogada mais provável do jogador ou None."""
+        previsao = self.prever_com_confianca()
+        return previsao[0] if previsao else None
+
+    def para_bytes(self):
+        """Serializa o preditor em formato binário compacto."""
+        with self._lock:
+            partes = [_CABECALHO.pack(
+                TIPO_NGRAM, len(self.tabelas), len(self.tabelas_conjuntas), self.minimo_observacoes,
+                255 if self._ultima is None else self._ultima,
+                self._rodadas, self._contexto, self._contexto_conjunto,
+            )]
+            partes.extend(tabela.tobytes() for tabela in self.tabelas)
+            partes.extend(tabela.tobytes() for tabela in self.tabelas_conjuntas)
+            return b"".join(partes)
+
+    @classmethod
+    def de_bytes(cls, dados):
+        """Reconstrói um preditor serializado por `para_bytes`."""
+        tipo, ordem, ordem_conjunta, minimo, ultima, rodadas, contexto, contexto_conjunto = \
+            _CABECALHO.unpack_from(dados)
+        if tipo != TIPO_NGRAM:
+            raise ValueError(f"Tipo de modelo inesperado: {tipo}")
+        tamanho = sum(3 ** k * 3 for k in range(1, ordem + 1))
+        tamanho += sum(9 ** k * 3 for k in range(1, ordem_conjunta + 1))
+        preditor = cls(ordem, conjunto=ordem_conjunta > 0, limite_bytes=tamanho, minimo_observacoes=minimo)
+        posicao = _CABECALHO.size
+        for tabela in preditor.tabelas + preditor.tabelas_conjuntas:
+            fim = posicao + len(tabela)
+            tabela[:] = array('B', dados[posicao:fim])
+            posicao = fim
+        preditor._ultima = None if ultima == 255 else ultima
+        preditor._rodadas = rodadas
+        preditor._contexto = contexto
+        preditor._contexto_conjunto = contexto_conjunto
+        return preditor
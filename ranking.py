@@ -0,0 +1,277 @@
+import bisect
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+from historico_rodadas import TOTAL, dia_utc
+
+# =============================
+# Ranking de jogadores
+# =============================
+# Lê as contagens gravadas pelo HistoricoRodadas (tabelas `jogadores` e
+# `jogadores_dia`) de forma incremental: cada sincronização busca, pelo índice
+# de `versao`, só as linhas alteradas desde a anterior, vindas de qualquer
+# worker. Cada métrica tem um índice ordenado e limitado atualizado linha a
+# linha, e a tabela publicada é montada com os K primeiros de cada índice.
+# Assim o custo de uma consulta e a memória não dependem do número de
+# jogadores nem de rodadas.
+
+FOLGA_TAXA = 4  # posições guardadas no índice de taxa de vitórias por posição publicada
+
+# Filtro e ordem de cada índice nas leituras do SQLite (a mesma de JanelaRanking.ordens,
+# com o identificador do jogador como desempate)
+CONSULTAS_INDICE = {
+    "vitorias": "ORDER BY vitorias DESC, maior_sequencia DESC, jogador",
+    "taxa_vitorias": "WHERE rodadas >= ? ORDER BY CAST(vitorias AS REAL) / rodadas DESC, rodadas DESC, jogador",
+    "maior_sequencia": "ORDER BY maior_sequencia DESC, vitorias DESC, jogador",
+}
+
+
+def apelido(jogador):
+    """Nome público do jogador no ranking, que não revela o identificador da sessão."""
+    return hashlib.blake2s(jogador.encode(), digest_size=4).hexdigest()
+
+
+class IndiceOrdenado:
+    """
+    Jogadores em ordem crescente de `ordem` (o primeiro é o melhor), em uma
+    lista mantida com bisect. Com `capacidade`, guarda apenas os melhores e
+    um `limite`: todo jogador fora do índice tem chave (ordem, jogador) maior
+    ou igual a ele. Quem piora além do limite sai do índice, que então pode
+    ficar com menos posições que a capacidade; `incompleto(k)` indica quando
+    os k primeiros deixaram de ser conhecidos e o índice precisa ser
+    recarregado. Em métricas que nunca pioram (como vitórias acumuladas),
+    isso nunca acontece.
+    """
+
+    __slots__ = ("capacidade", "limite", "_chaves", "_posicoes")
+
+    def __init__(self, capacidade=None):
+        self.capacidade = capacidade
+        self.limite = None  # None: nenhum jogador ficou de fora
+        self._chaves = []  # (ordem, jogador)
+        self._posicoes = {}  # jogador -> chave atual
+
+    def __len__(self):
+        return len(self._chaves)
+
+    def __contains__(self, jogador):
+        return jogador in self._posicoes
+
+    def atualizar(self, jogador, ordem):
+        """Reposiciona o jogador. Com `ordem` None, ele sai do índice."""
+        chave = self._posicoes.pop(jogador, None)
+        if chave is not None:
+            del self._chaves[bisect.bisect_left(self._chaves, chave)]
+        if ordem is None:
+            return
+        chave = (ordem, jogador)
+        if self.limite is not None and chave >= self.limite:
+            return
+        bisect.insort(self._chaves, chave)
+        self._posicoes[jogador] = chave
+        if self.capacidade is not None and len(self._chaves) > self.capacidade:
+            self.limite = self._chaves.pop()
+            del self._posicoes[self.limite[1]]
+
+    def incompleto(self, k):
+        """True se há jogadores fora do índice e ele não tem mais os k primeiros."""
+        return self.limite is not None and len(self._chaves) < k
+
+    def limpar(self):
+        """Esvazia o índice (sem limite) e retorna os jogadores que estavam nele."""
+        jogadores = list(self._posicoes)
+        self._chaves, self._posicoes, self.limite = [], {}, None
+        return jogadores
+
+    def primeiros(self, k):
+        """Os k melhores jogadores."""
+        return [jogador for _, jogador in self._chaves[:k]]
+
+
+class JanelaRanking:
+    """Índices de uma janela (geral ou de um dia) e as linhas dos jogadores presentes neles."""
+
+    def __init__(self, tamanho, min_rodadas_taxa):
+        self.min_rodadas_taxa = min_rodadas_taxa
+        # Vitórias e maior sequência só crescem dentro da janela (e as ordens
+        # usam apenas essas duas): os K primeiros bastam. A taxa pode cair, e
+        # o índice guarda uma folga para raramente precisar ser recarregado
+        self.indices = {
+            "vitorias": IndiceOrdenado(tamanho),
+            "taxa_vitorias": IndiceOrdenado(tamanho * FOLGA_TAXA),
+            "maior_sequencia": IndiceOrdenado(tamanho),
+        }
+        self.linhas = {}  # jogador -> (vitórias, rodadas, maior sequência)
+
+    def ordens(self, vitorias, rodadas, maior_sequencia):
+        """Ordem do jogador em cada métrica (None fora do ranking de taxa)."""
+        taxa = vitorias / rodadas if rodadas >= self.min_rodadas_taxa else None
+        return {
+            "vitorias": (-vitorias, -maior_sequencia),
+            "taxa_vitorias": None if taxa is None else (-taxa, -rodadas),
+            "maior_sequencia": (-maior_sequencia, -vitorias),
+        }
+
+    def atualizar(self, jogador, vitorias, rodadas, maior_sequencia):
+        for metrica, ordem in self.ordens(vitorias, rodadas, maior_sequencia).items():
+            self.indices[metrica].atualizar(jogador, ordem)
+        self._manter_linha(jogador, (vitorias, rodadas, maior_sequencia))
+
+    def _manter_linha(self, jogador, linha):
+        if any(jogador in indice for indice in self.indices.values()):
+            self.linhas[jogador] = linha
+        else:
+            self.linhas.pop(jogador, None)
+
+    def recarregar(self, metrica, linhas):
+        """
+        Refaz o índice da métrica a partir das primeiras linhas da janela nessa
+        ordem, (jogador, vitórias, rodadas, maior sequência), até a capacidade
+        mais uma: a excedente só marca o limite de quem ficou de fora.
+        """
+        indice = self.indices[metrica]
+        for jogador in indice.limpar():
+            self._manter_linha(jogador, self.linhas.get(jogador))
+        capacidade = indice.capacidade
+        for jogador, vitorias, rodadas, maior_sequencia in linhas[:capacidade]:
+            self.atualizar(jogador, vitorias, rodadas, maior_sequencia)
+        if len(linhas) > capacidade:
+            jogador, vitorias, rodadas, maior_sequencia = linhas[capacidade]
+            indice.limite = (self.ordens(vitorias, rodadas, maior_sequencia)[metrica], jogador)
+
+    def tabela(self, k):
+        """Os k primeiros de cada métrica, prontos para serializar."""
+        tabela = {}
+        for metrica, indice in self.indices.items():
+            posicoes = []
+            for posicao, jogador in enumerate(indice.primeiros(k), start=1):
+                vitorias, rodadas, maior_sequencia = self.linhas[jogador]
+                posicoes.append({
+                    'posicao': posicao,
+                    'jogador': apelido(jogador),
+                    'vitorias': vitorias,
+                    'rodadas': rodadas,
+                    'taxa_vitorias': round(vitorias / rodadas, 4) if rodadas else 0.0,
+                    'maior_sequencia': maior_sequencia,
+                })
+            tabela[metrica] = posicoes
+        return tabela
+
+
+class Ranking:
+    """
+    Ranking geral e do dia (UTC) por vitórias, taxa de vitórias (a partir de
+    `min_rodadas_taxa` rodadas) e maior sequência de vitórias contra a IA.
+    """
+
+    def __init__(self, caminho, tamanho=10, min_rodadas_taxa=20, intervalo=2.0,
+                 relogio=time.monotonic, agora=time.time):
+        """
+        Args:
+            caminho: Arquivo SQLite do HistoricoRodadas
+            tamanho: Posições publicadas por métrica
+            min_rodadas_taxa: Rodadas mínimas para entrar no ranking de taxa de vitórias
+            intervalo: Segundos mínimos entre sincronizações com o arquivo
+        """
+        self.caminho = caminho
+        self.tamanho = tamanho
+        self.min_rodadas_taxa = min_rodadas_taxa
+        self.intervalo = intervalo
+        self.versao = 0  # muda sempre que a tabela publicada muda
+        self._relogio = relogio
+        self._agora = agora
+        self._lock = threading.Lock()
+        self._conexao_atual = None
+        self._pid = None
+        self._geral = JanelaRanking(tamanho, min_rodadas_taxa)
+        self._diaria = None
+        self._dia = None
+        self._versao_geral = self._versao_dia = -1
+        self._sincronizado = None
+        self._atual = None  # (versao, tabela)
+
+    def _conexao(self):
+        # Sob self._lock; uma conexão por processo
+        if self._pid != os.getpid():
+            self._conexao_atual = sqlite3.connect(
+                self.caminho, timeout=5, isolation_level=None, check_same_thread=False)
+            self._pid = os.getpid()
+        return self._conexao_atual
+
+    def _recarregar(self, janela, metrica, tabela, filtro, parametros):
+        """Lê da janela os primeiros da métrica (na mesma ordem do índice) e refaz o índice."""
+        consulta = (
+            f"SELECT jogador, vitorias, rodadas, maior_sequencia FROM ("
+            f"SELECT jogador, vitorias, empates + vitorias + derrotas AS rodadas, maior_sequencia "
+            f"FROM {tabela} WHERE {filtro}) {CONSULTAS_INDICE[metrica]} LIMIT ?"
+        )
+        argumentos = (*parametros, self.min_rodadas_taxa) if metrica == "taxa_vitorias" else parametros
+        capacidade = janela.indices[metrica].capacidade
+        janela.recarregar(metrica, self._conexao().execute(consulta, (*argumentos, capacidade + 1)).fetchall())
+
+    def _sincronizar_janela(self, janela, tabela, filtro, parametros, desde):
+        """Aplica as linhas da janela com versão maior que `desde` e retorna a maior versão lida."""
+        if desde < 0:
+            # Carga inicial: só os primeiros de cada métrica, em uma única transação
+            conexao = self._conexao()
+            conexao.execute("BEGIN")
+            try:
+                maxima = conexao.execute(f"SELECT MAX(versao) FROM {tabela} WHERE {filtro}", parametros).fetchone()[0]
+                for metrica in janela.indices:
+                    self._recarregar(janela, metrica, tabela, filtro, parametros)
+            finally:
+                conexao.execute("COMMIT")
+            return -1 if maxima is None else maxima
+        versao = -1
+        for jogador, vitorias, rodadas, maior_sequencia, versao_linha in self._conexao().execute(
+                f"SELECT jogador, vitorias, empates + vitorias + derrotas, maior_sequencia, versao "
+                f"FROM {tabela} WHERE {filtro} AND versao > ?", (*parametros, desde)):
+            janela.atualizar(jogador, vitorias, rodadas, maior_sequencia)
+            versao = max(versao, versao_linha)
+        # Jogadores que pioraram saíram do índice de taxa: se não restaram K
+        # conhecidos, relê os primeiros (uma varredura da janela, rara com a folga)
+        for metrica, indice in janela.indices.items():
+            if indice.incompleto(self.tamanho):
+                self._recarregar(janela, metrica, tabela, filtro, parametros)
+        return versao
+
+    def sincronizar(self):
+        """Aplica as linhas alteradas desde a última sincronização. Retorna True se algo mudou."""
+        hoje = dia_utc(self._agora())
+        mudou = False
+        if hoje != self._dia:
+            # Virada do dia: a janela diária recomeça vazia
+            self._dia, self._diaria, self._versao_dia = hoje, JanelaRanking(self.tamanho, self.min_rodadas_taxa), -1
+            mudou = True
+        versao = self._sincronizar_janela(self._geral, "jogadores", "jogador != ?", (TOTAL,), self._versao_geral)
+        if versao > self._versao_geral:
+            self._versao_geral, mudou = versao, True
+        versao = self._sincronizar_janela(self._diaria, "jogadores_dia", "dia = ?", (hoje,), self._versao_dia)
+        if versao > self._versao_dia:
+            self._versao_dia, mudou = versao, True
+        self._sincronizado = self._relogio()
+        if mudou:
+            self.versao += 1
+        return mudou
+
+    def obter(self):
+        """
+        Retorna (versao, tabela), sincronizando se a última leitura tiver mais
+        de `intervalo` segundos. Enquanto uma thread sincroniza, as demais
+        recebem a tabela anterior.
+        """
+        if self._lock.acquire(blocking=self._atual is None):
+            try:
+                if self._sincronizado is None or self._relogio() - self._sincronizado >= self.intervalo:
+                    if self.sincronizar() or self._atual is None:
+                        self._atual = (self.versao, {
+                            'geral': self._geral.tabela(self.tamanho),
+                            'dia': {'data': self._dia, **self._diaria.tabela(self.tamanho)},
+                            'min_rodadas_taxa': self.min_rodadas_taxa,
+                        })
+            finally:
+                self._lock.release()
+        return self._atual
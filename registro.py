@@ -0,0 +1,113 @@
+import atexit
+import json
+import logging
+import os
+import queue
+import random
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+# Use como `extra=AMOSTRAR` nas linhas INFO emitidas a cada requisição
+AMOSTRAR = {'amostrar': True}
+
+# Listener e arquivo configurados por último neste processo: uma nova
+# configuração (create_app pode ser chamado várias vezes) encerra os anteriores
+_atual = {'pid': None, 'listener': None, 'handler': None}
+
+
+class FormatadorJSON(logging.Formatter):
+    """Formata cada registro como um objeto JSON em uma linha."""
+
+    def format(self, record):
+        dados = {
+            "timestamp": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "nivel": record.levelname,
+            "logger": record.name,
+            "mensagem": record.getMessage(),
+        }
+        if record.exc_info:
+            dados["excecao"] = self.formatException(record.exc_info)
+        return json.dumps(dados, ensure_ascii=False)
+
+
+class FiltroAmostragem(logging.Filter):
+    """
+    Descarta uma fração dos registros marcados com `amostrar`. Registros de
+    nível WARNING ou superior nunca são descartados.
+    """
+
+    def __init__(self, taxa):
+        super().__init__()
+        self.taxa = taxa
+
+    def filter(self, record):
+        if record.levelno >= logging.WARNING or not getattr(record, 'amostrar', False):
+            return True
+        return self.taxa >= 1.0 or random.random() < self.taxa
+
+
+class ManipuladorFila(QueueHandler):
+    """
+    QueueHandler que apenas enfileira o registro. A formatação da mensagem
+    (argumentos `%`) fica para a thread do listener, fora da requisição.
+    """
+
+    def prepare(self, record):
+        return record
+
+
+def _encerrar_atual():
+    """Para o listener (gravando o que estiver na fila) e fecha o arquivo da configuração atual."""
+    listener, handler = _atual['listener'], _atual['handler']
+    _atual.update(listener=None, handler=None)
+    # Após um fork, a thread do listener não existe no filho: basta descartá-lo
+    if listener is not None and _atual['pid'] == os.getpid():
+        listener.stop()
+    if handler is not None:
+        handler.close()
+
+
+atexit.register(_encerrar_atual)
+
+
+def configurar_logger(logger, arquivo='jokenpo.log', assincrono=True, formato='texto', amostragem=1.0):
+    """
+    Configura o logger da aplicação.
+
+    Args:
+        logger: O logger a configurar (normalmente app.logger)
+        arquivo: Arquivo de log com rotação
+        assincrono: Se True, as threads de requisição só enfileiram registros e
+            uma thread em segundo plano formata e grava no arquivo
+        formato: "texto" ou "json"
+        amostragem: Fração (0 a 1) dos registros marcados com `amostrar` que é mantida
+
+    Returns:
+        O QueueListener em execução, ou None no modo síncrono
+    """
+    # delay=True: o arquivo só é aberto na primeira gravação, fora da inicialização
+    handler = RotatingFileHandler(arquivo, maxBytes=1000000, backupCount=3, delay=True)
+    if formato == 'json':
+        handler.setFormatter(FormatadorJSON())
+    else:
+        handler.setFormatter(logging.Formatter('%(asctime)s [%(levelname)s] %(message)s', '%Y-%m-%d %H:%M:%S'))
+
+    if logger.handlers:
+        logger.handlers = []
+    _encerrar_atual()
+
+    listener = None
+    if assincrono:
+        fila = queue.SimpleQueue()
+        destino = ManipuladorFila(fila)
+        listener = QueueListener(fila, handler, respect_handler_level=True)
+        listener.start()
+    else:
+        destino = handler
+    _atual.update(pid=os.getpid(), listener=listener, handler=handler)
+
+    if amostragem < 1.0:
+        destino.addFilter(FiltroAmostragem(amostragem))
+    logger.addHandler(destino)
+    logger.setLevel(logging.INFO)
+    return listener
@@ -0,0 +1,280 @@
+"""
+Simulação offline das estratégias do computador contra jogadores sintéticos.
+
+Exemplo:
+    python simulacao.py --rodadas 1000000 --estrategias markov,ngram --processos 4
+"""
+import argparse
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    import numpy as np
+except ImportError:  # a simulação funciona sem NumPy, apenas mais devagar
+    np = None
+
+from bandido import BandidoUCB
+from modelo_jogador import ModeloJogador
+from nucleo import JOGADA_QUE_VENCE, TABELA_RESULTADOS, escolher_jogada
+from preditor_ngram import PreditorNGram
+
+TAMANHO_BLOCO = 65536
+
+
+# =============================
+# Aleatoriedade em blocos
+# =============================
+class AleatorioEmLote:
+    """
+    Fonte de números aleatórios compatível com `random` (random, choice,
+    randrange) que sorteia blocos inteiros de uma vez com NumPy.
+    """
+
+    def __init__(self, semente, bloco=TAMANHO_BLOCO):
+        self.bloco = bloco
+        self._gerador = np.random.default_rng(semente) if np is not None else random.Random(semente)
+        self._valores = []
+        self._posicao = 0
+
+    def _recarregar(self):
+        if np is not None:
+            self._valores = self._gerador.random(self.bloco).tolist()
+        else:
+            self._valores = [self._gerador.random() for _ in range(self.bloco)]
+        self._posicao = 0
+
+    def random(self):
+        if self._posicao >= len(self._valores):
+            self._recarregar()
+        valor = self._valores[self._posicao]
+        self._posicao += 1
+        return valor
+
+    def randrange(self, n):
+        return int(self.random() * n)
+
+    def choice(self, sequencia):
+        return sequencia[int(self.random() * len(sequencia))]
+
+
+# =============================
+# Jogadores sintéticos
+# =============================
+# Cada política recebe a fonte aleatória e devolve uma função
+# proxima(ultima_propria, ultima_computador) -> jogada.
+
+def politica_constante(aleatorio, jogada=0):
+    return lambda propria, computador: jogada
+
+
+def politica_ciclo(aleatorio, sequencia=(0, 1, 2)):
+    estado = {'i': -1}
+
+    def proxima(propria, computador):
+        estado['i'] = (estado['i'] + 1) % len(sequencia)
+        return sequencia[estado['i']]
+    return proxima
+
+
+def politica_copia_ultima(aleatorio):
+    """Repete a última jogada do computador."""
+    return lambda propria, computador: aleatorio.randrange(3) if computador is None else computador
+
+
+def politica_vence_ultima(aleatorio):
+    """Joga o que venceria a última jogada do computador."""
+    return lambda propria, computador: aleatorio.randrange(3) if computador is None else JOGADA_QUE_VENCE[computador]
+
+
+def politica_enviesada(aleatorio, pesos=(0.5, 0.3, 0.2)):
+    limite_pedra, limite_papel = pesos[0], pesos[0] + pesos[1]
+
+    def proxima(propria, computador):
+        valor = aleatorio.random()
+        return 0 if valor < limite_pedra else 1 if valor < limite_papel else 2
+    return proxima
+
+
+def politica_markov(aleatorio):
+    """Cadeia de Markov com matriz de transição sorteada (com uma jogada dominante por linha)."""
+    linhas = []
+    for _ in range(3):
+        pesos = [aleatorio.random() + 0.05 for _ in range(3)]
+        pesos[aleatorio.randrange(3)] += 2.0
+        total = sum(pesos)
+        linhas.append((pesos[0] / total, (pesos[0] + pesos[1]) / total))
+
+    def proxima(propria, computador):
+        if propria is None:
+            return aleatorio.randrange(3)
+        limite_pedra, limite_papel = linhas[propria]
+        valor = aleatorio.random()
+        return 0 if valor < limite_pedra else 1 if valor < limite_papel else 2
+    return proxima
+
+
+def politica_alterna(aleatorio, duracao=100):
+    """Troca de política (sorteada entre as demais) a cada `duracao` rodadas, como quem muda de tática."""
+    estado = {'rodadas': duracao, 'atual': None}
+    opcoes = (politica_constante, politica_ciclo, politica_copia_ultima, politica_vence_ultima, politica_markov)
+
+    def proxima(propria, computador):
+        if estado['rodadas'] >= duracao:
+            criar = opcoes[aleatorio.randrange(len(opcoes))]
+            estado['atual'] = criar(aleatorio, aleatorio.randrange(3)) if criar is politica_constante else criar(aleatorio)
+            estado['rodadas'] = 0
+        estado['rodadas'] += 1
+        return estado['atual'](propria, computador)
+    return proxima
+
+
+POLITICAS = {
+    'constante': politica_constante,
+    'ciclo': politica_ciclo,
+    'copia_ultima': politica_copia_ultima,
+    'vence_ultima': politica_vence_ultima,
+    'enviesada': politica_enviesada,
+    'markov': politica_markov,
+    'alterna': politica_alterna,
+}
+
+
+# =============================
+# Estratégias do servidor
+# =============================
+# Cada estratégia cria (modelo, bandido) por sessão. Sem modelo, é a
+# referência puramente aleatória; sem bandido, a mistura fixa de nucleo.py.
+ESTRATEGIAS = {
+    'aleatoria': lambda: (None, None),
+    'markov': lambda: (ModeloJogador(100), None),
+    'markov_ucb': lambda: (ModeloJogador(100), BandidoUCB()),
+    'ngram': lambda: (PreditorNGram(3), None),
+    'ngram_ucb': lambda: (PreditorNGram(3), BandidoUCB()),
+    'ngram_conjunto': lambda: (PreditorNGram(3, conjunto=True), None),
+}
+
+
+def contar_resultados(jogador, computador):
+    """Retorna [empates, vitórias do jogador, vitórias do computador] das rodadas."""
+    if np is not None:
+        jogadas = np.frombuffer(jogador, dtype=np.uint8).astype(np.intp)
+        respostas = np.frombuffer(computador, dtype=np.uint8).astype(np.intp)
+        codigos = np.asarray(TABELA_RESULTADOS, dtype=np.uint8)[jogadas * 3 + respostas]
+        return np.bincount(codigos, minlength=3).tolist()
+    contagem = [0, 0, 0]
+    for j, c in zip(jogador, computador):
+        contagem[TABELA_RESULTADOS[j * 3 + c]] += 1
+    return contagem
+
+
+def simular(estrategia, politica, rodadas, sessao=1000, semente=0):
+    """
+    Simula `rodadas` rodadas, em sessões de `sessao` rodadas. O modelo do
+    servidor e o jogador sintético são recriados a cada sessão, como um
+    novo jogador no site.
+
+    Returns:
+        tuple: ([empates, vitórias do jogador, vitórias do computador], segundos)
+    """
+    aleatorio = AleatorioEmLote(semente)
+    criar_estrategia = ESTRATEGIAS[estrategia]
+    criar_politica = POLITICAS[politica]
+    jogador = bytearray(rodadas)
+    computador = bytearray(rodadas)
+
+    inicio = time.perf_counter()
+    posicao = 0
+    while posicao < rodadas:
+        fim = min(posicao + sessao, rodadas)
+        modelo, bandido = criar_estrategia()
+        proxima = criar_politica(aleatorio)
+        ultima_propria = ultima_computador = None
+        for i in range(posicao, fim):
+            if modelo is None:
+                jogada_comp = aleatorio.randrange(3)
+            else:
+                jogada_comp, ramo = escolher_jogada(ultima_propria, modelo, aleatorio, bandido)
+            jogada = proxima(ultima_propria, ultima_computador)
+            if modelo is not None:
+                modelo.registrar(jogada, jogada_comp)
+                if bandido is not None:
+                    bandido.registrar(ramo, TABELA_RESULTADOS[jogada * 3 + jogada_comp])
+            jogador[i] = jogada
+            computador[i] = jogada_comp
+            ultima_propria, ultima_computador = jogada, jogada_comp
+        posicao = fim
+    contagem = contar_resultados(jogador, computador)
+    return contagem, time.perf_counter() - inicio
+
+
+def _executar_tarefa(tarefa):
+    estrategia, politica, rodadas, sessao, semente = tarefa
+    contagem, segundos = simular(estrategia, politica, rodadas, sessao, semente)
+    return estrategia, politica, contagem, segundos
+
+
+def torneio(estrategias, politicas, rodadas, sessao=1000, processos=None, semente=0):
+    """
+    Executa todas as combinações estratégia x política, dividindo as rodadas
+    de cada combinação em blocos de sessões distribuídos em um pool de processos.
+
+    Returns:
+        dict: (estrategia, politica) -> {"contagem": [...], "segundos": float}
+    """
+    processos = processos or os.cpu_count() or 1
+    por_bloco = max(sessao, (rodadas // processos) // sessao * sessao)
+    tarefas = []
+    for estrategia in estrategias:
+        for politica in politicas:
+            restantes = rodadas
+            while restantes > 0:
+                quantidade = min(por_bloco, restantes)
+                tarefas.append((estrategia, politica, quantidade, sessao, semente + len(tarefas)))
+                restantes -= quantidade
+
+    resultados = {}
+    with ProcessPoolExecutor(max_workers=processos) as executor:
+        for estrategia, politica, contagem, segundos in executor.map(_executar_tarefa, tarefas):
+            atual = resultados.setdefault((estrategia, politica), {"contagem": [0, 0, 0], "segundos": 0.0})
+            atual["contagem"] = [a + b for a, b in zip(atual["contagem"], contagem)]
+            atual["segundos"] += segundos
+    return resultados
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simula as estratégias do computador contra jogadores sintéticos.")
+    parser.add_argument('--rodadas', type=int, default=1_000_000, help="rodadas por combinação")
+    parser.add_argument('--sessao', type=int, default=1000, help="rodadas por sessão de jogador")
+    parser.add_argument('--estrategias', default=",".join(ESTRATEGIAS), help="lista separada por vírgulas")
+    parser.add_argument('--politicas', default=",".join(POLITICAS), help="lista separada por vírgulas")
+    parser.add_argument('--processos', type=int, default=None, help="padrão: número de CPUs")
+    parser.add_argument('--semente', type=int, default=0)
+    args = parser.parse_args()
+
+    estrategias = args.estrategias.split(",")
+    politicas = args.politicas.split(",")
+    for nome in estrategias:
+        if nome not in ESTRATEGIAS:
+            parser.error(f"estratégia desconhecida: {nome}")
+    for nome in politicas:
+        if nome not in POLITICAS:
+            parser.error(f"política desconhecida: {nome}")
+
+    inicio = time.perf_counter()
+    resultados = torneio(estrategias, politicas, args.rodadas, args.sessao, args.processos, args.semente)
+    total = time.perf_counter() - inicio
+
+    print(f"{'estratégia':<16}{'jogador':<14}{'vitórias':>10}{'empates':>10}{'derrotas':>10}{'rodadas/s':>14}")
+    for (estrategia, politica), dados in resultados.items():
+        empates, derrotas, vitorias = dados["contagem"]  # do ponto de vista do computador
+        rodadas = empates + derrotas + vitorias
+        print(f"{estrategia:<16}{politica:<14}{vitorias / rodadas:>10.1%}{empates / rodadas:>10.1%}"
+              f"{derrotas / rodadas:>10.1%}{rodadas / dados['segundos']:>14,.0f}")
+    rodadas_totais = args.rodadas * len(resultados)
+    print(f"\n{rodadas_totais:,} rodadas em {total:.2f}s ({rodadas_totais / total:,.0f} rodadas/s no total)")
+
+
+if __name__ == "__main__":
+    main()
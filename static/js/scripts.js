@@ -76,15 +76,108 @@ let storageStats = {
 };
 
 // ================== Sons ==================
-const sounds = {
-    click: new Audio('/static/sounds/click.mp3'),
-    win: new Audio('/static/sounds/win.mp3'),
-    lose: new Audio('/static/sounds/lose.mp3'),
-    draw: new Audio('/static/sounds/draw.mp3'),
-    finalWin: new Audio('/static/sounds/final_win.mp3'),
-    finalLose: new Audio('/static/sounds/final_lose.mp3'),
-    finalDraw: new Audio('/static/sounds/final_draw.mp3')
+// Os efeitos vêm de um único arquivo (sprite) descrito em data-sprite:
+// { url, versao, segmentos: { nome: [início, tamanho em bytes] } }.
+// Cada trecho é um MP3 completo, decodificado a partir do mesmo download.
+const audioContainer = document.getElementById('audio-container');
+const SPRITE_SONS = audioContainer && audioContainer.dataset.sprite ? JSON.parse(audioContainer.dataset.sprite) : null;
+const NOMES_SONS = {
+    click: 'click',
+    win: 'win',
+    lose: 'lose',
+    draw: 'draw',
+    finalWin: 'final_win',
+    finalLose: 'final_lose',
+    finalDraw: 'final_draw'
 };
+let audioContext = null;
+const sounds = {}; // preenchido com AudioBuffers por loadSoundSprite()
+
+// ================== Canal WebSocket (opcional) ==================
+// Com flask-sock no servidor, as rodadas vão por uma conexão persistente
+// (data-canal-ws no <body>); sem ele, ou se a conexão cair, usa POST /jogar.
+// Cada conexão ocupa uma thread do servidor: ela só é aberta na primeira
+// jogada e é fechada depois de SOCKET_IDLE_MS sem rodadas.
+const CANAL_WS_URL = document.body.dataset.canalWs || '';
+const SOCKET_IDLE_MS = 30000;
+const SOCKET_RETRY_MS = 30000; // espera após um handshake recusado (servidor no limite de conexões)
+let gameSocket = null;
+let socketConnecting = false;
+let socketIdleTimer = null;
+let socketRetryAt = 0;
+let nextMessageId = 1;
+const pendingRounds = new Map();
+
+function touchGameSocket() {
+    clearTimeout(socketIdleTimer);
+    socketIdleTimer = setTimeout(() => {
+        if (!gameSocket) return;
+        if (pendingRounds.size) {
+            touchGameSocket();
+        } else {
+            gameSocket.close(1000, 'Ocioso');
+        }
+    }, SOCKET_IDLE_MS);
+}
+
+function connectGameSocket() {
+    if (!CANAL_WS_URL || !window.WebSocket) return;
+    if (gameSocket || socketConnecting || Date.now() < socketRetryAt) return;
+    socketConnecting = true;
+    const protocol = location.protocol === 'https:' ? 'wss:' : 'ws:';
+    const socket = new WebSocket(`${protocol}//${location.host}${CANAL_WS_URL}`);
+    let opened = false;
+    socket.addEventListener('open', () => {
+        opened = true;
+        socketConnecting = false;
+        gameSocket = socket;
+        touchGameSocket();
+    });
+    socket.addEventListener('message', event => {
+        let data;
+        try {
+            data = JSON.parse(event.data);
+        } catch (err) {
+            console.error('Mensagem inválida do servidor:', err);
+            return;
+        }
+        const pending = pendingRounds.get(data.id);
+        if (pending) {
+            pendingRounds.delete(data.id);
+            pending.resolve(data);
+        }
+    });
+    socket.addEventListener('close', () => {
+        socketConnecting = false;
+        if (!opened) socketRetryAt = Date.now() + SOCKET_RETRY_MS;
+        if (gameSocket === socket) {
+            gameSocket = null;
+            clearTimeout(socketIdleTimer);
+        }
+        const error = new Error('Conexão do jogo fechada');
+        error.name = 'SocketClosedError';
+        pendingRounds.forEach(pending => pending.reject(error));
+        pendingRounds.clear();
+    });
+}
+
+function playRoundOverSocket(body, timeout) {
+    return new Promise((resolve, reject) => {
+        const id = nextMessageId++;
+        const timeoutId = setTimeout(() => {
+            pendingRounds.delete(id);
+            const error = new Error('Tempo esgotado');
+            error.name = 'AbortError';
+            reject(error);
+        }, timeout);
+        pendingRounds.set(id, {
+            resolve: data => { clearTimeout(timeoutId); resolve(data); },
+            reject: error => { clearTimeout(timeoutId); reject(error); }
+        });
+        gameSocket.send(JSON.stringify({ id, ...body }));
+        touchGameSocket();
+    });
+}
 
 // ================== Segurança: Função para escapar HTML ==================
 // ... existing code ...
@@ -164,14 +257,41 @@ function toggleBackgroundMusic() {
     isMusicPlaying = !isMusicPlaying;
 }
 
+async function loadSoundSprite() {
+    const AudioContextClass = window.AudioContext || window.webkitAudioContext;
+    if (!SPRITE_SONS || !AudioContextClass) return;
+    audioContext = new AudioContextClass();
+    const response = await fetch(SPRITE_SONS.url);
+    if (!response.ok) throw new Error(`HTTP ${response.status}`);
+    const sprite = await response.arrayBuffer();
+    await Promise.all(Object.entries(NOMES_SONS).map(async ([chave, nome]) => {
+        const segmento = SPRITE_SONS.segmentos[nome];
+        if (!segmento) return;
+        const [inicio, tamanho] = segmento;
+        try {
+            // Forma com callbacks: também funciona no webkitAudioContext do Safari antigo
+            sounds[chave] = await new Promise((resolve, reject) =>
+                audioContext.decodeAudioData(sprite.slice(inicio, inicio + tamanho), resolve, reject));
+        } catch (err) {
+            console.error(`Erro ao decodificar o som ${nome}:`, err);
+        }
+    }));
+}
+
 function playGameSound(sound) {
-    if (!sound || !backgroundMusic) return;
+    if (!sound || !audioContext || !backgroundMusic) return;
     const currentMusicVolume = backgroundMusic.volume;
     if (isMusicPlaying) {
         backgroundMusic.volume = VOLUME_MUSICA_REDUZIDO;
     }
-    sound.currentTime = 0;
-    sound.play().catch(err => console.error("Erro ao tocar som:", err));
+    // O contexto começa suspenso até a primeira interação do usuário
+    if (audioContext.state === 'suspended') {
+        audioContext.resume().catch(err => console.error("Erro ao retomar o áudio:", err));
+    }
+    const source = audioContext.createBufferSource();
+    source.buffer = sound;
+    source.connect(audioContext.destination);
+    source.start();
     setTimeout(() => {
         if (isMusicPlaying) {
             backgroundMusic.volume = currentMusicVolume;
@@ -523,30 +643,48 @@ async function sendChoiceToServer(jogadorChoiceIndex, retryCount = 0) {
             throw new Error(OFFLINE_MESSAGE);
         }
 
-        const controller = new AbortController();
-        const timeoutId = setTimeout(() => controller.abort(), TIMEOUT);
-
-        const response = await fetch('/jogar', {
-            method: 'POST',
-            headers: {
-                'Content-Type': 'application/json',
-                'X-Requested-With': 'XMLHttpRequest'
-            },
-            body: JSON.stringify({
-                jogador: jogadorChoiceIndex,
-                ultimo_jogador: ultimoJogador
-            }),
-            signal: controller.signal
-        });
+        const body = {
+            jogador: jogadorChoiceIndex,
+            ultimo_jogador: ultimoJogador
+        };
+        let data;
 
-        clearTimeout(timeoutId);
+        if (gameSocket && gameSocket.readyState === WebSocket.OPEN) {
+            data = await playRoundOverSocket(body, TIMEOUT);
+            if (data.error) {
+                throw new Error(data.error);
+            }
+        } else {
+            // Abre o canal em segundo plano para as próximas rodadas
+            connectGameSocket();
+            const controller = new AbortController();
+            const timeoutId = setTimeout(() => controller.abort(), TIMEOUT);
+
+            const response = await fetch('/jogar', {
+                method: 'POST',
+                headers: {
+                    'Content-Type': 'application/json',
+                    'X-Requested-With': 'XMLHttpRequest'
+                },
+                body: JSON.stringify(body),
+                signal: controller.signal
+            });
+
+            clearTimeout(timeoutId);
+
+            if (!response.ok) {
+                const errorData = await response.json();
+                const error = new Error(errorData.error || `Erro HTTP: ${response.status}`);
+                // Servidor sobrecarregado: tenta de novo após o Retry-After
+                if (response.status === 503) {
+                    error.name = 'ServerBusyError';
+                    error.retryAfter = parseInt(response.headers.get('Retry-After'), 10) || 1;
+                }
+                throw error;
+            }
 
-        if (!response.ok) {
-            const errorData = await response.json();
-            throw new Error(errorData.error || `Erro HTTP: ${response.status}`);
+            data = await response.json();
         }
-
-        const data = await response.json();
         ultimoJogador = jogadorChoiceIndex;
 
         showJokenpoAnimation(jogadorChoiceIndex, data.jogada_computador, () => {
@@ -560,6 +698,13 @@ async function sendChoiceToServer(jogadorChoiceIndex, retryCount = 0) {
         });
     } catch (error) {
         console.error("Erro ao processar jogada:", error);
+
+        // Conexão WebSocket caiu no meio da rodada: repete pelo POST, sem contar como tentativa
+        if (error.name === 'SocketClosedError') {
+            setLoadingState(false);
+            sendChoiceToServer(jogadorChoiceIndex, retryCount);
+            return;
+        }
         
         if (error.name === 'AbortError') {
             showFeedback('A conexão está muito lenta. Tentando novamente...');
@@ -567,7 +712,12 @@ async function sendChoiceToServer(jogadorChoiceIndex, retryCount = 0) {
             showFeedback(error.message);
         }
 
-        if (retryCount < MAX_RETRIES && (error.name === 'AbortError' || !navigator.onLine)) {
+        if (retryCount < MAX_RETRIES && error.name === 'ServerBusyError') {
+            setTimeout(() => {
+                setLoadingState(false);
+                sendChoiceToServer(jogadorChoiceIndex, retryCount + 1);
+            }, 1000 * error.retryAfter);
+        } else if (retryCount < MAX_RETRIES && (error.name === 'AbortError' || !navigator.onLine)) {
             setTimeout(() => {
                 sendChoiceToServer(jogadorChoiceIndex, retryCount + 1);
             }, 1000 * (retryCount + 1)); // Backoff exponencial
@@ -637,6 +787,8 @@ document.addEventListener('DOMContentLoaded', async () => {
         }
         
         await checkAudioFiles();
+        // Os sons carregam em segundo plano, sem atrasar o início do jogo
+        loadSoundSprite().catch(err => console.error('Erro ao carregar os sons:', err));
         initializeGame();
         initBackgroundMusic();
     } catch (error) {
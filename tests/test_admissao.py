@@ -0,0 +1,125 @@
+import pytest
+
+import app as modulo
+from admissao import CONEXOES, ControleAdmissao, LimiteConexoes, MiddlewareAdmissao, MiddlewareConexoes
+
+
+@pytest.fixture
+def cliente(tmp_path, monkeypatch):
+    monkeypatch.setattr(modulo, 'ADMISSAO_ATIVA', True)
+    monkeypatch.setattr(modulo, 'INTERVALO_MIN_JOGADAS', 0.0)
+    aplicativo = modulo.create_app({
+        'RATELIMIT_ENABLED': False,
+        'HISTORICO_ARQUIVO': str(tmp_path / 'historico.db'),
+        'LOG_RODADAS_ARQUIVO': str(tmp_path / 'rodadas.bin'),
+        'INSTANTANEO_ARQUIVO': '',
+    })
+    return aplicativo.test_client()
+
+
+def test_requisicoes_sequenciais_com_admissao(cliente):
+    # O cliente de teste não fecha as respostas: a vaga tem de ser liberada no fim do corpo
+    for i in range(10):
+        resposta = cliente.post('/jogar', json={'jogador': i % 3, 'ultimo_jogador': (i - 1) % 3},
+                                base_url='https://localhost')
+        assert 'resultado' in resposta.get_json()
+        assert resposta.status_code == 200
+    situacao = cliente.application.extensions['admissao'].situacao()
+    assert situacao['em_andamento'] == 0
+    assert situacao['recusadas'] == {}
+
+
+def test_vaga_liberada_uma_vez_no_fim_do_corpo_e_no_close():
+    controle = ControleAdmissao(max_em_andamento=1, max_fila=0)
+
+    def app_wsgi(environ, start_response):
+        start_response("200 OK", [])
+        return [b"a", b"b"]
+
+    middleware = MiddlewareAdmissao(app_wsgi, controle)
+    corpo = middleware({'PATH_INFO': '/jogar'}, lambda status, cabecalhos: None)
+    assert controle.situacao()['em_andamento'] == 1
+    assert b"".join(corpo) == b"ab"
+    assert controle.situacao()['em_andamento'] == 0
+    corpo.close()  # não libera de novo
+    assert controle.situacao()['em_andamento'] == 0
+
+    # Fechada sem ler o corpo: libera no close
+    corpo = middleware({'PATH_INFO': '/jogar'}, lambda status, cabecalhos: None)
+    corpo.close()
+    assert controle.situacao()['em_andamento'] == 0
+
+
+def test_admissao_desligada_em_testes(tmp_path, monkeypatch):
+    monkeypatch.setattr(modulo, 'ADMISSAO_ATIVA', True)
+    aplicativo = modulo.create_app({
+        'TESTING': True,
+        'RATELIMIT_ENABLED': False,
+        'HISTORICO_ARQUIVO': str(tmp_path / 'historico.db'),
+        'LOG_RODADAS_ARQUIVO': str(tmp_path / 'rodadas.bin'),
+        'INSTANTANEO_ARQUIVO': '',
+    })
+    assert 'admissao' not in aplicativo.extensions
+
+
+UPGRADE = {'PATH_INFO': '/ws/jogar', 'HTTP_UPGRADE': 'websocket'}
+
+
+def test_limite_de_conexoes_websocket():
+    limite = LimiteConexoes(1)
+    abertas = []
+
+    def app_wsgi(environ, start_response):
+        abertas.append(limite.situacao()['abertas'])
+        start_response("200 OK", [])
+        return [b""]
+
+    status = []
+    middleware = MiddlewareConexoes(app_wsgi, limite)
+    primeira = middleware(dict(UPGRADE), lambda s, cabecalhos: status.append(s))
+    # A segunda conexão simultânea é recusada antes do app
+    middleware(dict(UPGRADE), lambda s, cabecalhos: status.append(s))
+    assert status == ["200 OK", "503 Service Unavailable"]
+    assert abertas == [1]
+    assert limite.situacao() == {'abertas': 1, 'maximo': 1, 'recusadas': 1}
+    primeira.close()
+    assert limite.situacao()['abertas'] == 0
+    # Requisições comuns não contam
+    middleware({'PATH_INFO': '/jogar'}, lambda s, cabecalhos: None)
+    assert limite.situacao()['abertas'] == 0
+
+
+def test_conexao_liberada_quando_o_app_encerra_com_excecao():
+    # O flask-sock encerra a requisição no gunicorn com StopIteration
+    recusas = []
+    limite = LimiteConexoes(1, ao_recusar=recusas.append)
+
+    def app_wsgi(environ, start_response):
+        raise StopIteration()
+
+    middleware = MiddlewareConexoes(app_wsgi, limite)
+    for _ in range(3):
+        with pytest.raises(StopIteration):
+            middleware(dict(UPGRADE), lambda s, cabecalhos: None)
+    assert limite.situacao()['abertas'] == 0
+    assert recusas == []
+    LimiteConexoes(0, ao_recusar=recusas.append).entrar()
+    assert recusas == [CONEXOES]
+
+
+def test_handshake_recusado_acima_do_limite(tmp_path, monkeypatch):
+    pytest.importorskip("flask_sock")
+    monkeypatch.setattr(modulo, 'WS_MAX_CONEXOES', 0)
+    aplicativo = modulo.create_app({
+        'TESTING': True,
+        'HISTORICO_ARQUIVO': str(tmp_path / 'historico.db'),
+        'LOG_RODADAS_ARQUIVO': str(tmp_path / 'rodadas.bin'),
+        'INSTANTANEO_ARQUIVO': '',
+    })
+    resposta = aplicativo.test_client().get('/ws/jogar', base_url='https://localhost', headers={
+        'Upgrade': 'websocket', 'Connection': 'Upgrade', 'Sec-WebSocket-Key': 'dGhlIHNhbXBsZSBub25jZQ==',
+        'Sec-WebSocket-Version': '13',
+    })
+    assert resposta.status_code == 503
+    assert resposta.headers['Retry-After'] == '30'
+    assert aplicativo.extensions['conexoes_ws'].situacao()['recusadas'] == 1
@@ -0,0 +1,84 @@
+import pytest
+
+from armazem_ttl import ArmazemTTL
+
+
+class Relogio:
+    """Relógio manual para controlar a expiração nos testes."""
+
+    def __init__(self):
+        self.agora = 0.0
+
+    def __call__(self):
+        return self.agora
+
+
+def test_entrada_expira_no_prazo():
+    relogio = Relogio()
+    armazem = ArmazemTTL(10, 5.0, relogio=relogio)
+    armazem.definir("a", 1)
+    armazem.definir("b", 2, ttl=1.0)
+    relogio.agora = 0.99
+    assert armazem.obter("b") == 2
+    relogio.agora = 1.0
+    assert armazem.obter("b") is None
+    assert "b" not in armazem
+    assert armazem.obter("a") == 1
+    # A leitura só ignora a entrada vencida; a escrita seguinte a remove
+    assert len(armazem) == 2
+    armazem.definir("c", 3)
+    assert len(armazem) == 2
+    assert armazem.expirados == 1
+    relogio.agora = 5.0
+    armazem.expirar()
+    assert len(armazem) == 1
+    assert [chave for chave, _, _ in armazem.itens()] == ["c"]
+
+
+def test_capacidade_despeja_a_mais_proxima_de_expirar():
+    relogio = Relogio()
+    armazem = ArmazemTTL(3, 60.0, relogio=relogio)
+    armazem.definir("longa", 1, ttl=100.0)
+    armazem.definir("curta", 2, ttl=10.0)
+    armazem.definir("media", 3, ttl=50.0)
+    armazem.definir("nova", 4)
+    assert len(armazem) == 3
+    assert "curta" not in armazem
+    assert armazem.despejados == 1
+    # Regravar uma chave existente não despeja ninguém
+    armazem.definir("longa", 5, ttl=1.0)
+    assert len(armazem) == 3
+    assert armazem.despejados == 1
+    # O prazo antigo de "longa" ficou obsoleto no heap: o despejo usa o novo
+    armazem.definir("outra", 6)
+    assert "longa" not in armazem
+    assert {"media", "nova", "outra"} == {chave for chave, _, _ in armazem.itens()}
+
+
+def test_incrementar_mantem_o_prazo_da_criacao():
+    relogio = Relogio()
+    armazem = ArmazemTTL(10, 60.0, relogio=relogio)
+    assert armazem.incrementar("tentativas", ttl=10.0) == 1
+    relogio.agora = 9.0
+    assert armazem.incrementar("tentativas", ttl=10.0) == 2
+    relogio.agora = 10.0
+    # O prazo conta da criação: vencido, o contador recomeça
+    assert armazem.incrementar("tentativas", ttl=10.0) == 1
+
+
+def test_heap_compactado_com_regravacoes():
+    relogio = Relogio()
+    armazem = ArmazemTTL(100, 60.0, relogio=relogio)
+    for indice in range(10000):
+        armazem.definir(indice % 10, indice)
+    assert len(armazem) == 10
+    # Prazos obsoletos não se acumulam indefinidamente
+    assert armazem.estatisticas()["prazos_pendentes"] <= 2 * 10 + 64 + 1
+    armazem.remover(3)
+    assert 3 not in armazem
+    assert armazem.obter(9) == 9999
+
+
+def test_capacidade_invalida():
+    with pytest.raises(ValueError):
+        ArmazemTTL(0, 1.0)
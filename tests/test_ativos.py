@@ -0,0 +1,52 @@
+import os
+
+from ativos import ManifestoAtivos
+
+
+def _publicados(pasta):
+    saida = os.path.join(pasta, "dist")
+    return sorted(
+        os.path.relpath(os.path.join(raiz, arquivo), saida).replace(os.sep, "/")
+        for raiz, _, arquivos in os.walk(saida) for arquivo in arquivos
+    )
+
+
+def _escrever(caminho, texto):
+    with open(caminho, "w", encoding="utf-8") as arquivo:
+        arquivo.write(texto)
+    # Garante uma assinatura (mtime, tamanho) diferente a cada gravação
+    info = os.stat(caminho)
+    os.utime(caminho, ns=(info.st_atime_ns, info.st_mtime_ns + 1_000_000_000))
+
+
+def test_copias_antigas_removidas_de_dist(tmp_path):
+    pasta = str(tmp_path)
+    os.makedirs(os.path.join(pasta, "css"))
+    estilo = os.path.join(pasta, "css", "estilo.css")
+    _escrever(estilo, "body { color: red; }\n" * 40)
+    manifesto = ManifestoAtivos(pasta, intervalo_verificacao=0, retencao=0)
+    manifesto.construir()
+    primeiro = manifesto.nome_hash("css/estilo.css")
+    assert primeiro + ".gz" in _publicados(pasta)
+
+    for cor in ("blue", "green", "black"):
+        _escrever(estilo, f"body {{ color: {cor}; }}\n" * 40)
+        assert manifesto.construir()
+    atual = manifesto.obter_original("css/estilo.css")
+    # Só a versão vigente (e suas variantes) fica em dist/
+    esperados = [atual.nome_hash] + [os.path.relpath(caminho, os.path.join(pasta, "dist")).replace(os.sep, "/")
+                                     for caminho in atual.variantes.values()]
+    assert _publicados(pasta) == sorted(esperados)
+
+
+def test_copias_recentes_mantidas_durante_a_retencao(tmp_path):
+    pasta = str(tmp_path)
+    arquivo = os.path.join(pasta, "app.js")
+    _escrever(arquivo, "console.log(1);\n")
+    manifesto = ManifestoAtivos(pasta, intervalo_verificacao=0, retencao=3600)
+    manifesto.construir()
+    anterior = manifesto.nome_hash("app.js")
+    _escrever(arquivo, "console.log(2);\n")
+    manifesto.construir()
+    # Páginas já entregues ainda podem pedir a versão anterior
+    assert _publicados(pasta) == sorted([anterior, manifesto.nome_hash("app.js")])
@@ -0,0 +1,99 @@
+import time
+
+import pytest
+
+from backends_estado import BackendMemoria, BackendRedis, BackendSQLite
+
+
+@pytest.fixture(params=["memoria", "sqlite", "redis"])
+def backend(request, tmp_path):
+    if request.param == "memoria":
+        return BackendMemoria(capacidade_padrao=100, capacidades={"modelo": 2}, ttl_padrao=60)
+    if request.param == "sqlite":
+        return BackendSQLite(str(tmp_path / "estado.db"))
+    fakeredis = pytest.importorskip("fakeredis")
+    return BackendRedis(cliente=fakeredis.FakeRedis())
+
+
+def test_lote_retorna_os_resultados_em_ordem(backend):
+    resultados = backend.lote([
+        ("obter", "acesso:10.0.0.1"),
+        ("definir", "acesso:10.0.0.1", b"valor", 60),
+        ("incrementar", "tentativas:10.0.0.1", 60),
+        ("obter", "acesso:10.0.0.1"),
+        ("incrementar", "tentativas:10.0.0.1", 60),
+        ("remover", "acesso:10.0.0.1"),
+        ("obter", "acesso:10.0.0.1"),
+    ])
+    assert resultados == [None, None, 1, b"valor", 2, None, None]
+
+
+def test_incrementar_define_o_prazo_so_na_criacao(backend):
+    assert backend.lote([("incrementar", "tentativas:x", 0.2)]) == [1]
+    time.sleep(0.1)
+    assert backend.lote([("incrementar", "tentativas:x", 60)]) == [2]
+    time.sleep(0.15)
+    # O prazo da criação venceu: o contador recomeça
+    assert backend.lote([("incrementar", "tentativas:x", 60)]) == [1]
+
+
+def test_definir_expira(backend):
+    backend.lote([("definir", "bloqueio:y", b"1", 0.05), ("definir", "acesso:y", b"2", 60)])
+    time.sleep(0.1)
+    assert backend.lote([("obter", "bloqueio:y"), ("obter", "acesso:y")]) == [None, b"2"]
+
+
+def test_operacao_desconhecida(backend):
+    with pytest.raises(ValueError):
+        backend.lote([("trocar", "acesso:z")])
+
+
+def test_memoria_capacidade_por_espaco():
+    backend = BackendMemoria(capacidade_padrao=100, capacidades={"modelo": 2}, ttl_padrao=60)
+    backend.lote([("definir", f"modelo:{indice}", indice, 60 + indice) for indice in range(3)])
+    backend.lote([("definir", f"acesso:{indice}", indice, 60) for indice in range(3)])
+    estatisticas = backend.estatisticas()
+    assert estatisticas["modelo"]["tamanho"] == 2
+    assert estatisticas["modelo"]["despejados"] == 1
+    assert estatisticas["acesso"]["tamanho"] == 3
+    # Valores em memória não são serializados; o despejado foi o mais próximo de expirar
+    assert sorted(valor for _, valor, _ in backend.itens("modelo")) == [1, 2]
+    assert backend.itens("bandido") == []
+
+
+def test_sqlite_compartilhado_entre_instancias(tmp_path):
+    caminho = str(tmp_path / "estado.db")
+    primeiro, segundo = BackendSQLite(caminho), BackendSQLite(caminho)
+    primeiro.lote([("definir", "modelo:a", b"\x01\x02", 60), ("incrementar", "tentativas:a", 60)])
+    assert segundo.lote([("obter", "modelo:a"), ("incrementar", "tentativas:a", 60)]) == [b"\x01\x02", 2]
+    assert segundo.estatisticas()["chaves"] == 2
+
+
+def test_sqlite_lote_com_erro_desfaz_a_transacao(tmp_path):
+    backend = BackendSQLite(str(tmp_path / "estado.db"))
+    with pytest.raises(ValueError):
+        backend.lote([("definir", "acesso:a", b"1", 60), ("trocar", "acesso:a")])
+    assert backend.lote([("obter", "acesso:a")]) == [None]
+
+
+def test_redis_um_pipeline_por_lote_com_prefixo():
+    fakeredis = pytest.importorskip("fakeredis")
+    cliente = fakeredis.FakeRedis()
+    backend = BackendRedis(cliente=cliente, prefixo="teste:")
+    execucoes = []
+    pipeline_original = cliente.pipeline
+
+    def pipeline(*args, **kwargs):
+        execucoes.append(kwargs)
+        return pipeline_original(*args, **kwargs)
+
+    cliente.pipeline = pipeline
+    assert backend.lote([
+        ("definir", "modelo:a", b"m", 60),
+        ("incrementar", "tentativas:a", 60),
+        ("obter", "modelo:a"),
+    ]) == [None, 1, b"m"]
+    assert execucoes == [{"transaction": False}]
+    assert sorted(cliente.keys()) == [b"teste:modelo:a", b"teste:tentativas:a"]
+    assert 0 < cliente.pttl("teste:tentativas:a") <= 60000
+    assert backend.estatisticas() == {"chaves": 2}
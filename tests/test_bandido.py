@@ -0,0 +1,83 @@
+import pytest
+
+from bandido import TIPO_BANDIDO, BandidoUCB
+from nucleo import EMPATE, VITORIA_COMPUTADOR, VITORIA_JOGADOR
+
+BRACOS = ("contra_padrao", "vence_ultima", "contra_ciclo")
+
+
+def test_bracos_nao_usados_primeiro_na_ordem():
+    bandido = BandidoUCB(BRACOS)
+    escolhidos = []
+    for _ in BRACOS:
+        escolhido = bandido.escolher()
+        escolhidos.append(escolhido)
+        bandido.registrar(escolhido, EMPATE)
+    assert escolhidos == list(BRACOS)
+
+
+def test_converge_para_o_braco_que_vence():
+    bandido = BandidoUCB(BRACOS)
+    resultados = {"contra_padrao": VITORIA_JOGADOR, "vence_ultima": VITORIA_COMPUTADOR, "contra_ciclo": EMPATE}
+    for _ in range(300):
+        escolhido = bandido.escolher()
+        bandido.registrar(escolhido, resultados[escolhido])
+    usos, _ = bandido.contagens()
+    assert usos[1] > 0.8 * sum(usos)
+    assert bandido.medias() == {"contra_padrao": 0.0, "vence_ultima": 1.0, "contra_ciclo": 0.5}
+    assert len(bandido) == 300
+
+
+def test_ramo_fora_dos_bracos_ignorado():
+    bandido = BandidoUCB(BRACOS)
+    bandido.registrar("aleatoria_inicial", VITORIA_COMPUTADOR)
+    assert len(bandido) == 0
+    assert bandido.contagens() == ([0.0] * 3, [0.0] * 3)
+
+
+def test_desconto_esquece_as_rodadas_antigas():
+    bandido = BandidoUCB(BRACOS, desconto=0.5)
+    for _ in range(2000):  # escala passa de 1e100 e é renormalizada
+        bandido.registrar("contra_padrao", VITORIA_JOGADOR)
+    bandido.registrar("vence_ultima", VITORIA_COMPUTADOR)
+    usos, somas = bandido.contagens()
+    # Série geométrica: o peso de contra_padrao tendia a 2 e caiu à metade com a última rodada
+    assert usos[0] == pytest.approx(1.0)
+    assert usos[1] == pytest.approx(1.0)
+    assert somas == pytest.approx([0.0, 1.0, 0.0])
+
+
+def test_para_bytes_e_de_volta():
+    bandido = BandidoUCB(BRACOS, desconto=0.9)
+    for ramo, codigo in (("contra_padrao", VITORIA_COMPUTADOR), ("vence_ultima", EMPATE),
+                         ("contra_padrao", VITORIA_JOGADOR), ("contra_ciclo", VITORIA_COMPUTADOR)):
+        bandido.registrar(ramo, codigo)
+    dados = bandido.para_bytes()
+    assert dados[0] == TIPO_BANDIDO
+    assert len(dados) == 2 + 8 * len(BRACOS)
+    copia = BandidoUCB.de_bytes(dados, bracos=BRACOS, desconto=0.9)
+    for original, restaurado in zip(bandido.contagens(), copia.contagens()):
+        assert restaurado == pytest.approx(original, rel=1e-6)
+    assert copia.escolher() == bandido.escolher()
+
+
+def test_de_bytes_com_outros_bracos_recomeca():
+    bandido = BandidoUCB(BRACOS)
+    bandido.registrar("contra_padrao", VITORIA_COMPUTADOR)
+    copia = BandidoUCB.de_bytes(bandido.para_bytes(), bracos=BRACOS[:2])
+    assert len(copia) == 0
+
+
+def test_de_bytes_tipo_errado():
+    with pytest.raises(ValueError):
+        BandidoUCB.de_bytes(bytes([TIPO_BANDIDO + 1, 3]) + bytes(24), bracos=BRACOS)
+
+
+def test_a_priori_com_peso_por_braco():
+    bandido = BandidoUCB.a_priori([10, 0, 4], [8.0, 0.0, 1.0], peso=2.0, bracos=BRACOS)
+    usos, somas = bandido.contagens()
+    assert usos == [2.0, 0.0, 2.0]
+    assert somas == pytest.approx([1.6, 0.0, 0.5])
+    assert len(bandido) == 4
+    # O braço sem histórico é explorado primeiro
+    assert bandido.escolher() == "vence_ultima"
@@ -0,0 +1,31 @@
+import gc
+
+import historico_rodadas
+from historico_rodadas import TOTAL, HistoricoRodadas
+
+
+def test_encerramento_nao_mantem_historicos_descartados(tmp_path):
+    caminho = str(tmp_path / "historico.db")
+    descartado = HistoricoRodadas(caminho)
+    assert descartado in historico_rodadas._abertos
+    del descartado
+    gc.collect()
+    assert not any(historico.caminho == caminho for historico in historico_rodadas._abertos)
+
+    historico = HistoricoRodadas(caminho, intervalo=60)
+    historico.registrar("ab" * 16, [(0, 2, 1), (1, 1, 0)])
+    historico.fechar()
+    # Fechado, sai do encerramento e já gravou o que estava pendente
+    assert historico not in historico_rodadas._abertos
+    assert historico.pendentes() == 0
+    assert HistoricoRodadas(caminho).estatisticas(TOTAL)["total"] == 2
+
+
+def test_fechar_abertos_grava_os_pendentes(tmp_path):
+    caminho = str(tmp_path / "historico.db")
+    historico = HistoricoRodadas(caminho, intervalo=60)
+    historico.registrar("cd" * 16, [(2, 1, 1)])
+    historico_rodadas._fechar_abertos()
+    assert historico.pendentes() == 0
+    assert not historico_rodadas._abertos
+    assert historico.estatisticas("cd" * 16)["vitorias"] == 1
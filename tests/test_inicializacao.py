@@ -0,0 +1,44 @@
+import os
+import subprocess
+import sys
+
+from conftest import RAIZ
+
+# Executado em um processo novo: só o import, sem criar o aplicativo
+SCRIPT_IMPORT = """
+import sys
+import app
+print(sorted(nome for nome in ('redis', 'flask_limiter', 'numpy') if nome in sys.modules))
+"""
+
+
+def test_import_nao_cria_o_backend_de_estado(tmp_path):
+    arquivo = tmp_path / "estado.db"
+    saida = subprocess.run(
+        [sys.executable, "-c", SCRIPT_IMPORT], cwd=tmp_path, capture_output=True, text=True, check=True,
+        env={**os.environ, "PYTHONPATH": RAIZ, "JOKENPO_BACKEND_ESTADO": "sqlite",
+             "JOKENPO_SQLITE_ESTADO": str(arquivo)},
+    ).stdout
+    assert not arquivo.exists()
+    assert saida.strip() == "[]"
+
+
+def test_backend_criado_por_aplicativo(tmp_path, monkeypatch):
+    import app as modulo
+    from backends_estado import BackendSQLite
+
+    monkeypatch.setenv("JOKENPO_BACKEND_ESTADO", "sqlite")
+    monkeypatch.setenv("JOKENPO_SQLITE_ESTADO", str(tmp_path / "estado.db"))
+    aplicativo = modulo.create_app({
+        'TESTING': True,
+        'HISTORICO_ARQUIVO': str(tmp_path / 'historico.db'),
+        'LOG_RODADAS_ARQUIVO': str(tmp_path / 'rodadas.bin'),
+        'INSTANTANEO_ARQUIVO': '',
+    })
+    assert isinstance(aplicativo.extensions['estado'], BackendSQLite)
+    assert (tmp_path / "estado.db").exists()
+    # Cada aplicativo tem o próprio backend
+    monkeypatch.setenv("JOKENPO_BACKEND_ESTADO", "memoria")
+    outro = modulo.create_app({'TESTING': True, 'HISTORICO_ARQUIVO': str(tmp_path / 'historico.db'),
+                               'LOG_RODADAS_ARQUIVO': str(tmp_path / 'rodadas.bin'), 'INSTANTANEO_ARQUIVO': ''})
+    assert outro.extensions['estado'] is not aplicativo.extensions['estado']
@@ -0,0 +1,35 @@
+import gc
+
+import instantaneo_modelos
+from instantaneo_modelos import InstantaneoModelos
+
+JOGADOR = "ab" * 16
+
+
+def _coletar():
+    return [(JOGADOR, 2e9, b"modelo", b"bandido")], b"priori"
+
+
+def test_encerramento_nao_mantem_instantaneos_descartados(tmp_path):
+    caminho = str(tmp_path / "modelos.bin")
+    descartado = InstantaneoModelos(caminho, _coletar, agora=lambda: 1e9)
+    assert descartado in instantaneo_modelos._abertos
+    del descartado
+    gc.collect()
+    assert not any(instantaneo.caminho == caminho for instantaneo in instantaneo_modelos._abertos)
+
+
+def test_fechar_abertos_grava_o_ultimo_instantaneo(tmp_path):
+    caminho = str(tmp_path / "modelos.bin")
+    instantaneo = InstantaneoModelos(caminho, _coletar, intervalo=60, agora=lambda: 1e9)
+    instantaneo.observar()
+    instantaneo_modelos._fechar_abertos()
+    assert not instantaneo_modelos._abertos
+    assert instantaneo.gravacoes == 1
+    relido = InstantaneoModelos(caminho, _coletar, agora=lambda: 1e9)
+    assert relido.obter(JOGADOR) == (b"modelo", b"bandido")
+    assert relido.priori == b"priori"
+    relido.fechar()
+    assert relido not in instantaneo_modelos._abertos
+    # Sem a thread neste processo, fechar não grava
+    assert relido.gravacoes == 0
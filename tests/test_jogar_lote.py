@@ -0,0 +1,43 @@
+import pytest
+
+import app as modulo
+
+
+@pytest.fixture
+def cliente(tmp_path, monkeypatch):
+    monkeypatch.setattr(modulo, 'INTERVALO_MIN_JOGADAS', 0.0)
+    aplicativo = modulo.create_app({
+        'TESTING': True,
+        'HISTORICO_ARQUIVO': str(tmp_path / 'historico.db'),
+        'LOG_RODADAS_ARQUIVO': str(tmp_path / 'rodadas.bin'),
+        'INSTANTANEO_ARQUIVO': '',
+    })
+    return aplicativo.test_client()
+
+
+def _lote(cliente, jogadas):
+    return cliente.post('/jogar/lote', json={'jogadas': jogadas}, base_url='https://localhost')
+
+
+def test_lote_maximo_cabe_no_menor_limite_por_rodada():
+    # Cada rodada conta no limite por IP: acima do menor, o lote seria sempre 429
+    from limits import parse_many
+    menor = min(limite.amount for texto in modulo.LIMITES_PADRAO for limite in parse_many(texto))
+    assert modulo.MAX_JOGADAS_LOTE <= menor
+
+
+def test_lote_grande_demais_nao_esgota_o_limite(cliente):
+    resposta = _lote(cliente, [0] * (modulo.MAX_JOGADAS_LOTE + 10))
+    assert resposta.status_code == 400
+    # A recusa custou uma rodada: o lote máximo seguinte ainda passa
+    resposta = _lote(cliente, [1] * (modulo.MAX_JOGADAS_LOTE - 1))
+    assert resposta.status_code == 200
+    assert len(resposta.get_json()['rodadas']) == modulo.MAX_JOGADAS_LOTE - 1
+    # Agora a janela está cheia
+    assert _lote(cliente, [2]).status_code == 429
+
+
+def test_lote_nao_objeto(cliente):
+    resposta = cliente.post('/jogar/lote', json="0,1,2", base_url='https://localhost')
+    assert resposta.status_code == 400
+    assert resposta.get_json() == {'error': 'Campo jogadas é obrigatório'}
@@ -0,0 +1,57 @@
+import gc
+import os
+import time
+
+import log_rodadas
+from log_rodadas import CABECALHO, REGISTRO, LogRodadas, ler_rodadas, resumir_rodadas
+
+
+def test_buffer_gravado_no_prazo_sem_novas_rodadas(tmp_path):
+    caminho = str(tmp_path / "rodadas.bin")
+    log = LogRodadas(caminho, intervalo=0.1)
+    log.registrar("ab" * 16, [(0, 1, 2, "contra_padrao"), (2, 2, 0, "aleatoria")])
+    assert os.path.getsize(caminho) == CABECALHO.size  # ainda no buffer
+
+    prazo = time.monotonic() + 5
+    while os.path.getsize(caminho) == CABECALHO.size and time.monotonic() < prazo:
+        time.sleep(0.02)
+    assert os.path.getsize(caminho) == CABECALHO.size + 2 * REGISTRO.size
+
+    # Um novo bloco depois da gravação também respeita o prazo
+    log.registrar("ab" * 16, [(1, 1, 0, "vence_ultima")])
+    prazo = time.monotonic() + 5
+    while os.path.getsize(caminho) == CABECALHO.size + 2 * REGISTRO.size and time.monotonic() < prazo:
+        time.sleep(0.02)
+    assert os.path.getsize(caminho) == CABECALHO.size + 3 * REGISTRO.size
+
+
+def test_fechar_grava_e_sai_do_encerramento(tmp_path):
+    caminho = str(tmp_path / "rodadas.bin")
+    descartado = LogRodadas(caminho)
+    assert descartado in log_rodadas._abertos
+    del descartado
+    gc.collect()
+    assert not any(log.caminho == caminho for log in log_rodadas._abertos)
+
+    log = LogRodadas(caminho, intervalo=60)
+    log.registrar("cd" * 16, [(1, 0, 1, "contra_padrao")])
+    log.fechar()
+    assert log not in log_rodadas._abertos
+    assert os.path.getsize(caminho) == CABECALHO.size + REGISTRO.size
+    rodadas, mapa = ler_rodadas(caminho)
+    try:
+        assert resumir_rodadas(rodadas)["resultados"]["vitorias_jogador"] == 1
+    finally:
+        del rodadas
+        mapa.close()
+    # A thread do prazo também termina
+    assert not log._thread.is_alive()
+
+
+def test_fechar_abertos_grava_os_buffers(tmp_path):
+    caminho = str(tmp_path / "rodadas.bin")
+    log = LogRodadas(caminho, intervalo=60)
+    log.registrar("ef" * 16, [(2, 1, 1, "aleatoria")] * 3)
+    log_rodadas._fechar_abertos()
+    assert not log_rodadas._abertos
+    assert os.path.getsize(caminho) == CABECALHO.size + 3 * REGISTRO.size
@@ -0,0 +1,40 @@
+import io
+import random
+
+import pytest
+
+from main import ler_jogadas
+
+
+def _ler(texto, tamanho_bloco):
+    invalidas = [0]
+    jogadas = list(ler_jogadas(io.StringIO(texto), invalidas, tamanho_bloco))
+    return jogadas, invalidas[0]
+
+
+@pytest.mark.parametrize("texto", [
+    "0123 pedra",
+    "012\n1\n2,0;1 papel tesoura",
+    "2pedra papel1 PEDRA x 9 tesouras",
+    "01" * 50 + "3" + "20" * 50,
+    "a" * 40 + " 1 " + "b" * 20 + "2" + "ped",
+    "pedra²papel 1٣2",
+])
+def test_resultado_nao_depende_do_tamanho_do_bloco(texto):
+    esperado = _ler(texto, len(texto) + 1)
+    for tamanho_bloco in (1, 2, 3, 4, 5, 7, 16, 17, 64):
+        assert _ler(texto, tamanho_bloco) == esperado, tamanho_bloco
+
+
+def test_digitos_invalidos_contados_um_a_um():
+    assert _ler("0123 pedra", 3) == ([0, 1, 2, 0], 1)
+    assert _ler("0123 pedra", 100) == ([0, 1, 2, 0], 1)
+
+
+def test_entrada_aleatoria_com_varios_blocos():
+    gerador = random.Random(0)
+    pedacos = ["0", "1", "2", "3", "9", "pedra", "Papel", "tesoura", "xyz", " ", "\n", ",", ";", "a" * 20]
+    texto = "".join(gerador.choice(pedacos) for _ in range(3000))
+    esperado = _ler(texto, len(texto) + 1)
+    for tamanho_bloco in (1, 3, 8, 13, 100, 1000):
+        assert _ler(texto, tamanho_bloco) == esperado
@@ -0,0 +1,123 @@
+import asyncio
+
+import pytest
+
+from partidas import ENCERRADA, LOTADO, OCUPADO, PRAZO, MotorPartidas, RecusaPartida
+
+PEDRA, PAPEL, TESOURA = 0, 1, 2
+
+
+def rodar(corrotina):
+    return asyncio.run(asyncio.wait_for(corrotina, timeout=5))
+
+
+def test_pareamento_e_resultado():
+    async def cenario():
+        motor = MotorPartidas()
+        espera = asyncio.create_task(motor.procurar("a", 35))
+        await asyncio.sleep(0)
+        assert motor.esperando == 1
+        partida, lado = await motor.procurar("b", 42)  # faixa vizinha
+        assert lado == 1
+        assert await espera == (partida, 0)
+        assert motor.esperando == 0 and motor.em_andamento == 1
+        jogada_a = asyncio.create_task(motor.jogar(partida, 0, PEDRA))
+        resultado_b = await motor.jogar(partida, 1, PAPEL)
+        return motor, await jogada_a, resultado_b
+
+    motor, resultado_a, resultado_b = rodar(cenario())
+    assert resultado_a["resultado"] == "derrota" and resultado_b["resultado"] == "vitoria"
+    assert resultado_a["jogada_adversario"] == "papel" and not resultado_a["wo"]
+    assert motor.em_andamento == 0
+    assert motor.situacao()["contagens"] == {"pareadas": 1, "concluidas": 1}
+
+
+def test_faixas_distantes_so_pareiam_depois_de_ampliar():
+    async def cenario():
+        motor = MotorPartidas(ampliar_apos=0.05)
+        antigo = asyncio.create_task(motor.procurar("a", 0))
+        distante = asyncio.create_task(motor.procurar("b", 90))
+        await asyncio.sleep(0)
+        assert motor.esperando == 2
+        await asyncio.sleep(0.1)
+        # Qualquer faixa serve para quem já esperou demais: o mais antigo primeiro
+        partida, _ = await motor.procurar("c", 50)
+        assert (await antigo)[0] is partida
+        assert partida.jogadores == ("a", "c")
+        assert motor.esperando == 1
+        distante.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await distante
+        return motor
+
+    motor = rodar(cenario())
+    assert motor.esperando == 0
+    assert motor.contagens["desistencias"] == 1
+
+
+def test_prazo_de_pareamento():
+    async def cenario():
+        motor = MotorPartidas(prazo_pareamento=0.05)
+        with pytest.raises(RecusaPartida) as erro:
+            await motor.procurar("a")
+        return motor, erro.value.motivo
+
+    motor, motivo = rodar(cenario())
+    assert motivo == PRAZO
+    assert motor.esperando == 0
+    assert motor.contagens["recusa_prazo"] == 1
+
+
+def test_wo_de_quem_nao_joga_no_prazo():
+    async def cenario():
+        motor = MotorPartidas(prazo_jogada=0.05)
+        espera = asyncio.create_task(motor.procurar("a"))
+        await asyncio.sleep(0)
+        partida, lado = await motor.procurar("b")
+        await espera
+        resultado = await motor.jogar(partida, lado, TESOURA)
+        with pytest.raises(RecusaPartida) as erro:
+            await motor.jogar(partida, 0, PEDRA)
+        return motor, resultado, erro.value.motivo
+
+    motor, resultado, motivo = rodar(cenario())
+    assert resultado["resultado"] == "vitoria" and resultado["wo"]
+    assert resultado["jogada_adversario"] is None
+    assert motivo == ENCERRADA
+    assert motor.em_andamento == 0
+    assert motor.contagens["wo"] == 1
+
+
+def test_partida_sem_jogadas_cancelada():
+    async def cenario():
+        motor = MotorPartidas(prazo_jogada=0.05)
+        espera = asyncio.create_task(motor.procurar("a"))
+        await asyncio.sleep(0)
+        partida, _ = await motor.procurar("b")
+        await espera
+        await asyncio.sleep(0.1)
+        return motor, partida
+
+    motor, partida = rodar(cenario())
+    assert partida.futuro.result() is None
+    assert motor.em_andamento == 0
+    assert motor.contagens["canceladas"] == 1
+
+
+def test_recusas_ocupado_e_lotado():
+    async def cenario():
+        motor = MotorPartidas(max_espera=1)
+        espera = asyncio.create_task(motor.procurar("a", 0))
+        await asyncio.sleep(0)
+        motivos = []
+        for jogador, habilidade in (("a", 0), ("b", 90)):
+            try:
+                await motor.procurar(jogador, habilidade)
+            except RecusaPartida as erro:
+                motivos.append(erro.motivo)
+        espera.cancel()
+        return motor, motivos
+
+    motor, motivos = rodar(cenario())
+    assert motivos == [OCUPADO, LOTADO]
+    assert motor.contagens["recusa_ocupado"] == motor.contagens["recusa_lotado"] == 1
@@ -0,0 +1,87 @@
+import pytest
+
+from modelo_jogador import modelo_de_bytes
+from preditor_ngram import LIMITE_CONTAGEM, PreditorNGram
+
+
+def test_contexto_codificado_em_base_3():
+    preditor = PreditorNGram(ordem_max=3)
+    for jogada in (2, 0, 1, 1):
+        preditor.registrar(jogada)
+    # As 3 últimas jogadas (0, 1, 1) em base 3
+    assert preditor._contexto == 0 * 9 + 1 * 3 + 1
+    # Ordem 1: depois de 0 veio 1; ordem 2: depois de (2, 0) veio 1
+    assert preditor.tabelas[0][0 * 3 + 1] == 1
+    assert preditor.tabelas[1][(2 * 3 + 0) * 3 + 1] == 1
+    # Ordem 3 só conta a partir da 4ª rodada: depois de (2, 0, 1) veio 1
+    assert sum(preditor.tabelas[2]) == 1
+    assert preditor.tabelas[2][(2 * 9 + 0 * 3 + 1) * 3 + 1] == 1
+
+
+def test_contexto_conjunto_usa_a_jogada_do_computador():
+    preditor = PreditorNGram(ordem_max=2, conjunto=True)
+    preditor.registrar(1, 2)
+    preditor.registrar(0, 0)
+    # Depois de (jogador 1, computador 2) o jogador jogou 0
+    assert preditor.tabelas_conjuntas[0][(1 * 3 + 2) * 3 + 0] == 1
+    assert preditor._contexto_conjunto == (1 * 3 + 2) * 9 + (0 * 3 + 0)
+
+
+def test_preve_padrao_da_ordem_mais_alta():
+    preditor = PreditorNGram(ordem_max=3)
+    assert preditor.prever() is None
+    for _ in range(10):
+        for jogada in (0, 0, 1):
+            preditor.registrar(jogada)
+    # Depois de (0, 0, 1) vem 0; as ordens 2 e 3 têm confiança 1 e a mais alta prevalece
+    jogada, confianca, ordem = preditor.prever_com_confianca()
+    assert jogada == 0
+    assert confianca == 1.0
+    assert ordem == 3
+
+
+def test_limite_de_bytes_corta_as_ordens():
+    # Ordem 1 (9 bytes) + ordem 2 (27) cabem em 40; a ordem 3 (81) não
+    preditor = PreditorNGram(ordem_max=5, limite_bytes=40)
+    assert preditor.ordem_max == 2
+    assert preditor.bytes_tabelas == 36
+    # As tabelas conjuntas só usam o que sobra das do jogador
+    conjunto = PreditorNGram(ordem_max=2, conjunto=True, limite_bytes=36 + 27)
+    assert conjunto.ordem_max == 2
+    assert conjunto.ordem_max_conjunta == 1
+    assert conjunto.bytes_tabelas == 36 + 27
+    with pytest.raises(ValueError):
+        PreditorNGram(ordem_max=1, limite_bytes=8)
+
+
+def test_contagem_saturada_divide_a_linha():
+    preditor = PreditorNGram(ordem_max=1)
+    preditor.registrar(2)
+    for _ in range(LIMITE_CONTAGEM):
+        preditor.registrar(2)
+    preditor.registrar(1)
+    linha = list(preditor.tabelas[0][6:9])
+    assert linha == [0, 1, LIMITE_CONTAGEM]
+    preditor.registrar(1)
+    preditor.registrar(2)
+    preditor.registrar(2)
+    # Ao saturar, a linha do contexto 2 é dividida por dois antes de incrementar
+    assert list(preditor.tabelas[0][6:9]) == [0, 0, LIMITE_CONTAGEM // 2 + 1]
+    assert max(max(tabela) for tabela in preditor.tabelas) <= LIMITE_CONTAGEM
+
+
+def test_serializacao_ida_e_volta():
+    preditor = PreditorNGram(ordem_max=3, conjunto=True, limite_bytes=4096, minimo_observacoes=3)
+    for indice in range(200):
+        preditor.registrar(indice * 7 % 3, indice % 3)
+    copia = modelo_de_bytes(preditor.para_bytes())
+    assert isinstance(copia, PreditorNGram)
+    assert copia.para_bytes() == preditor.para_bytes()
+    assert len(copia) == 200
+    assert copia.ultima == preditor.ultima
+    assert copia.minimo_observacoes == 3
+    assert copia.prever_com_confianca() == preditor.prever_com_confianca()
+    # A cópia continua de onde o original parou
+    preditor.registrar(1, 0)
+    copia.registrar(1, 0)
+    assert copia.para_bytes() == preditor.para_bytes()
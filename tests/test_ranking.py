@@ -0,0 +1,74 @@
+import random
+
+from historico_rodadas import HistoricoRodadas
+from ranking import FOLGA_TAXA, IndiceOrdenado, Ranking, apelido
+
+EMPATE, VITORIA, DERROTA = 0, 1, 2
+
+
+def test_indice_limitado_guarda_o_limite_de_quem_ficou_de_fora():
+    indice = IndiceOrdenado(2)
+    for jogador, ordem in (("a", 1), ("b", 2), ("c", 3)):
+        indice.atualizar(jogador, ordem)
+    assert indice.primeiros(5) == ["a", "b"]
+    assert indice.limite == (3, "c")
+    # Piorou além do limite: sai, e o índice não conhece mais os 2 primeiros
+    indice.atualizar("a", 4)
+    assert indice.primeiros(5) == ["b"]
+    assert indice.incompleto(2)
+    # Quem está fora não volta sem passar do limite
+    indice.atualizar("d", 5)
+    assert "d" not in indice
+    indice.atualizar("d", 0)
+    assert indice.primeiros(5) == ["d", "b"]
+
+
+def test_ranking_de_taxa_limitado_e_igual_ao_completo(tmp_path):
+    caminho = str(tmp_path / "historico.db")
+    historico = HistoricoRodadas(caminho, intervalo=60)
+    ranking = Ranking(caminho, tamanho=3, min_rodadas_taxa=5, intervalo=0)
+    sorteio = random.Random(7)
+    jogadores = [f"{indice:032x}" for indice in range(60)]
+    contagens = {jogador: [0, 0] for jogador in jogadores}  # vitórias, rodadas
+    for passo in range(40):
+        for jogador in sorteio.sample(jogadores, 15):
+            # Depois do passo 20, metade dos jogadores só perde: a taxa de vários líderes cai
+            chance = 0.0 if passo >= 20 and int(jogador, 16) % 2 == 0 else 0.6
+            rodadas = [(0, 0, VITORIA if sorteio.random() < chance else sorteio.choice((EMPATE, DERROTA)))
+                       for _ in range(sorteio.randint(1, 4))]
+            historico.registrar(jogador, rodadas)
+            contagens[jogador][0] += sum(resultado == VITORIA for _, _, resultado in rodadas)
+            contagens[jogador][1] += len(rodadas)
+        historico.descarregar()
+        _, tabela = ranking.obter()
+        esperado = sorted(
+            (jogador for jogador, (_, rodadas) in contagens.items() if rodadas >= 5),
+            key=lambda jogador: (-contagens[jogador][0] / contagens[jogador][1], -contagens[jogador][1], jogador),
+        )[:3]
+        assert [linha["jogador"] for linha in tabela["geral"]["taxa_vitorias"]] == [apelido(j) for j in esperado]
+        # O índice nunca passa da folga, qualquer que seja o número de jogadores
+        assert len(ranking._geral.indices["taxa_vitorias"]) <= 3 * FOLGA_TAXA
+    historico.fechar()
+
+
+def test_indice_de_taxa_recarregado_quando_os_lideres_caem(tmp_path):
+    caminho = str(tmp_path / "historico.db")
+    historico = HistoricoRodadas(caminho, intervalo=60)
+    ranking = Ranking(caminho, tamanho=2, min_rodadas_taxa=1, intervalo=0)
+    capacidade = 2 * FOLGA_TAXA
+    # Taxas decrescentes: o primeiro com 100%, os demais cada vez piores
+    jogadores = [f"{indice:032x}" for indice in range(capacidade + 4)]
+    for posicao, jogador in enumerate(jogadores):
+        historico.registrar(jogador, [(0, 0, VITORIA)] * (100 - posicao) + [(0, 0, DERROTA)] * posicao)
+    historico.descarregar()
+    ranking.obter()
+    assert ranking._geral.indices["taxa_vitorias"].limite is not None
+    # Todos os guardados no índice, menos um, passam a perder quase sempre
+    for jogador in jogadores[:capacidade - 1]:
+        historico.registrar(jogador, [(0, 0, DERROTA)] * 1000)
+    historico.descarregar()
+    _, tabela = ranking.obter()
+    # Os dois primeiros agora vêm de fora do índice original
+    esperados = [jogadores[capacidade - 1], jogadores[capacidade]]
+    assert [linha["jogador"] for linha in tabela["geral"]["taxa_vitorias"]] == [apelido(j) for j in esperados]
+    historico.fechar()
@@ -0,0 +1,21 @@
+import logging
+
+import registro
+
+
+def test_um_listener_por_processo(tmp_path):
+    logger = logging.getLogger("teste_registro")
+    arquivo = str(tmp_path / "teste.log")
+    primeiro = registro.configurar_logger(logger, arquivo=arquivo)
+    logger.info("primeira configuração")
+    segundo = registro.configurar_logger(logger, arquivo=arquivo)
+    try:
+        # O listener anterior foi parado (e gravou o que estava na fila)
+        assert primeiro._thread is None
+        assert segundo._thread is not None
+        assert registro._atual['listener'] is segundo
+        with open(arquivo, encoding="utf-8") as log:
+            assert "primeira configuração" in log.read()
+    finally:
+        registro._encerrar_atual()
+        logger.handlers = []